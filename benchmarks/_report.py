@@ -0,0 +1,52 @@
+import json
+import os
+import platform
+import subprocess
+import time
+from typing import Dict, List, Optional
+
+# отчеты по умолчанию складываются сюда, имя - <сценарий>-<commit>.json
+REPORTS_DIR = os.path.join("benchmarks", "reports")
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> Dict[str, object]:
+    # чем отчет снят: без коммита и машины сравнивать прогоны бессмысленно
+    return {
+        "commit": _git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+class Report:
+    # результаты одного прогона: сценарий + параметры (уровень нагрузки) -> метрики
+    def __init__(self, suite: str, options: Dict[str, object]):
+        self.suite = suite
+        self.options = options
+        self.results: List[Dict[str, object]] = []
+
+    def add(self, scenario: str, params: Dict[str, object], metrics: Dict[str, float]) -> None:
+        self.results.append({"scenario": scenario, "params": params, "metrics": metrics})
+
+    def write(self, path: Optional[str] = None) -> str:
+        env = environment()
+        if path is None:
+            os.makedirs(REPORTS_DIR, exist_ok=True)
+            path = os.path.join(REPORTS_DIR, f"{self.suite}-{env['commit'] or 'nogit'}.json")
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(
+                {"suite": self.suite, "environment": env, "options": self.options, "results": self.results},
+                file, indent=2, ensure_ascii=False
+            )
+            file.write("\n")
+        return path
@@ -0,0 +1,37 @@
+from typing import Sequence
+
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+SEED_CHUNK_ROWS = 200_000
+
+
+async def seed_series(repo: PriceRepository, ticker: str, start: int, step: int, rows: int) -> None:
+    # синтетическая история генерируется в самом PostgreSQL, без передачи строк по сети
+    await repo.ensure_partitions(start, start + step * rows)
+    pool = await repo.db.get_pool()
+    async with pool.acquire() as conn:
+        await conn.execute(
+            "INSERT INTO tickers (name) SELECT $1::varchar WHERE NOT EXISTS (SELECT 1 FROM tickers WHERE name = $1)",
+            ticker
+        )
+        # кусками, чтобы миллионы строк не упирались в db_command_timeout
+        for first in range(0, rows, SEED_CHUNK_ROWS):
+            await conn.execute(
+                """
+                INSERT INTO prices (timestamp, price, ticker_id)
+                SELECT $2 + n * $3, 20000 + 1000 * sin(n / 5000.0), (SELECT id FROM tickers WHERE name = $1)
+                FROM generate_series($4, $5 - 1) AS n
+                """,
+                ticker, start, step, first, min(first + SEED_CHUNK_ROWS, rows)
+            )
+        await conn.execute("ANALYZE prices")
+
+
+async def delete_tickers(repo: PriceRepository, tickers: Sequence[str]) -> None:
+    pool = await repo.db.get_pool()
+    async with pool.acquire() as conn:
+        await conn.execute(
+            "DELETE FROM prices WHERE ticker_id IN (SELECT id FROM tickers WHERE name = ANY($1::varchar[]))",
+            list(tickers)
+        )
+        await conn.execute("DELETE FROM price_rollups WHERE ticker = ANY($1::varchar[])", list(tickers))
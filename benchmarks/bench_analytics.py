@@ -0,0 +1,140 @@
+"""Аналитика по году минутных цен: векторные функции src.domain.analytics против циклов по строкам.
+
+Запуск: python -m benchmarks.bench_analytics [--days 365] [--database-url postgresql://...]
+Наивный вариант - то, что делают клиенты сейчас: список Price и проход по нему в Python. Векторный -
+PriceSeries.numpy() и функции из src.domain.analytics. Результаты обоих сверяются.
+С --database-url сравнивается и загрузка: get_all_by_ticker против get_price_series (тикер BENCH_USD
+создается и удаляется).
+"""
+import argparse
+import asyncio
+import math
+import time
+
+import numpy as np
+
+from benchmarks._seed import delete_tickers, seed_series
+from src.domain import analytics
+from src.domain.models import PriceSeries
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+BENCH_TICKER = "BENCH_USD"
+WINDOW = 60
+DAY = 86400
+HOUR = 3600
+
+
+def _naive_returns(prices):
+    return [math.log(b.price / a.price) for a, b in zip(prices, prices[1:])]
+
+
+def _naive_volatility(prices):
+    sums = {}
+    for previous, current in zip(prices, prices[1:]):
+        bucket = current.timestamp // DAY * DAY
+        sums[bucket] = sums.get(bucket, 0.0) + math.log(current.price / previous.price) ** 2
+    return [math.sqrt(value) for value in sums.values()]
+
+
+def _naive_sma(prices):
+    result = []
+    total = 0.0
+    for i, price in enumerate(prices):
+        total += price.price
+        if i >= WINDOW:
+            total -= prices[i - WINDOW].price
+        if i >= WINDOW - 1:
+            result.append(total / WINDOW)
+    return result
+
+
+def _naive_ema(prices):
+    alpha = 2 / (WINDOW + 1)
+    result = [prices[0].price]
+    for price in prices[1:]:
+        result.append(alpha * price.price + (1 - alpha) * result[-1])
+    return result
+
+
+def _naive_twap(prices, end):
+    weighted = {}
+    durations = {}
+    for i, price in enumerate(prices):
+        bucket = price.timestamp // HOUR * HOUR
+        until = min(prices[i + 1].timestamp if i + 1 < len(prices) else end, bucket + HOUR, end)
+        weighted[bucket] = weighted.get(bucket, 0.0) + price.price * (until - price.timestamp)
+        durations[bucket] = durations.get(bucket, 0) + until - price.timestamp
+    return [weighted[bucket] / durations[bucket] for bucket in weighted]
+
+
+def _timed(call):
+    started = time.perf_counter()
+    result = call()
+    return time.perf_counter() - started, result
+
+
+def _compare(prices, series: PriceSeries, end: int) -> None:
+    timestamps, values = series.numpy()
+    cases = [
+        ("log returns", lambda: _naive_returns(prices), lambda: analytics.log_returns(values)),
+        ("realized volatility 1d", lambda: _naive_volatility(prices),
+         lambda: analytics.realized_volatility(timestamps, values, DAY)[1]),
+        (f"SMA({WINDOW})", lambda: _naive_sma(prices), lambda: analytics.sma(values, WINDOW)),
+        (f"EMA({WINDOW})", lambda: _naive_ema(prices), lambda: analytics.ema(values, WINDOW)),
+        ("TWAP 1h", lambda: _naive_twap(prices, end), lambda: analytics.twap(timestamps, values, end, HOUR)[1]),
+    ]
+    print(f"{'indicator':<24} {'python loop, ms':>16} {'numpy, ms':>10} {'speedup':>8}")
+    for name, naive, vectorized in cases:
+        naive_seconds, expected = _timed(naive)
+        vectorized_seconds, actual = _timed(vectorized)
+        if not np.allclose(actual, expected, rtol=1e-9):
+            raise AssertionError(f"{name}: results differ")
+        print(
+            f"{name:<24} {naive_seconds * 1000:>16.0f} {vectorized_seconds * 1000:>10.1f} "
+            f"{naive_seconds / vectorized_seconds:>7.0f}x"
+        )
+
+
+async def _timed_async(awaitable):
+    started = time.perf_counter()
+    result = await awaitable
+    return time.perf_counter() - started, result
+
+
+async def _database(database_url: str, rows: int, start: int) -> None:
+    db = Database(database_url)
+    repo = PriceRepository(db)
+    await repo.create_table_if_not_exists()
+    try:
+        await delete_tickers(repo, [BENCH_TICKER])
+        await seed_series(repo, BENCH_TICKER, start, 60, rows)
+        await repo.get_price_series(BENCH_TICKER)
+        list_seconds, _ = await _timed_async(repo.get_all_by_ticker(BENCH_TICKER))
+        series_seconds, _ = await _timed_async(repo.get_price_series(BENCH_TICKER))
+        print(f"load from PostgreSQL: get_all_by_ticker {list_seconds * 1000:.0f} ms, "
+              f"get_price_series {series_seconds * 1000:.0f} ms")
+    finally:
+        await delete_tickers(repo, [BENCH_TICKER])
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+    rows = args.days * 1440
+    start = 1_700_006_400 // DAY * DAY
+    rng = np.random.default_rng(0)
+    values = 20000 * np.exp(np.cumsum(rng.normal(0, 1e-3, rows)))
+    series = PriceSeries(BENCH_TICKER, range(start, start + rows * 60, 60), values.tolist())
+    prices = series.to_prices()
+    print(f"rows={rows} ({args.days} days of minute prices)")
+    _compare(prices, series, start + rows * 60)
+    if args.database_url:
+        asyncio.run(_database(args.database_url, rows, start))
+
+
+if __name__ == "__main__":
+    main()
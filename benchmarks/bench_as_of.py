@@ -0,0 +1,70 @@
+"""As-of поиск цены: отсортированный индекс в памяти против SQL `timestamp <= $2 ORDER BY timestamp DESC LIMIT 1`.
+
+Запуск: python -m benchmarks.bench_as_of --database-url postgresql://... [--rows 604800 --lookups 20000]
+Генерирует посекундную историю за последние --rows секунд для тикера BENCH_USD и удаляет ее по окончании.
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks._seed import delete_tickers, seed_series
+from src.infrastructure.cache.price_cache import CachedPriceRepository
+from src.infrastructure.cache.price_index import PriceIndex
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+BENCH_TICKER = "BENCH_USD"
+
+
+async def _measure(name: str, lookup, timestamps, concurrency: int):
+    # concurrency параллельных "клиентов" делят между собой список запросов
+    async def worker(chunk):
+        for timestamp in chunk:
+            await lookup(BENCH_TICKER, timestamp)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(timestamps[i::concurrency]) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    print(f"{name:<22} {len(timestamps):>8} lookups {elapsed:>7.2f}s {len(timestamps) / elapsed:>12.0f} lookups/s")
+
+
+async def run(database_url: str, rows: int, lookups: int, concurrency: int):
+    db = Database(database_url)
+    repo = PriceRepository(db)
+    await repo.create_table_if_not_exists()
+    now = int(time.time())
+    start = now - rows
+    try:
+        await delete_tickers(repo, [BENCH_TICKER])
+        await seed_series(repo, BENCH_TICKER, start, 1, rows)
+        rng = random.Random(0)
+        timestamps = [rng.randrange(start, now) for _ in range(lookups)]
+
+        index = PriceIndex(window_seconds=rows + 60)
+        index.set_enabled(True)
+        cached_repo = CachedPriceRepository(db, None, index)
+        started = time.perf_counter()
+        series = await index.get_series(BENCH_TICKER, cached_repo)
+        print(f"index load: {len(series.timestamps)} points in {time.perf_counter() - started:.2f}s")
+
+        await _measure("SQL", repo.get_at_or_before, timestamps, concurrency)
+        await _measure("sorted index", cached_repo.get_at_or_before, timestamps, concurrency)
+        assert index.fallbacks == 0
+    finally:
+        await delete_tickers(repo, [BENCH_TICKER])
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--rows", type=int, default=7 * 86400)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.database_url, args.rows, args.lookups, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
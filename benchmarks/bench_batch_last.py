@@ -0,0 +1,107 @@
+"""30 тикеров: 30 запросов /api/prices/last против одного /api/prices/batch/last.
+
+Запуск: python -m benchmarks.bench_batch_last --database-url postgresql://... [--tickers 30 --repeats 50]
+Пишет историю для тикеров BENCH0..BENCHn и удаляет ее по окончании.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+
+from benchmarks._http_load import free_port, percentile, start_api, wait_ready
+from src.domain.models import Price
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+
+async def _seed(database_url: str, tickers):
+    db = Database(database_url)
+    repo = PriceRepository(db)
+    try:
+        await repo.create_table_if_not_exists()
+        await repo.save_many([
+            Price(ticker=ticker, price=100.0 + i, timestamp=1_600_000_000 + i * 60)
+            for ticker in tickers
+            for i in range(100)
+        ])
+    finally:
+        await db.close()
+
+
+async def _cleanup(database_url: str, tickers):
+    db = Database(database_url)
+    try:
+        pool = await db.get_pool()
+        async with pool.acquire() as conn:
+            await conn.execute(
+                "DELETE FROM prices WHERE ticker_id IN (SELECT id FROM tickers WHERE name = ANY($1::varchar[]))", tickers
+            )
+            await conn.execute("DELETE FROM price_rollups WHERE ticker = ANY($1::varchar[])", tickers)
+    finally:
+        await db.close()
+
+
+async def _timed(session, requests):
+    started = time.perf_counter()
+    for url in requests:
+        async with session.get(url) as response:
+            await response.read()
+    return time.perf_counter() - started
+
+
+async def _timed_parallel(session, requests):
+    async def get(url):
+        async with session.get(url) as response:
+            await response.read()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(get(url) for url in requests))
+    return time.perf_counter() - started
+
+
+def _report(name, samples):
+    samples = sorted(samples)
+    print(f"{name:<30} p50={statistics.median(samples) * 1000:>7.1f}ms p95={percentile(samples, 0.95) * 1000:>7.1f}ms")
+
+
+async def run(database_url: str, ticker_count: int, repeats: int, cache_enabled: str):
+    tickers = [f"BENCH{i}" for i in range(ticker_count)]
+    await _seed(database_url, tickers)
+    port = free_port()
+    api = start_api({"DATABASE_URL": database_url, "LATEST_PRICE_CACHE_ENABLED": cache_enabled}, port)
+    base_url = f"http://127.0.0.1:{port}/api/prices"
+    single_urls = [f"{base_url}/last?ticker={ticker}" for ticker in tickers]
+    batch_url = f"{base_url}/batch/last?" + "&".join(f"ticker={ticker}" for ticker in tickers)
+    try:
+        await wait_ready(single_urls[0])
+        async with aiohttp.ClientSession() as session:
+            sequential, parallel, batch = [], [], []
+            for _ in range(repeats):
+                sequential.append(await _timed(session, single_urls))
+                parallel.append(await _timed_parallel(session, single_urls))
+                batch.append(await _timed(session, [batch_url]))
+    finally:
+        api.terminate()
+        api.wait()
+        await _cleanup(database_url, tickers)
+
+    print(f"{ticker_count} tickers, cache={cache_enabled}, {repeats} repeats")
+    _report(f"{ticker_count} x /last sequential", sequential)
+    _report(f"{ticker_count} x /last parallel", parallel)
+    _report("1 x /batch/last", batch)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--tickers", type=int, default=30)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--cache", choices=["true", "false"], default="false")
+    args = parser.parse_args()
+    asyncio.run(run(args.database_url, args.tickers, args.repeats, args.cache))
+
+
+if __name__ == "__main__":
+    main()
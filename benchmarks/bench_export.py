@@ -0,0 +1,123 @@
+"""Выгрузка истории: /api/prices/all (JSON) против /api/prices/export (CSV, Arrow, Parquet).
+
+Запуск: python -m benchmarks.bench_export --database-url postgresql://... [--rows 1000000]
+Генерирует посекундную историю из --rows строк для BENCH_USD (удаляется по окончании). Для каждого варианта
+поднимается отдельный процесс API, чтобы пик его памяти (VmHWM) относился только к одной выгрузке. Меряется
+скорость скачивания (MB/s по телу ответа и строк/с), прирост пиковой RSS сервера относительно прогретого процесса
+и время, за которое клиент превращает ответ в колонки (json.loads + списки против pyarrow).
+"""
+import argparse
+import asyncio
+import io
+import json
+import time
+
+import aiohttp
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from benchmarks._http_load import free_port, start_api, wait_ready
+from benchmarks._seed import delete_tickers, seed_series
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+BENCH_TICKER = "BENCH_USD"
+
+
+def _json_columns(body: bytes):
+    rows = json.loads(body)
+    return [row["price"] for row in rows], [row["timestamp"] for row in rows]
+
+
+def _ndjson_columns(body: bytes):
+    rows = [json.loads(line) for line in body.splitlines()]
+    return [row["price"] for row in rows], [row["timestamp"] for row in rows]
+
+
+VARIANTS = {
+    "/all json": ("all", {}, {}, _json_columns),
+    "/all stream ndjson": ("all", {"stream": "true"}, {"Accept": "application/x-ndjson"}, _ndjson_columns),
+    "/export csv": ("export", {"format": "csv"}, {}, lambda body: pa_csv.read_csv(io.BytesIO(body))),
+    "/export arrow": ("export", {"format": "arrow"}, {}, lambda body: pa.ipc.open_stream(body).read_all()),
+    "/export parquet": ("export", {"format": "parquet"}, {}, lambda body: pq.read_table(io.BytesIO(body))),
+}
+
+
+def _peak_rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+async def _download(url: str, params, headers) -> bytes:
+    timeout = aiohttp.ClientTimeout(total=None)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        async with session.get(url, params={"ticker": BENCH_TICKER, **params}, headers=headers) as response:
+            response.raise_for_status()
+            parts = []
+            async for chunk in response.content.iter_chunked(1 << 20):
+                parts.append(chunk)
+            return b"".join(parts)
+
+
+async def _measure(database_url: str, name: str, variant, rows: int) -> None:
+    path, params, headers, to_columns = variant
+    port = free_port()
+    api = start_api(
+        {"DATABASE_URL": database_url, "LATEST_PRICE_CACHE_ENABLED": "false", "PRICE_INDEX_ENABLED": "false"}, port
+    )
+    try:
+        base = f"http://127.0.0.1:{port}/api/prices"
+        await wait_ready(f"http://127.0.0.1:{port}/ready")
+        # прогрев маленьким запросом того же вида: импорты и первое соединение не попадают в пик
+        await _download(f"{base}/{path}", {**params, "after": "9999999999"}, headers)
+        baseline = _peak_rss_mb(api.pid)
+        started = time.perf_counter()
+        body = await _download(f"{base}/{path}", params, headers)
+        elapsed = time.perf_counter() - started
+        peak = _peak_rss_mb(api.pid) - baseline
+    finally:
+        api.terminate()
+        api.wait()
+    started = time.perf_counter()
+    to_columns(body)
+    parse = time.perf_counter() - started
+    size = len(body) / 1e6
+    print(
+        f"{name:<20} {size:>8.1f} MB {elapsed:>7.2f} s {size / elapsed:>8.1f} MB/s {rows / elapsed:>10.0f} "
+        f"{peak:>8.0f} MB {parse:>8.2f} s"
+    )
+
+
+async def run(database_url: str, rows: int):
+    db = Database(database_url)
+    repo = PriceRepository(db)
+    await repo.create_table_if_not_exists()
+    try:
+        await delete_tickers(repo, [BENCH_TICKER])
+        await seed_series(repo, BENCH_TICKER, int(time.time()) - rows, 1, rows)
+        print(f"rows={rows}")
+        print(
+            f"{'variant':<20} {'body':>11} {'time':>9} {'speed':>13} {'rows/s':>10} "
+            f"{'server peak':>11} {'to columns':>10}"
+        )
+        for name, variant in VARIANTS.items():
+            await _measure(database_url, name, variant, rows)
+    finally:
+        await delete_tickers(repo, [BENCH_TICKER])
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.database_url, args.rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Время одного цикла fetch_prices в зависимости от количества индексов.
+
+Запуск: python -m benchmarks.bench_fetch_prices [--latency 0.05] [--concurrency 100]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.fake_deribit import run_stub_server
+from src.infrastructure.external.deribit_client import DeribitClient
+
+INDEX_COUNTS = [2, 5, 10, 25, 50, 100]
+
+
+async def _sequential_cycle(client: DeribitClient, index_names):
+    # старое поведение: индексы запрашиваются по очереди
+    return [await client.get_price(name) for name in index_names]
+
+
+async def run(latency: float, concurrency: int, repeats: int):
+    async with run_stub_server(latency) as base_url:
+        client = DeribitClient(base_url=base_url, max_concurrency=concurrency)
+        try:
+            await client.get_index_prices(["warmup_usd"])
+            print(f"latency={latency * 1000:.0f}ms concurrency={concurrency}")
+            print(f"{'indices':>8} {'concurrent, ms':>15} {'sequential, ms':>15}")
+            for count in INDEX_COUNTS:
+                index_names = [f"idx{i}_usd" for i in range(count)]
+                concurrent_times = []
+                sequential_times = []
+                for _ in range(repeats):
+                    started = time.perf_counter()
+                    prices = await client.get_index_prices(index_names)
+                    concurrent_times.append(time.perf_counter() - started)
+                    assert len(prices) == count
+
+                    started = time.perf_counter()
+                    await _sequential_cycle(client, index_names)
+                    sequential_times.append(time.perf_counter() - started)
+                print(
+                    f"{count:>8} {statistics.median(concurrent_times) * 1000:>15.1f} "
+                    f"{statistics.median(sequential_times) * 1000:>15.1f}"
+                )
+        finally:
+            await client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.latency, args.concurrency, args.repeats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Повторные опросы дашборда: трафик и задержка без HTTP-кэширования, со сжатием и с If-None-Match.
+
+Запуск: python -m benchmarks.bench_http_cache --database-url postgresql://... [--days 30 --polls 50]
+Генерирует минутную историю BENCH_USD за --days суток до текущего момента (удаляется по окончании) и поднимает API.
+Один опрос дашборда - пять запросов: вся история /all, последняя страница /all, страница недельной давности,
+часовые свечи за неделю и цена на точный момент позавчера. Клиенты:
+- plain - без Accept-Encoding и без ETag, как скрипт с requests в цикле;
+- compressed - Accept-Encoding: gzip, br, без ETag (первый визит);
+- conditional - сжатие плюс If-None-Match с ETag прошлого ответа (повторные опросы, данные не менялись).
+Размер - байты тела на проводе, до распаковки. Браузер с immutable-ответами в кэше их бы вообще не запрашивал,
+здесь conditional их все равно перепроверяет.
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+import aiohttp
+
+from benchmarks._http_load import free_port, percentile, start_api, wait_ready
+from benchmarks._seed import delete_tickers, seed_series
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+BENCH_TICKER = "BENCH_USD"
+DAY = 86400
+HOUR = 3600
+
+
+def _dashboard(now: int) -> Dict[str, str]:
+    hour = now // HOUR * HOUR
+    week_ago = now - 7 * DAY
+    return {
+        "/all full history": f"/api/prices/all?ticker={BENCH_TICKER}",
+        "/all latest page": f"/api/prices/all?ticker={BENCH_TICKER}&limit=1000",
+        "/all week-old page": f"/api/prices/all?ticker={BENCH_TICKER}&limit=1000&before={week_ago}",
+        "/ohlc 1h for 7 days": f"/api/prices/ohlc?ticker={BENCH_TICKER}&from={hour - 7 * DAY}&to={hour}&interval=1h",
+        "/by-date exact": f"/api/prices/by-date?ticker={BENCH_TICKER}&date={(now - 2 * DAY) // 60 * 60}",
+    }
+
+
+async def _poll(base_url: str, paths: Dict[str, str], polls: int, compressed: bool, conditional: bool):
+    # по каждому запросу дашборда: (байт на проводе, секунд) на каждый опрос
+    results: Dict[str, List[tuple]] = {name: [] for name in paths}
+    etags: Dict[str, str] = {}
+    statuses: Dict[str, int] = {}
+    async with aiohttp.ClientSession(auto_decompress=False) as session:
+        for _ in range(polls):
+            for name, path in paths.items():
+                headers = {"Accept-Encoding": "gzip, br" if compressed else "identity"}
+                if conditional and name in etags:
+                    headers["If-None-Match"] = etags[name]
+                started = time.perf_counter()
+                async with session.get(base_url + path, headers=headers) as response:
+                    body = await response.read()
+                    if "ETag" in response.headers:
+                        etags[name] = response.headers["ETag"]
+                    statuses[name] = response.status
+                results[name].append((len(body), time.perf_counter() - started))
+    return results, statuses
+
+
+async def run(database_url: str, days: int, polls: int) -> None:
+    db = Database(database_url)
+    repo = PriceRepository(db)
+    await repo.create_table_if_not_exists()
+    now = int(time.time()) // 60 * 60
+    rows = days * 1440
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    api = start_api({"DATABASE_URL": database_url}, port)
+    try:
+        await delete_tickers(repo, [BENCH_TICKER])
+        await seed_series(repo, BENCH_TICKER, now - rows * 60, 60, rows)
+        # seed_series пишет мимо save_many, часовые свечи /ohlc строятся отдельно
+        await repo.rebuild_rollups(BENCH_TICKER, now - rows * 60, now)
+        await wait_ready(f"{base_url}/ready")
+        paths = _dashboard(now)
+        await _poll(base_url, paths, 2, compressed=True, conditional=False)
+        print(f"rows={rows} ({days} days of minute prices), polls={polls}")
+        print(f"{'request':<22} {'client':<12} {'bytes/poll':>12} {'p50 ms':>8} {'p95 ms':>8} {'last status':>12}")
+        totals = {}
+        for client, compressed, conditional in (
+                ("plain", False, False), ("compressed", True, False), ("conditional", True, True)
+        ):
+            results, statuses = await _poll(base_url, paths, polls, compressed, conditional)
+            total_bytes = 0
+            total_seconds = 0.0
+            for name, samples in results.items():
+                # первый опрос conditional еще без ETag - в установившемся режиме его не считаем
+                steady = samples[1:] if conditional else samples
+                sizes = [size for size, _ in steady]
+                latencies = sorted(seconds for _, seconds in steady)
+                total_bytes += sum(sizes) / len(sizes)
+                total_seconds += sum(latencies) / len(latencies)
+                print(
+                    f"{name:<22} {client:<12} {sum(sizes) / len(sizes):>12.0f} "
+                    f"{percentile(latencies, 0.5) * 1000:>8.2f} {percentile(latencies, 0.95) * 1000:>8.2f} "
+                    f"{statuses[name]:>12}"
+                )
+            totals[client] = (total_bytes, total_seconds)
+        print("per dashboard poll:")
+        for client, (total_bytes, total_seconds) in totals.items():
+            print(f"  {client:<12} {total_bytes / 1024:>10.1f} KiB {total_seconds * 1000:>9.1f} ms")
+    finally:
+        api.terminate()
+        api.wait()
+        await delete_tickers(repo, [BENCH_TICKER])
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--polls", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.database_url, args.days, args.polls))
+
+
+if __name__ == "__main__":
+    main()
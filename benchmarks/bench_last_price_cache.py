@@ -0,0 +1,56 @@
+"""Нагрузка на /api/prices/last с кэшем последней цены и без него.
+
+Запуск: python -m benchmarks.bench_last_price_cache --database-url postgresql://... [--concurrency 50 --duration 10]
+"""
+import argparse
+import asyncio
+
+from benchmarks._http_load import free_port, hammer, start_api, wait_ready
+from src.domain.models import Price
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+BENCH_TICKER = "BENCH_USD"
+
+
+async def _seed(database_url: str):
+    db = Database(database_url)
+    repo = PriceRepository(db)
+    try:
+        await repo.create_table_if_not_exists()
+        await repo.save(Price(ticker=BENCH_TICKER, price=100.0, timestamp=1_600_000_000))
+    finally:
+        await db.close()
+
+
+async def run(database_url: str, concurrency: int, duration: float):
+    await _seed(database_url)
+    print(f"concurrency={concurrency} duration={duration}s")
+    for cache_enabled in ["false", "true"]:
+        port = free_port()
+        api = start_api({"DATABASE_URL": database_url, "LATEST_PRICE_CACHE_ENABLED": cache_enabled}, port)
+        try:
+            url = f"http://127.0.0.1:{port}/api/prices/last?ticker={BENCH_TICKER}"
+            await wait_ready(url)
+            await hammer([url], concurrency, 1.0)
+            report = await hammer([url], concurrency, duration)
+        finally:
+            api.terminate()
+            api.wait()
+        print(
+            f"cache={cache_enabled:<5} {report['rps']:>8.0f} req/s  p50={report['p50_ms']:.1f}ms "
+            f"p99={report['p99_ms']:.1f}ms  errors={report['errors']}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.database_url, args.concurrency, args.duration))
+
+
+if __name__ == "__main__":
+    main()
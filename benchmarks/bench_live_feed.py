@@ -0,0 +1,147 @@
+"""Живая лента: тысячи подписчиков /api/prices/live (SSE) и /api/prices/live/ws (WebSocket) на одном процессе API.
+
+Запуск: python -m benchmarks.bench_live_feed --database-url postgresql://... [--subscribers 2000 --tickers 10 --updates 20]
+Подписчики поровну делятся между SSE и WebSocket и тикерами BENCH_LIVE_<n> (создаются и удаляются). Затем
+--updates раз вставляется по цене на каждый тикер, как это делает запись цен. Меряется задержка от вставки
+до получения клиентом, сколько цен дошло и сколько схлопнуто, и прирост db_query_duration_seconds_count API
+за время теста: раздача не должна делать запросов в БД на клиента.
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List
+
+import aiohttp
+
+from benchmarks._http_load import free_port, percentile, start_api, wait_ready
+from benchmarks._seed import delete_tickers
+from src.domain.models import Price
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+TICKER_PREFIX = "BENCH_LIVE_"
+
+
+async def _metric_sum(session: aiohttp.ClientSession, base_url: str, name: str) -> float:
+    async with session.get(f"{base_url}/metrics") as response:
+        text = await response.text()
+    return sum(float(line.rsplit(" ", 1)[1]) for line in text.splitlines() if line.startswith(name))
+
+
+class _Client:
+    def __init__(self, ticker: str):
+        self.ticker = ticker
+        # timestamp цены -> момент получения
+        self.received: Dict[int, float] = {}
+
+    def on_message(self, message: str) -> None:
+        self.received[json.loads(message)["timestamp"]] = time.time()
+
+
+async def _sse_client(session: aiohttp.ClientSession, base_url: str, client: _Client, ready: asyncio.Event) -> None:
+    async with session.get(f"{base_url}/api/prices/live", params={"ticker": client.ticker}) as response:
+        ready.set()
+        async for line in response.content:
+            if line.startswith(b"data: "):
+                client.on_message(line[6:].decode())
+
+
+async def _ws_client(session: aiohttp.ClientSession, base_url: str, client: _Client, ready: asyncio.Event) -> None:
+    async with session.ws_connect(f"{base_url}/api/prices/live/ws", params={"ticker": client.ticker}) as ws:
+        ready.set()
+        async for message in ws:
+            if message.type == aiohttp.WSMsgType.TEXT:
+                client.on_message(message.data)
+
+
+async def _publish(repo: PriceRepository, tickers: List[str], updates: int, interval: float) -> Dict[int, float]:
+    # timestamp раунда -> момент вставки; timestamps уникальны, потому что идут от текущей секунды вверх
+    base = int(time.time())
+    await repo.ensure_partitions(base, base + updates + 1)
+    sent_at = {}
+    for round_number in range(updates):
+        timestamp = base + round_number
+        sent_at[timestamp] = time.time()
+        await repo.save_many([Price(ticker=ticker, price=100.0 + round_number, timestamp=timestamp) for ticker in tickers])
+        await asyncio.sleep(interval)
+    return sent_at
+
+
+def _report(name: str, clients: List[_Client], sent_at: Dict[int, float]) -> None:
+    latencies = sorted(
+        received - sent_at[timestamp]
+        for client in clients
+        for timestamp, received in client.received.items()
+        if timestamp in sent_at
+    )
+    expected = len(clients) * len(sent_at)
+    last = max(sent_at)
+    with_last = sum(1 for client in clients if last in client.received)
+    print(
+        f"{name:<10} clients={len(clients):<6} delivered {len(latencies)}/{expected}, last price at {with_last} "
+        f"clients; latency p50={percentile(latencies, 0.5) * 1000:.1f}ms p99={percentile(latencies, 0.99) * 1000:.1f}ms "
+        f"max={(latencies[-1] if latencies else 0) * 1000:.1f}ms"
+    )
+
+
+async def run(database_url: str, subscribers: int, ticker_count: int, updates: int, interval: float) -> None:
+    tickers = [f"{TICKER_PREFIX}{n}" for n in range(ticker_count)]
+    db = Database(database_url)
+    repo = PriceRepository(db)
+    await repo.create_table_if_not_exists()
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    api = start_api({"DATABASE_URL": database_url, "LIVE_FEED_ENABLED": "true"}, port)
+    connector = aiohttp.TCPConnector(limit=0)
+    session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=None))
+    tasks = []
+    try:
+        await delete_tickers(repo, tickers)
+        await wait_ready(f"{base_url}/ready")
+        sse_clients = [_Client(tickers[n % ticker_count]) for n in range(0, subscribers, 2)]
+        ws_clients = [_Client(tickers[n % ticker_count]) for n in range(1, subscribers, 2)]
+        started = time.perf_counter()
+        for clients, connect in ((sse_clients, _sse_client), (ws_clients, _ws_client)):
+            for client in clients:
+                ready = asyncio.Event()
+                tasks.append(asyncio.create_task(connect(session, base_url, client, ready)))
+                await ready.wait()
+        connected = await _metric_sum(session, base_url, "price_hub_subscribers")
+        print(f"subscribers={int(connected)} ({len(sse_clients)} SSE, {len(ws_clients)} WebSocket) on {ticker_count} "
+              f"tickers, connected in {time.perf_counter() - started:.1f}s; {updates} updates every {interval}s")
+
+        queries_before = await _metric_sum(session, base_url, "db_query_duration_seconds_count")
+        sent_at = await _publish(repo, tickers, updates, interval)
+        await asyncio.sleep(1.0)
+        queries_after = await _metric_sum(session, base_url, "db_query_duration_seconds_count")
+        coalesced = await _metric_sum(session, base_url, "price_hub_coalesced")
+
+        _report("SSE", sse_clients, sent_at)
+        _report("WebSocket", ws_clients, sent_at)
+        print(f"API DB queries during the test: {queries_after - queries_before:.0f} "
+              f"(polling /last at the same rate: {subscribers * updates}); coalesced for slow subscribers: "
+              f"{coalesced:.0f}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        await session.close()
+        api.terminate()
+        api.wait()
+        await delete_tickers(repo, tickers)
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--subscribers", type=int, default=2000)
+    parser.add_argument("--tickers", type=int, default=10)
+    parser.add_argument("--updates", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.2)
+    args = parser.parse_args()
+    asyncio.run(run(args.database_url, args.subscribers, args.tickers, args.updates, args.interval))
+
+
+if __name__ == "__main__":
+    main()
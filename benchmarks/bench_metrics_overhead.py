@@ -0,0 +1,116 @@
+"""Цена инструментирования: метрики Prometheus на горячем пути против тех же вызовов без них.
+
+Запуск: python -m benchmarks.bench_metrics_overhead [--calls 200000] [--database-url postgresql://... --queries 20000]
+Без БД меряются накладные расходы на вызов: обертка instrument_queries вокруг пустой корутины, observe с метками
+и RequestMetricsMiddleware вокруг пустого ASGI-приложения. С --database-url дополнительно сравнивается
+PriceRepository.get_last_by_ticker на настоящем PostgreSQL: без обертки и с сырым пулом против полного
+инструментирования (тикер BENCH_USD создается и удаляется).
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks._seed import delete_tickers, seed_series
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+from src.infrastructure.metrics import UPSTREAM_LATENCY, instrument_queries
+from src.presentation.api.middleware import RequestMetricsMiddleware
+
+BENCH_TICKER = "BENCH_USD"
+
+
+async def _noop():
+    return None
+
+
+@instrument_queries
+class _NoopRepository:
+    async def bench_noop(self):
+        return None
+
+
+async def _noop_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _per_call_ns(call, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        await call()
+    return (time.perf_counter() - started) / calls * 1e9
+
+
+def _report(name: str, plain_ns: float, instrumented_ns: float) -> None:
+    print(f"{name:<34} {plain_ns:>10.0f} {instrumented_ns:>14.0f} {instrumented_ns - plain_ns:>12.0f}")
+
+
+async def _in_process(calls: int) -> None:
+    _report(
+        "coroutine + instrument_queries",
+        await _per_call_ns(_noop, calls),
+        await _per_call_ns(_NoopRepository().bench_noop, calls)
+    )
+
+    async def observe_with_labels():
+        # так пишет DeribitClient: labels() на каждый вызов
+        UPSTREAM_LATENCY.labels("bench", "ok").observe(0.001)
+
+    _report("observe with labels()", await _per_call_ns(_noop, calls), await _per_call_ns(observe_with_labels, calls))
+
+    scope = {"type": "http", "method": "GET", "path": "/bench", "app": None}
+    middleware = RequestMetricsMiddleware(_noop_app)
+
+    async def receive():
+        return {"type": "http.request"}
+
+    async def send(message):
+        return None
+
+    _report(
+        "ASGI app + RequestMetricsMiddleware",
+        await _per_call_ns(lambda: _noop_app(scope, receive, send), calls),
+        await _per_call_ns(lambda: middleware(scope, receive, send), calls)
+    )
+
+
+async def _database(database_url: str, queries: int) -> None:
+    db = Database(database_url)
+    repo = PriceRepository(db)
+    await repo.create_table_if_not_exists()
+    plain_method = PriceRepository.get_last_by_ticker.__wrapped__
+    try:
+        await delete_tickers(repo, [BENCH_TICKER])
+        await seed_series(repo, BENCH_TICKER, int(time.time()) - 86400, 60, 1440)
+        instrumented_pool = await db.get_pool()
+        for _ in range(2):
+            # без метрик: исходный метод и сам asyncpg.Pool под InstrumentedPool
+            db._pool = instrumented_pool._pool
+            plain_ns = await _per_call_ns(lambda: plain_method(repo, BENCH_TICKER), queries)
+            db._pool = instrumented_pool
+            instrumented_ns = await _per_call_ns(lambda: repo.get_last_by_ticker(BENCH_TICKER), queries)
+        _report("get_last_by_ticker (PostgreSQL)", plain_ns, instrumented_ns)
+        print(f"overhead: {(instrumented_ns - plain_ns) / plain_ns * 100:.2f}% of a {plain_ns / 1000:.0f} us query")
+    finally:
+        await delete_tickers(repo, [BENCH_TICKER])
+        await db.close()
+
+
+async def run(calls: int, database_url: str, queries: int):
+    print(f"{'path':<34} {'plain, ns':>10} {'instrumented':>14} {'overhead':>12}")
+    await _in_process(calls)
+    if database_url:
+        await _database(database_url, queries)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--database-url")
+    parser.add_argument("--queries", type=int, default=20_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.calls, args.database_url, args.queries))
+
+
+if __name__ == "__main__":
+    main()
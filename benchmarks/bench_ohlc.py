@@ -0,0 +1,83 @@
+"""OHLC в PostgreSQL против выгрузки всех строк и агрегации в Python.
+
+Запуск: python -m benchmarks.bench_ohlc --database-url postgresql://... [--rows 2000000]
+Генерирует минутную историю для тикера BENCH_USD через generate_series и удаляет ее по окончании.
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks._seed import delete_tickers, seed_series
+from src.domain.models import CANDLE_INTERVALS
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+BENCH_TICKER = "BENCH_USD"
+START_TIMESTAMP = 1_600_000_000
+
+
+async def _python_candles(repo: PriceRepository, start: int, end: int, interval_seconds: int):
+    prices = [
+        price
+        async for chunk in repo.iter_by_ticker(BENCH_TICKER, after=start - 1, before=end, chunk_size=50000)
+        for price in chunk
+    ]
+    buckets = {}
+    for price in reversed(prices):
+        bucket = price.timestamp // interval_seconds * interval_seconds
+        candle = buckets.get(bucket)
+        if candle is None:
+            buckets[bucket] = [price.price, price.price, price.price, price.price, price.price, 1]
+        else:
+            candle[1] = max(candle[1], price.price)
+            candle[2] = min(candle[2], price.price)
+            candle[3] = price.price
+            candle[4] += price.price
+            candle[5] += 1
+    return buckets
+
+
+async def run(database_url: str, rows: int, keep: bool):
+    db = Database(database_url)
+    repo = PriceRepository(db)
+    await repo.create_table_if_not_exists()
+    try:
+        started = time.perf_counter()
+        await delete_tickers(repo, [BENCH_TICKER])
+        await seed_series(repo, BENCH_TICKER, START_TIMESTAMP, 60, rows)
+        print(f"seeded {rows} rows in {time.perf_counter() - started:.1f}s")
+
+        end = START_TIMESTAMP + rows * 60
+        print(f"{'range':>8} {'interval':>8} {'candles':>8} {'SQL, ms':>10} {'Python, ms':>11}")
+        for days in [1, 30, 365]:
+            start = max(START_TIMESTAMP, end - days * 86400)
+            for interval in ["5m", "1h", "1d"]:
+                interval_seconds = CANDLE_INTERVALS[interval]
+                if (end - start) // interval_seconds > 10000:
+                    continue
+                started = time.perf_counter()
+                candles = await repo.get_candles(BENCH_TICKER, start, end, interval_seconds)
+                sql_ms = (time.perf_counter() - started) * 1000
+
+                started = time.perf_counter()
+                buckets = await _python_candles(repo, start, end, interval_seconds)
+                python_ms = (time.perf_counter() - started) * 1000
+                assert len(buckets) == len(candles)
+                print(f"{days:>7}d {interval:>8} {len(candles):>8} {sql_ms:>10.1f} {python_ms:>11.1f}")
+    finally:
+        if not keep:
+            await delete_tickers(repo, [BENCH_TICKER])
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--keep", action="store_true", help="не удалять сгенерированные строки")
+    args = parser.parse_args()
+    asyncio.run(run(args.database_url, args.rows, args.keep))
+
+
+if __name__ == "__main__":
+    main()
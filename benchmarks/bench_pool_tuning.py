@@ -0,0 +1,90 @@
+"""Нагрузка на API с пулом asyncpg по умолчанию и с настройками из Settings.
+
+Запуск: python -m benchmarks.bench_pool_tuning --database-url postgresql://... [--concurrency 50 --duration 10]
+Генерирует неделю минутной истории для BENCH_USD (удаляется по окончании) и для каждой конфигурации поднимает API
+с выключенными кэшами, чтобы все запросы шли в БД. Смесь запросов: /last, /by-date as_of, /all?limit=100 и /ohlc
+за сутки. Первая секунда после старта меряется отдельно (cold), потом прогрев и основной замер.
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks._http_load import free_port, hammer, start_api, wait_ready
+from benchmarks._seed import delete_tickers, seed_series
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+BENCH_TICKER = "BENCH_USD"
+HISTORY_MINUTES = 7 * 1440
+
+CONFIGS = {
+    # как было: asyncpg.create_pool со значениями по умолчанию
+    "asyncpg defaults": {"DB_POOL_MIN_SIZE": "10", "DB_POOL_MAX_SIZE": "10", "DB_STATEMENT_CACHE_SIZE": "100"},
+    "settings": {},
+}
+
+
+def _urls(base: str, start: int, end: int):
+    rng = random.Random(0)
+    urls = []
+    for _ in range(50):
+        moment = rng.randrange(start, end)
+        urls.append(f"{base}/last?ticker={BENCH_TICKER}")
+        urls.append(f"{base}/by-date?ticker={BENCH_TICKER}&date={moment}&mode=as_of")
+        urls.append(f"{base}/all?ticker={BENCH_TICKER}&limit=100&before={moment}")
+        urls.append(f"{base}/ohlc?ticker={BENCH_TICKER}&from={moment - 86400}&to={moment}&interval=1h")
+    return urls
+
+
+def _print(name: str, phase: str, report) -> None:
+    print(
+        f"{name:<17} {phase:<6} {report['rps']:>8.0f} req/s  p50={report['p50_ms']:>6.1f}ms "
+        f"p99={report['p99_ms']:>6.1f}ms  errors={report['errors']}"
+    )
+
+
+async def run(database_url: str, concurrency: int, duration: float):
+    db = Database(database_url)
+    repo = PriceRepository(db)
+    await repo.create_table_if_not_exists()
+    end = int(time.time())
+    start = end - HISTORY_MINUTES * 60
+    try:
+        await delete_tickers(repo, [BENCH_TICKER])
+        await seed_series(repo, BENCH_TICKER, start, 60, HISTORY_MINUTES)
+        print(f"concurrency={concurrency} duration={duration}s")
+        for name, overrides in CONFIGS.items():
+            port = free_port()
+            env = {
+                "DATABASE_URL": database_url,
+                "LATEST_PRICE_CACHE_ENABLED": "false",
+                "PRICE_INDEX_ENABLED": "false",
+                **overrides,
+            }
+            api = start_api(env, port)
+            try:
+                await wait_ready(f"http://127.0.0.1:{port}/ready")
+                urls = _urls(f"http://127.0.0.1:{port}/api/prices", start + 86400, end)
+                _print(name, "cold", await hammer(urls, concurrency, 1.0))
+                await hammer(urls, concurrency, 1.0)
+                _print(name, "steady", await hammer(urls, concurrency, duration))
+            finally:
+                api.terminate()
+                api.wait()
+    finally:
+        await delete_tickers(repo, [BENCH_TICKER])
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.database_url, args.concurrency, args.duration))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Память и время построения 1M цен: список dataclass Price против PriceSeries на массивах.
+
+Запуск: python -m benchmarks.bench_price_memory [--rows 1000000] [--database-url postgresql://...]
+Без БД сравниваются: прежний Price (dataclass с __dict__), текущий Price со __slots__, PriceSeries, заполненный
+поэлементно, и PriceSeries из готовых байт (как его строит репозиторий). Память - прирост по tracemalloc,
+время меряется отдельным прогоном без tracemalloc. С --database-url то же для чтения из PostgreSQL:
+get_all_by_ticker (список Price) против get_price_series (тикер BENCH_USD создается и удаляется).
+"""
+import argparse
+import asyncio
+import gc
+import sys
+import time
+import tracemalloc
+from array import array
+from dataclasses import dataclass
+
+from benchmarks._seed import delete_tickers, seed_series
+from src.domain.models import Price, PriceSeries
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+BENCH_TICKER = "BENCH_USD"
+
+
+@dataclass
+class _DictPrice:
+    # Price до перехода на __slots__
+    ticker: str
+    price: float
+    timestamp: int
+
+
+def _report(name: str, rows: int, seconds: float, size: int) -> None:
+    print(f"{name:<34} {seconds * 1000:>9.0f} ms {size / 1e6:>9.1f} MB {size / rows:>9.1f} B/row")
+
+
+def _measure(build):
+    gc.collect()
+    started = time.perf_counter()
+    result = build()
+    seconds = time.perf_counter() - started
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return seconds, size
+
+
+def _in_memory(rows: int) -> None:
+    timestamps = array("q", range(1_700_000_000, 1_700_000_000 + rows))
+    prices = array("d", (20000.0 + i / 8 for i in range(rows)))
+    # репозиторий получает big-endian байты int8send/float8send
+    network_timestamps, network_prices = array("q", timestamps), array("d", prices)
+    if sys.byteorder == "little":
+        network_timestamps.byteswap()
+        network_prices.byteswap()
+    raw_timestamps, raw_prices = network_timestamps.tobytes(), network_prices.tobytes()
+
+    def series_appended():
+        series = PriceSeries(BENCH_TICKER)
+        for timestamp, price in zip(timestamps, prices):
+            series.append(timestamp, price)
+        return series
+
+    cases = {
+        "list[Price] with __dict__": lambda: [
+            _DictPrice(ticker=BENCH_TICKER, price=price, timestamp=timestamp)
+            for timestamp, price in zip(timestamps, prices)
+        ],
+        "list[Price] with __slots__": lambda: [
+            Price(ticker=BENCH_TICKER, price=price, timestamp=timestamp)
+            for timestamp, price in zip(timestamps, prices)
+        ],
+        "PriceSeries, append per row": series_appended,
+        "PriceSeries.from_network_bytes": lambda: PriceSeries.from_network_bytes(
+            BENCH_TICKER, raw_timestamps, raw_prices
+        ),
+    }
+    for name, build in cases.items():
+        _report(name, rows, *_measure(build))
+
+    series = PriceSeries.from_network_bytes(BENCH_TICKER, raw_timestamps, raw_prices)
+    series.numpy()  # импорт numpy не в счет
+    started = time.perf_counter()
+    _, price_view = series.numpy()
+    mean = price_view.mean()
+    print(f"numpy view + mean over {rows} rows: {(time.perf_counter() - started) * 1000:.1f} ms (mean={mean:.2f})")
+
+
+async def _database(database_url: str, rows: int) -> None:
+    db = Database(database_url)
+    repo = PriceRepository(db)
+    await repo.create_table_if_not_exists()
+    try:
+        await delete_tickers(repo, [BENCH_TICKER])
+        await seed_series(repo, BENCH_TICKER, 1_700_000_000, 1, rows)
+        for name, fetch in (
+                ("get_all_by_ticker", lambda: repo.get_all_by_ticker(BENCH_TICKER)),
+                ("get_price_series", lambda: repo.get_price_series(BENCH_TICKER)),
+        ):
+            await fetch()
+            gc.collect()
+            started = time.perf_counter()
+            result = await fetch()
+            seconds = time.perf_counter() - started
+            del result
+            gc.collect()
+            tracemalloc.start()
+            result = await fetch()
+            size = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            del result
+            _report(f"PostgreSQL {name}", rows, seconds, size)
+    finally:
+        await delete_tickers(repo, [BENCH_TICKER])
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+    print(f"rows={args.rows}")
+    print(f"{'case':<34} {'build':>12} {'memory':>12} {'':>13}")
+    _in_memory(args.rows)
+    if args.database_url:
+        asyncio.run(_database(args.database_url, args.rows))
+
+
+if __name__ == "__main__":
+    main()
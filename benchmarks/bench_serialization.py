@@ -0,0 +1,80 @@
+"""Сериализация ответа /api/prices/all: прежний путь через pydantic против JSON, собранного в PostgreSQL.
+
+Запуск: python -m benchmarks.bench_serialization --database-url postgresql://... [--rows 100000 --repeat 5]
+Генерирует --rows строк для BENCH_USD (удаляются по окончании). Прежний путь повторяет то, что делал маршрут:
+get_all_by_ticker -> PriceResponse на каждую строку -> проверка response_model и jsonable_encoder в FastAPI ->
+JSONResponse.render. Новый - PriceRepository.get_page_json, готовые байты без объектов на строку.
+Время приводится к 100k строк; тела ответов сравниваются побайтно.
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from benchmarks._seed import delete_tickers, seed_series
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+from src.presentation.schemas.price_schemas import PriceResponse
+
+BENCH_TICKER = "BENCH_USD"
+RESPONSE_ADAPTER = TypeAdapter(List[PriceResponse])
+
+
+async def _old_path(repo: PriceRepository) -> bytes:
+    prices = await repo.get_all_by_ticker(BENCH_TICKER)
+    content = [PriceResponse(ticker=p.ticker, price=p.price, timestamp=p.timestamp) for p in prices]
+    # serialize_response в FastAPI: валидация по response_model, затем jsonable_encoder
+    validated = RESPONSE_ADAPTER.validate_python([item.model_dump() for item in content])
+    return JSONResponse(jsonable_encoder(RESPONSE_ADAPTER.dump_python(validated, mode="json"))).body
+
+
+async def _new_path(repo: PriceRepository) -> bytes:
+    body, _, _ = await repo.get_page_json(BENCH_TICKER)
+    return body
+
+
+async def _best_seconds(call, repeat: int):
+    best = None
+    body = b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = await call()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, body
+
+
+async def run(database_url: str, rows: int, repeat: int):
+    db = Database(database_url)
+    repo = PriceRepository(db)
+    await repo.create_table_if_not_exists()
+    try:
+        await delete_tickers(repo, [BENCH_TICKER])
+        await seed_series(repo, BENCH_TICKER, int(time.time()) - rows, 1, rows)
+        scale = 100_000 / rows
+        old_seconds, old_body = await _best_seconds(lambda: _old_path(repo), repeat)
+        new_seconds, new_body = await _best_seconds(lambda: _new_path(repo), repeat)
+        print(f"rows={rows} repeat={repeat} (best of, per 100k rows)")
+        print(f"{'pydantic + JSONResponse':<26} {old_seconds * scale * 1000:>8.0f} ms  {len(old_body) / 1e6:.1f} MB")
+        print(f"{'PostgreSQL string_agg':<26} {new_seconds * scale * 1000:>8.0f} ms  {len(new_body) / 1e6:.1f} MB")
+        print(f"speedup x{old_seconds / new_seconds:.1f}, identical bodies: {old_body == new_body}")
+    finally:
+        await delete_tickers(repo, [BENCH_TICKER])
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.database_url, args.rows, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Холодный старт: разбивка python -X importtime для API, CLI и воркера и время до первого успешного запроса API.
+
+Запуск: python -m benchmarks.bench_startup --database-url postgresql://... [--runs 5 --top 10 --output path.json]
+Каждая цель импортируется в свежем интерпретаторе --runs раз, берется медиана: API (src.presentation.api.main),
+пакет задач, как его видят CLI (src.infrastructure.tasks.export_prices), и воркер (celery_app со всеми задачами).
+Разбивка - собственное время модулей из importtime, сложенное по пакетам верхнего уровня.
+Старт API - процесс uvicorn с нуля: когда порт начал отвечать, когда /ready отдал 200 (пул прогрет) и, в отдельном
+запуске без ожидания /ready, когда пришел первый 200 на /api/prices/last. Тикер STARTUP_USD создается и удаляется.
+Отчет - benchmarks/reports/startup-<commit>.json, сравнивается compare_reports.
+"""
+import argparse
+import asyncio
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+
+from benchmarks._http_load import free_port, start_api
+from benchmarks._report import Report
+from benchmarks._seed import delete_tickers
+from src.domain.models import Price
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+STARTUP_TICKER = "STARTUP_USD"
+MARKER = "-- bench_startup --"
+IMPORT_TARGETS = {
+    "api": "import src.presentation.api.main",
+    "cli": "import src.infrastructure.tasks.export_prices",
+    "worker": "import src.infrastructure.tasks; src.infrastructure.tasks.celery_app",
+}
+
+
+def _importtime(statement: str) -> List[Tuple[str, int, int]]:
+    # (модуль, собственное время мкс, накопленное мкс) только для импортов после маркера - без старта интерпретатора
+    code = f"import sys; sys.stderr.write({MARKER!r} + '\\n'); {statement}"
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True
+    ).stderr
+    lines = stderr.split(MARKER, 1)[1].splitlines()
+    modules = []
+    for line in lines:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.split("|")
+        modules.append((name.strip(), int(self_us.split(":")[1]), int(cumulative_us)))
+    return modules
+
+
+def _by_package(modules: List[Tuple[str, int, int]]) -> Dict[str, float]:
+    totals: Dict[str, float] = {}
+    for name, self_us, _ in modules:
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0.0) + self_us / 1000
+    return totals
+
+
+def measure_imports(runs: int, top: int, report: Report) -> None:
+    for target, statement in IMPORT_TARGETS.items():
+        samples = [_importtime(statement) for _ in range(runs)]
+        totals = [sum(self_us for _, self_us, _ in modules) / 1000 for modules in samples]
+        median_run = samples[totals.index(statistics.median_low(totals))]
+        packages = _by_package(median_run)
+        loaded = {name for name, _, _ in median_run}
+        heavy = [name for name in ("numpy", "celery", "aiohttp", "redis", "pyarrow", "asyncpg") if name in loaded]
+        print(f"{target}: {statistics.median(totals):.0f} ms to import ({len(median_run)} modules), "
+              f"src {packages.get('src', 0.0):.0f} ms; loaded: {', '.join(heavy) or '-'}")
+        for package, milliseconds in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+            print(f"    {package:<24} {milliseconds:>8.1f} ms")
+        report.add("import", {"target": target}, {
+            "import_ms": statistics.median(totals),
+            "src_import_ms": packages.get("src", 0.0),
+            "modules": len(median_run),
+        })
+
+
+async def _poll(session: aiohttp.ClientSession, url: str, started: float, deadline: float) -> Tuple[float, float]:
+    # (первый ответ любого статуса, первый 200) в мс от запуска процесса
+    first_response: Optional[float] = None
+    while time.perf_counter() < deadline:
+        try:
+            async with session.get(url) as response:
+                await response.read()
+                now = (time.perf_counter() - started) * 1000
+                first_response = first_response if first_response is not None else now
+                if response.status == 200:
+                    return first_response, now
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.005)
+    raise RuntimeError(f"No successful response from {url}")
+
+
+async def _launch(database_url: str, path: str, timeout: float = 30.0) -> Tuple[float, float]:
+    port = free_port()
+    started = time.perf_counter()
+    api = start_api({"DATABASE_URL": database_url}, port)
+    try:
+        async with aiohttp.ClientSession() as session:
+            return await _poll(session, f"http://127.0.0.1:{port}{path}", started, started + timeout)
+    finally:
+        api.terminate()
+        api.wait()
+
+
+async def measure_api_start(database_url: str, runs: int, report: Report) -> None:
+    db = Database(database_url)
+    repo = PriceRepository(db)
+    await repo.create_table_if_not_exists()
+    await repo.save_many([Price(ticker=STARTUP_TICKER, price=100.0, timestamp=int(time.time()))])
+    try:
+        ready = [await _launch(database_url, "/ready") for _ in range(runs)]
+        first = [await _launch(database_url, f"/api/prices/last?ticker={STARTUP_TICKER}") for _ in range(runs)]
+    finally:
+        await delete_tickers(repo, [STARTUP_TICKER])
+        await db.close()
+    metrics = {
+        "port_open_ms": statistics.median(sample[0] for sample in ready),
+        "ready_ms": statistics.median(sample[1] for sample in ready),
+        "first_request_ms": statistics.median(sample[1] for sample in first),
+    }
+    print(f"api start: port open {metrics['port_open_ms']:.0f} ms, /ready 200 {metrics['ready_ms']:.0f} ms, "
+          f"first 200 on /last without waiting for /ready {metrics['first_request_ms']:.0f} ms")
+    report.add("api_start", {}, metrics)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    report = Report("startup", {"runs": args.runs})
+    measure_imports(args.runs, args.top, report)
+    asyncio.run(measure_api_start(args.database_url, args.runs, report))
+    print(f"report: {report.write(args.output)}")
+
+
+if __name__ == "__main__":
+    main()
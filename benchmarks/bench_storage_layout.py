@@ -0,0 +1,147 @@
+"""Старая схема prices (SERIAL id, VARCHAR тикер, DECIMAL, created_at) против секционированной компактной.
+
+Запуск: python -m benchmarks.bench_storage_layout --database-url postgresql://... [--rows 2000000]
+Обе схемы создаются в отдельных схемах PostgreSQL (bench_legacy, bench_compact) и удаляются по окончании.
+Сравниваются скорость COPY, размер таблицы с индексами, выборка суточного диапазона и удаление старого месяца.
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.partitions import next_month_start
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+TICKERS = ["BTC_USD", "ETH_USD", "SOL_USD", "XRP_USD"]
+START_TIMESTAMP = 1_600_000_000
+STEP_SECONDS = 30
+BATCH_SIZE = 5000
+
+LEGACY_DDL = """
+    CREATE TABLE prices (
+        id SERIAL PRIMARY KEY,
+        ticker VARCHAR(10) NOT NULL,
+        price DECIMAL(20, 8) NOT NULL,
+        timestamp BIGINT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX idx_ticker_timestamp ON prices(ticker, timestamp DESC);
+"""
+
+LEGACY_RANGE = """
+    SELECT ticker, price, timestamp FROM prices
+    WHERE ticker = $1 AND timestamp >= $2 AND timestamp < $3
+    ORDER BY timestamp DESC
+"""
+
+COMPACT_RANGE = """
+    SELECT price, timestamp FROM prices
+    WHERE ticker_id = (SELECT id FROM tickers WHERE name = $1) AND timestamp >= $2 AND timestamp < $3
+    ORDER BY timestamp DESC
+"""
+
+
+def _schema_url(database_url: str, schema: str) -> str:
+    # asyncpg передает неизвестные параметры DSN как настройки сервера
+    return f"{database_url}{'&' if '?' in database_url else '?'}search_path={schema}"
+
+
+async def _copy(conn, rows, columns) -> float:
+    started = time.perf_counter()
+    for start in range(0, len(rows), BATCH_SIZE):
+        await conn.copy_records_to_table("prices", records=rows[start:start + BATCH_SIZE], columns=columns)
+    return time.perf_counter() - started
+
+
+async def _range_queries(conn, query: str, ranges) -> float:
+    started = time.perf_counter()
+    for ticker, start in ranges:
+        await conn.fetch(query, ticker, start, start + 86400)
+    return (time.perf_counter() - started) / len(ranges) * 1000
+
+
+async def _timed(conn, query: str) -> float:
+    started = time.perf_counter()
+    await conn.execute(query)
+    return time.perf_counter() - started
+
+
+async def run(database_url: str, rows: int, queries: int):
+    admin = Database(database_url)
+    legacy = Database(_schema_url(database_url, "bench_legacy"))
+    compact = Database(_schema_url(database_url, "bench_compact"))
+    per_ticker = rows // len(TICKERS)
+    end = START_TIMESTAMP + per_ticker * STEP_SECONDS
+    rng = random.Random(0)
+    ranges = [(rng.choice(TICKERS), rng.randrange(START_TIMESTAMP, end - 86400)) for _ in range(queries)]
+    # удаляется история до конца первого полного месяца
+    retention_cutoff = next_month_start(next_month_start(START_TIMESTAMP))
+
+    admin_pool = await admin.get_pool()
+    async with admin_pool.acquire() as conn:
+        await conn.execute("DROP SCHEMA IF EXISTS bench_legacy, bench_compact CASCADE")
+        await conn.execute("CREATE SCHEMA bench_legacy")
+        await conn.execute("CREATE SCHEMA bench_compact")
+    try:
+        results = {}
+
+        legacy_pool = await legacy.get_pool()
+        async with legacy_pool.acquire() as conn:
+            await conn.execute(LEGACY_DDL)
+            records = [
+                (ticker, 20000 + rng.random(), START_TIMESTAMP + i * STEP_SECONDS)
+                for i in range(per_ticker) for ticker in TICKERS
+            ]
+            insert = await _copy(conn, records, ["ticker", "price", "timestamp"])
+            await conn.execute("ANALYZE prices")
+            size = await conn.fetchval("SELECT pg_total_relation_size('prices')")
+            query_ms = await _range_queries(conn, LEGACY_RANGE, ranges)
+            delete = await _timed(conn, f"DELETE FROM prices WHERE timestamp < {retention_cutoff}")
+            vacuum = await _timed(conn, "VACUUM prices")
+            results["legacy"] = (insert, size, query_ms, delete + vacuum)
+
+        repo = PriceRepository(compact)
+        await repo.create_table_if_not_exists()
+        await repo.ensure_partitions(START_TIMESTAMP, end)
+        compact_pool = await compact.get_pool()
+        async with compact_pool.acquire() as conn:
+            await conn.execute("INSERT INTO tickers (name) SELECT unnest($1::varchar[])", TICKERS)
+            ids = dict(await conn.fetch("SELECT name, id FROM tickers"))
+            records = [(timestamp, price, ids[ticker]) for ticker, price, timestamp in records]
+            insert = await _copy(conn, records, ["timestamp", "price", "ticker_id"])
+            await conn.execute("ANALYZE prices")
+            size = await conn.fetchval(
+                "SELECT sum(pg_total_relation_size(relid)) FROM pg_partition_tree('prices') WHERE isleaf"
+            )
+            query_ms = await _range_queries(conn, COMPACT_RANGE, ranges)
+        started = time.perf_counter()
+        await repo.drop_partitions_before(retention_cutoff)
+        results["compact"] = (insert, size, query_ms, time.perf_counter() - started)
+
+        print(f"{len(records)} rows, {len(TICKERS)} tickers, {(end - START_TIMESTAMP) // 86400} days of history")
+        print(f"{'layout':<9} {'COPY rows/s':>12} {'size, MB':>9} {'bytes/row':>10} {'1d range, ms':>13} {'retention, s':>14}")
+        for name, (insert, size, query_ms, drop) in results.items():
+            print(
+                f"{name:<9} {len(records) / insert:>12.0f} {size / 2 ** 20:>9.1f} {size / len(records):>10.1f} "
+                f"{query_ms:>13.2f} {drop:>14.3f}"
+            )
+    finally:
+        async with admin_pool.acquire() as conn:
+            await conn.execute("DROP SCHEMA IF EXISTS bench_legacy, bench_compact CASCADE")
+        await legacy.close()
+        await compact.close()
+        await admin.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.database_url, args.rows, args.queries))
+
+
+if __name__ == "__main__":
+    main()
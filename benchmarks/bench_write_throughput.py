@@ -0,0 +1,72 @@
+"""Пропускная способность записи: save() построчно против save_many() (COPY) и BufferedPriceWriter.
+
+Запуск: python -m benchmarks.bench_write_throughput --database-url postgresql://... [--rows 20000]
+Пишет строки с тикером BENCH_USD и удаляет их по окончании.
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks._seed import delete_tickers
+from src.domain.models import Price
+from src.infrastructure.database.buffered_writer import BufferedPriceWriter
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+BENCH_TICKER = "BENCH_USD"
+
+
+def _prices(rows: int):
+    return [Price(ticker=BENCH_TICKER, price=100.0 + i * 0.01, timestamp=1_600_000_000 + i) for i in range(rows)]
+
+
+async def _measure(name: str, rows: int, write):
+    started = time.perf_counter()
+    await write()
+    elapsed = time.perf_counter() - started
+    print(f"{name:<28} {rows:>8} rows {elapsed:>8.2f}s {rows / elapsed:>12.0f} rows/s")
+
+
+async def run(database_url: str, rows: int, batch_size: int):
+    db = Database(database_url)
+    repo = PriceRepository(db)
+    await repo.create_table_if_not_exists()
+    prices = _prices(rows)
+
+    async def per_row():
+        for price in prices:
+            await repo.save(price)
+
+    async def copy_batches():
+        for start in range(0, rows, batch_size):
+            await repo.save_many(prices[start:start + batch_size])
+
+    async def buffered():
+        async with BufferedPriceWriter(repo, max_batch_size=batch_size) as writer:
+            for price in prices:
+                await writer.write(price)
+
+    try:
+        for name, write in [
+            ("save() per row", per_row),
+            (f"save_many() x{batch_size}", copy_batches),
+            (f"BufferedPriceWriter x{batch_size}", buffered),
+        ]:
+            await delete_tickers(repo, [BENCH_TICKER])
+            await _measure(name, rows, write)
+    finally:
+        await delete_tickers(repo, [BENCH_TICKER])
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(run(args.database_url, args.rows, args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Сравнение двух отчетов load_api / load_ingest: что стало быстрее или медленнее между коммитами.
+
+Запуск: python -m benchmarks.compare_reports benchmarks/reports/api-<old>.json benchmarks/reports/api-<new>.json
+[--threshold 0.10]
+Строки сопоставляются по сценарию и параметрам (уровню нагрузки). Задержки (*_ms) лучше меньше, пропускная
+способность (rps, *_per_sec) - больше; ухудшение больше --threshold помечается как регрессия, и тогда код
+возврата 1 - сравнение можно ставить в CI. Отчеты с разных машин или из грязного дерева сравнивать осторожно:
+это видно в шапке.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Optional, Tuple
+
+HIGHER_IS_BETTER = ("rps", "_per_sec")
+LOWER_IS_BETTER = ("_ms",)
+
+
+def _load(path: str) -> dict:
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _key(result: dict) -> Tuple[str, str]:
+    return result["scenario"], json.dumps(result["params"], sort_keys=True)
+
+
+def _direction(metric: str) -> Optional[int]:
+    # +1 - рост это улучшение, -1 - рост это ухудшение, None - метрика справочная
+    if metric.endswith(HIGHER_IS_BETTER):
+        return 1
+    if metric.endswith(LOWER_IS_BETTER):
+        return -1
+    return None
+
+
+def compare(old: dict, new: dict, threshold: float) -> int:
+    old_results: Dict[Tuple[str, str], dict] = {_key(result): result for result in old["results"]}
+    regressions = 0
+    for name, report in (("old", old), ("new", new)):
+        env = report["environment"]
+        print(f"{name}: {report['suite']} commit={env['commit']}{' (dirty)' if env['dirty'] else ''} "
+              f"{env['created_at']} cpus={env['cpus']} {env['platform']}")
+    print(f"{'scenario':<16} {'params':<28} {'metric':<18} {'old':>10} {'new':>10} {'change':>8}")
+    for result in new["results"]:
+        previous = old_results.get(_key(result))
+        if previous is None:
+            continue
+        params = ",".join(f"{key}={value}" for key, value in result["params"].items())
+        for metric, value in result["metrics"].items():
+            direction = _direction(metric)
+            old_value = previous["metrics"].get(metric)
+            if direction is None or not old_value:
+                continue
+            change = (value - old_value) / old_value
+            regressed = change * direction < -threshold
+            regressions += regressed
+            print(f"{result['scenario']:<16} {params:<28} {metric:<18} {old_value:>10.2f} {value:>10.2f} "
+                  f"{change:>+7.1%}{'  REGRESSION' if regressed else ''}")
+    print(f"{regressions} regression(s) above {threshold:.0%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+    old, new = _load(args.old), _load(args.new)
+    if old["suite"] != new["suite"]:
+        sys.exit(f"different suites: {old['suite']} and {new['suite']}")
+    sys.exit(1 if compare(old, new, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Локальная замена Deribit для нагрузочных прогонов: HTTP public/get_index_price и WebSocket deribit_price_index.
+
+Запуск отдельным процессом: python -m benchmarks.fake_deribit [--port 8081 --latency 0.05 --jitter 0.02
+--error-rate 0.01 --tick-interval 0.1]. Воркер и stream_prices направляются на него переменными
+DERIBIT_BASE_URL=http://127.0.0.1:8081/api/v2 и DERIBIT_WS_URL=ws://127.0.0.1:8081/ws/api/v2.
+Цена каждого индекса - случайное блуждание от 100, ответы отдаются с задержкой latency + uniform(0, jitter),
+доля error_rate HTTP-запросов отвечает 503. По WebSocket после public/subscribe каждый канал получает тик раз
+в tick_interval секунд; heartbeat test_request шлется с интервалом из public/set_heartbeat.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List
+
+from aiohttp import web
+
+WS_PATH = "/ws/api/v2"
+PRICE_INDEX_PREFIX = "deribit_price_index."
+
+
+class _Prices:
+    def __init__(self, seed: int):
+        self._random = random.Random(seed)
+        self._prices: Dict[str, float] = {}
+
+    def next(self, index_name: str) -> float:
+        price = self._prices.get(index_name, 100.0) * (1 + self._random.gauss(0, 1e-4))
+        self._prices[index_name] = price
+        return price
+
+
+def make_stub_app(
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        tick_interval: float = 1.0,
+        seed: int = 0
+) -> web.Application:
+    prices = _Prices(seed)
+    chance = random.Random(seed)
+
+    def _delay() -> float:
+        return latency + chance.uniform(0, jitter)
+
+    async def get_index_price(request: web.Request) -> web.Response:
+        await asyncio.sleep(_delay())
+        if error_rate and chance.random() < error_rate:
+            return web.json_response({"jsonrpc": "2.0", "error": {"code": 10028, "message": "fake outage"}}, status=503)
+        price = prices.next(request.query.get("index_name", ""))
+        return web.json_response({
+            "jsonrpc": "2.0",
+            "result": {"index_price": price, "estimated_delivery_price": price}
+        })
+
+    async def websocket(request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        tasks: List[asyncio.Task] = []
+
+        async def tick(channels: List[str]) -> None:
+            while True:
+                await asyncio.sleep(tick_interval)
+                timestamp = int(time.time() * 1000)
+                for channel in channels:
+                    index_name = channel[len(PRICE_INDEX_PREFIX):]
+                    await ws.send_json({
+                        "jsonrpc": "2.0",
+                        "method": "subscription",
+                        "params": {
+                            "channel": channel,
+                            "data": {"index_name": index_name, "price": prices.next(index_name), "timestamp": timestamp}
+                        }
+                    })
+
+        async def heartbeat(interval: float) -> None:
+            while True:
+                await asyncio.sleep(interval)
+                await ws.send_json({"jsonrpc": "2.0", "method": "heartbeat", "params": {"type": "test_request"}})
+
+        try:
+            async for message in ws:
+                request_data = json.loads(message.data)
+                method = request_data.get("method")
+                params = request_data.get("params") or {}
+                await asyncio.sleep(_delay())
+                result = "ok"
+                if method == "public/subscribe":
+                    channels = [channel for channel in params.get("channels", []) if channel.startswith(PRICE_INDEX_PREFIX)]
+                    tasks.append(asyncio.create_task(tick(channels)))
+                    result = channels
+                elif method == "public/set_heartbeat":
+                    tasks.append(asyncio.create_task(heartbeat(float(params.get("interval", 10)))))
+                await ws.send_json({"jsonrpc": "2.0", "id": request_data.get("id"), "result": result})
+        finally:
+            for task in tasks:
+                task.cancel()
+        return ws
+
+    app = web.Application()
+    app.router.add_get("/api/v2/public/get_index_price", get_index_price)
+    app.router.add_get(WS_PATH, websocket)
+    return app
+
+
+def ws_url(base_url: str) -> str:
+    # http://host:port/api/v2 -> ws://host:port/ws/api/v2
+    return base_url.replace("http://", "ws://", 1).removesuffix("/api/v2") + WS_PATH
+
+
+@asynccontextmanager
+async def run_stub_server(latency: float = 0.05, port: int = 0, **options) -> AsyncIterator[str]:
+    runner = web.AppRunner(make_stub_app(latency, **options))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    try:
+        yield f"http://127.0.0.1:{bound_port}/api/v2"
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--tick-interval", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    app = make_stub_app(args.latency, args.jitter, args.error_rate, args.tick_interval, args.seed)
+    web.run_app(app, host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
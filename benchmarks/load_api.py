@@ -0,0 +1,134 @@
+"""Нагрузка на /api/prices/* при растущей конкурентности, отчет в JSON для сравнения между коммитами.
+
+Запуск: python -m benchmarks.load_api --database-url postgresql://... [--tickers 5 --rows 1000000
+--concurrency 1,8,32,128 --duration 5 --output report.json]
+Данные - тикеры LOAD_<n>_USD из benchmarks.seed_data; если их нет, генерируются здесь же и остаются для следующих
+прогонов (--cleanup удаляет). API поднимается отдельным процессом uvicorn с настройками из окружения.
+Сценарии: /last, /by-date as_of на случайный момент истории, страница /all перед случайным моментом,
+часовые свечи /ohlc за сутки, /batch/last по всем тикерам. Каждый сценарий на каждом уровне конкурентности
+крутится --duration секунд; в отчете req/s, p50/p95/p99 и ошибки. Сравнение отчетов - benchmarks.compare_reports.
+"""
+import argparse
+import asyncio
+import random
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks._http_load import free_port, hammer, start_api, wait_ready
+from benchmarks._report import Report
+from benchmarks._seed import delete_tickers
+from benchmarks.seed_data import load_tickers, seed_tickers
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+HOUR = 3600
+DAY = 86400
+# сколько разных URL у сценария: запросы не повторяются подряд, но набор один и тот же от прогона к прогону
+URLS_PER_SCENARIO = 1000
+
+Bounds = Dict[str, Tuple[int, int]]
+
+
+def _scenarios(bounds: Bounds) -> Dict[str, Callable[[random.Random], str]]:
+    tickers = list(bounds)
+
+    def moment(rng: random.Random, ticker: str) -> int:
+        first, last = bounds[ticker]
+        return rng.randint(first, last)
+
+    def candles(rng: random.Random) -> str:
+        ticker = rng.choice(tickers)
+        start = moment(rng, ticker) // HOUR * HOUR
+        return f"/api/prices/ohlc?ticker={ticker}&from={start}&to={start + DAY}&interval=1h"
+
+    def page(rng: random.Random) -> str:
+        ticker = rng.choice(tickers)
+        return f"/api/prices/all?ticker={ticker}&limit=100&before={moment(rng, ticker)}"
+
+    def as_of(rng: random.Random) -> str:
+        ticker = rng.choice(tickers)
+        return f"/api/prices/by-date?ticker={ticker}&date={moment(rng, ticker)}&mode=as_of"
+
+    batch = "&".join(f"ticker={ticker}" for ticker in tickers)
+    return {
+        "last": lambda rng: f"/api/prices/last?ticker={rng.choice(tickers)}",
+        "by_date_as_of": as_of,
+        "all_page": page,
+        "ohlc_1h_day": candles,
+        "batch_last": lambda rng: f"/api/prices/batch/last?{batch}",
+    }
+
+
+async def _prepare(database_url: str, count: int, rows: int) -> Bounds:
+    db = Database(database_url)
+    repo = PriceRepository(db)
+    try:
+        await repo.create_table_if_not_exists()
+        tickers = load_tickers(count)
+        inserted = await seed_tickers(repo, tickers, rows, 60)
+        if inserted:
+            print(f"seeded {inserted} rows")
+        return {ticker: await repo.get_history_bounds(ticker) for ticker in tickers}
+    finally:
+        await db.close()
+
+
+async def _cleanup(database_url: str, count: int) -> None:
+    db = Database(database_url)
+    try:
+        await delete_tickers(PriceRepository(db), load_tickers(count))
+    finally:
+        await db.close()
+
+
+async def run(
+        database_url: str,
+        count: int,
+        rows: int,
+        levels: List[int],
+        duration: float,
+        output: str,
+        cleanup: bool
+) -> None:
+    bounds = await _prepare(database_url, count, rows)
+    report = Report("api", {"tickers": count, "rows_per_ticker": rows, "duration": duration})
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    api = start_api({"DATABASE_URL": database_url}, port)
+    try:
+        await wait_ready(f"{base_url}/ready")
+        print(f"{'scenario':<16} {'concurrency':>11} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for name, make_url in _scenarios(bounds).items():
+            rng = random.Random(name)
+            urls = [base_url + make_url(rng) for _ in range(URLS_PER_SCENARIO)]
+            await hammer(urls, 4, 0.5)
+            for concurrency in levels:
+                result = await hammer(urls, concurrency, duration)
+                report.add(name, {"concurrency": concurrency}, result)
+                print(
+                    f"{name:<16} {concurrency:>11} {result['rps']:>8.0f} {result['p50_ms']:>8.2f} "
+                    f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['errors']:>7}"
+                )
+    finally:
+        api.terminate()
+        api.wait()
+        if cleanup:
+            await _cleanup(database_url, count)
+    print(f"report: {report.write(output)}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--tickers", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--concurrency", default="1,8,32,128")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--output")
+    parser.add_argument("--cleanup", action="store_true")
+    args = parser.parse_args()
+    levels = [int(level) for level in args.concurrency.split(",")]
+    asyncio.run(run(args.database_url, args.tickers, args.rows, levels, args.duration, args.output, args.cleanup))
+
+
+if __name__ == "__main__":
+    main()
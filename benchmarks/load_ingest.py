@@ -0,0 +1,161 @@
+"""Нагрузка на путь записи цен при растущем числе тикеров, отчет в JSON для сравнения между коммитами.
+
+Запуск: python -m benchmarks.load_ingest --database-url postgresql://... [--tickers 2,10,50,200 --cycles 20
+--latency 0.05 --jitter 0.02 --error-rate 0 --stream-duration 10 --tick-interval 0.1 --output report.json]
+Deribit заменяет benchmarks.fake_deribit, поднятый отдельным процессом.
+- fetch_prices: задача Celery вызывается напрямую (тело задачи, WorkerResources, DeribitClient, save_many) --cycles
+  раз подряд для каждого числа индексов; в отчете p50/p95/p99 цикла и цен в секунду. Кредитный лимит Deribit
+  в прогоне поднят, если DERIBIT_CREDITS_* не заданы в окружении: меряется сам конвейер, а не ожидание кредитов.
+- stream_prices: PriceStreamIngestor с BufferedPriceWriter на WebSocket-тиках раз в --tick-interval по каждому
+  индексу в течение --stream-duration секунд; в отчете принятые и записанные тики в секунду против предложенных.
+Тикеры LOAD<n>_USD удаляются по окончании. Цены одной секунды отбрасывает ON CONFLICT, в rows/s они учтены.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import List
+
+from benchmarks._http_load import free_port, percentile, wait_ready
+from benchmarks._report import Report
+from benchmarks._seed import delete_tickers
+from benchmarks.fake_deribit import ws_url
+from src.infrastructure.config import get_settings
+from src.infrastructure.database.buffered_writer import BufferedPriceWriter
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+from src.infrastructure.external.deribit_ws_client import DeribitWebSocketClient
+from src.infrastructure.tasks import fetch_prices as task_module
+from src.infrastructure.tasks.stream_prices import PriceStreamIngestor
+from src.infrastructure.tasks.worker_resources import worker_resources
+
+INDEX_TEMPLATE = "load{n}_usd"
+
+
+def _index_names(count: int) -> List[str]:
+    return [INDEX_TEMPLATE.format(n=n) for n in range(count)]
+
+
+def _start_fake_deribit(port: int, args) -> subprocess.Popen:
+    return subprocess.Popen([
+        sys.executable, "-m", "benchmarks.fake_deribit", "--port", str(port), "--latency", str(args.latency),
+        "--jitter", str(args.jitter), "--error-rate", str(args.error_rate), "--tick-interval", str(args.tick_interval)
+    ])
+
+
+def _fetch_prices(report: Report, levels: List[int], cycles: int) -> None:
+    print(f"{'fetch_prices':<14} {'indices':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'rows/s':>9} {'failures':>9}")
+    try:
+        for count in levels:
+            # тело задачи берет список индексов из настроек модуля
+            task_module.settings.deribit_index_names = _index_names(count)
+            task_module.fetch_prices()
+            failures_before = worker_resources.client.failures
+            durations = []
+            saved = 0
+            for _ in range(cycles):
+                started = time.perf_counter()
+                saved += task_module.fetch_prices()["saved"]
+                durations.append(time.perf_counter() - started)
+            durations.sort()
+            metrics = {
+                "p50_ms": percentile(durations, 0.50) * 1000,
+                "p95_ms": percentile(durations, 0.95) * 1000,
+                "p99_ms": percentile(durations, 0.99) * 1000,
+                "mean_ms": statistics.mean(durations) * 1000,
+                "rows_per_sec": saved / sum(durations),
+                "failures": worker_resources.client.failures - failures_before,
+            }
+            report.add("fetch_prices", {"indices": count}, metrics)
+            print(
+                f"{'':<14} {count:>8} {metrics['p50_ms']:>8.1f} {metrics['p95_ms']:>8.1f} {metrics['p99_ms']:>8.1f} "
+                f"{metrics['rows_per_sec']:>9.0f} {metrics['failures']:>9}"
+            )
+    finally:
+        worker_resources.shutdown()
+
+
+async def _stream_level(database_url: str, deribit_ws_url: str, count: int, duration: float, tick_interval: float):
+    db = Database(database_url)
+    repo = PriceRepository(db)
+    client = DeribitWebSocketClient(ws_url=deribit_ws_url)
+    try:
+        await db.connect()
+        async with BufferedPriceWriter(repo) as writer:
+            ingestor = PriceStreamIngestor(client, writer)
+            task = asyncio.create_task(ingestor.run(_index_names(count)))
+            await asyncio.sleep(duration)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        stats = writer.stats()
+    finally:
+        await client.close()
+        await db.close()
+    return {
+        "received_per_sec": ingestor.saved_ticks / duration,
+        "written_per_sec": stats["flushed_rows"] / duration,
+        "batches": stats["batches"],
+        "failed_rows": stats["failed_rows"],
+    }
+
+
+def _stream_prices(report: Report, levels: List[int], database_url: str, deribit_ws_url: str, args) -> None:
+    print(f"{'stream_prices':<14} {'indices':>8} {'offered/s':>10} {'received/s':>11} {'written/s':>10}")
+    for count in levels:
+        metrics = asyncio.run(_stream_level(database_url, deribit_ws_url, count, args.stream_duration, args.tick_interval))
+        report.add("stream_prices", {"indices": count, "tick_interval": args.tick_interval}, metrics)
+        print(
+            f"{'':<14} {count:>8} {count / args.tick_interval:>10.0f} {metrics['received_per_sec']:>11.0f} "
+            f"{metrics['written_per_sec']:>10.0f}"
+        )
+
+
+async def _cleanup(database_url: str, levels: List[int]) -> None:
+    db = Database(database_url)
+    try:
+        await delete_tickers(PriceRepository(db), [name.upper() for name in _index_names(max(levels))])
+    finally:
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--tickers", default="2,10,50,200")
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--stream-duration", type=float, default=10.0)
+    parser.add_argument("--tick-interval", type=float, default=0.1)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+    levels = [int(level) for level in args.tickers.split(",")]
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}/api/v2"
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["DERIBIT_BASE_URL"] = base_url
+    os.environ.setdefault("DERIBIT_CREDITS_CAPACITY", "1e9")
+    os.environ.setdefault("DERIBIT_CREDITS_PER_SECOND", "1e9")
+    # настройки уже прочитаны при импорте модулей задач; WorkerResources перечитает их при старте с этим окружением
+    get_settings.cache_clear()
+    fake_deribit = _start_fake_deribit(port, args)
+    report = Report("ingest", {key: value for key, value in vars(args).items() if key != "database_url"})
+    try:
+        asyncio.run(wait_ready(f"{base_url}/public/get_index_price?index_name=warmup_usd"))
+        _fetch_prices(report, levels, args.cycles)
+        if args.stream_duration > 0:
+            _stream_prices(report, levels, args.database_url, ws_url(base_url), args)
+    finally:
+        fake_deribit.terminate()
+        fake_deribit.wait()
+        asyncio.run(_cleanup(args.database_url, levels))
+    print(f"report: {report.write(args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Генератор данных для нагрузочных прогонов: история цен нескольких тикеров в локальном PostgreSQL.
+
+Запуск: python -m benchmarks.seed_data --database-url postgresql://... [--tickers 5 --rows 1000000 --step 60]
+Тикеры LOAD_<n>_USD, у каждого --rows точек с шагом --step секунд, заканчивающихся текущим моментом (--end),
+так что в истории есть и давно закрытые диапазоны, и свежие. Строки генерирует сам PostgreSQL
+(benchmarks._seed.seed_series), часовые и дневные свечи строятся по ним сразу. Уже заполненные тикеры
+пересоздаются только с --replace; --drop удаляет их и выходит.
+"""
+import argparse
+import asyncio
+import time
+from typing import List, Optional
+
+from benchmarks._seed import delete_tickers, seed_series
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+TICKER_TEMPLATE = "LOAD_{n}_USD"
+
+
+def load_tickers(count: int) -> List[str]:
+    return [TICKER_TEMPLATE.format(n=n) for n in range(count)]
+
+
+async def seed_tickers(
+        repo: PriceRepository,
+        tickers: List[str],
+        rows: int,
+        step: int,
+        end: Optional[int] = None,
+        replace: bool = False
+) -> int:
+    # возвращает число вставленных строк; тикеры, у которых история уже есть, без replace не трогаются
+    end = end if end is not None else int(time.time()) // step * step
+    start = end - rows * step
+    if replace:
+        await delete_tickers(repo, tickers)
+    inserted = 0
+    for ticker in tickers:
+        if await repo.get_history_bounds(ticker) is not None:
+            continue
+        await seed_series(repo, ticker, start, step, rows)
+        await repo.rebuild_rollups(ticker, start, end)
+        inserted += rows
+    return inserted
+
+
+async def run(database_url: str, count: int, rows: int, step: int, end: Optional[int], replace: bool, drop: bool):
+    db = Database(database_url)
+    repo = PriceRepository(db)
+    tickers = load_tickers(count)
+    try:
+        await repo.create_table_if_not_exists()
+        if drop:
+            await delete_tickers(repo, tickers)
+            print(f"dropped {', '.join(tickers)}")
+            return
+        started = time.perf_counter()
+        inserted = await seed_tickers(repo, tickers, rows, step, end, replace)
+        seconds = time.perf_counter() - started
+        if inserted:
+            print(f"inserted {inserted} rows for {', '.join(tickers)} in {seconds:.1f}s ({inserted / seconds:.0f} rows/s)")
+        else:
+            print(f"{', '.join(tickers)} already seeded, use --replace to regenerate")
+    finally:
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--tickers", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--step", type=int, default=60)
+    parser.add_argument("--end", type=int)
+    parser.add_argument("--replace", action="store_true")
+    parser.add_argument("--drop", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(run(args.database_url, args.tickers, args.rows, args.step, args.end, args.replace, args.drop))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+from typing import AsyncIterator, Optional
+
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+from src.infrastructure.export.price_export import DEFAULT_BATCH_BYTES, encode_prices
+
+
+class ExportPricesUseCase:
+    def __init__(self, repository: PriceRepository):
+        self.repository = repository
+
+    def execute(
+            self,
+            ticker: str,
+            fmt: str,
+            after: Optional[int] = None,
+            before: Optional[int] = None,
+            timeout: Optional[float] = None,
+            batch_bytes: int = DEFAULT_BATCH_BYTES
+    ) -> AsyncIterator[bytes]:
+        chunks = self.repository.iter_csv(ticker, after=after, before=before, timeout=timeout)
+        return encode_prices(chunks, fmt, batch_bytes)
@@ -0,0 +1,16 @@
+from typing import List
+
+from src.domain.models import CANDLE_INTERVALS, Candle
+from src.infrastructure.database.repositories.price_repository import ROLLUP_INTERVALS, PriceRepository
+
+
+class GetCandlesUseCase:
+    def __init__(self, repository: PriceRepository):
+        self.repository = repository
+
+    async def execute(self, ticker: str, start: int, end: int, interval: str) -> List[Candle]:
+        interval_seconds = CANDLE_INTERVALS[interval]
+        # готовые свечи из price_rollups подходят, только если диапазон не режет их на части
+        if interval in ROLLUP_INTERVALS and start % interval_seconds == 0 and end % interval_seconds == 0:
+            return await self.repository.get_rollup_candles(ticker, start, end, interval_seconds)
+        return await self.repository.get_candles(ticker, start, end, interval_seconds)
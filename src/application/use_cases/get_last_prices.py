@@ -0,0 +1,12 @@
+from typing import Dict, Sequence
+
+from src.domain.models import Price
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+
+class GetLastPricesUseCase:
+    def __init__(self, repository: PriceRepository):
+        self.repository = repository
+
+    async def execute(self, tickers: Sequence[str]) -> Dict[str, Price]:
+        return await self.repository.get_last_by_tickers(list(dict.fromkeys(tickers)))
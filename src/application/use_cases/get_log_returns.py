@@ -0,0 +1,12 @@
+from src.domain.analytics import IndicatorSeries, log_returns
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+
+class GetLogReturnsUseCase:
+    def __init__(self, repository: PriceRepository):
+        self.repository = repository
+
+    async def execute(self, ticker: str, start: int, end: int) -> IndicatorSeries:
+        timestamps, prices = (await self.repository.get_price_series(ticker, after=start - 1, before=end)).numpy()
+        # доходность относится к моменту второй точки пары
+        return IndicatorSeries(ticker=ticker, timestamps=timestamps[1:], values=log_returns(prices))
@@ -0,0 +1,14 @@
+from src.domain.analytics import IndicatorSeries, ema, sma
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+
+class GetMovingAverageUseCase:
+    def __init__(self, repository: PriceRepository):
+        self.repository = repository
+
+    async def execute(self, ticker: str, start: int, end: int, kind: str, window: int) -> IndicatorSeries:
+        # window - число точек; SMA начинается с точки, на которой окно впервые заполнено
+        timestamps, prices = (await self.repository.get_price_series(ticker, after=start - 1, before=end)).numpy()
+        if kind == "sma":
+            return IndicatorSeries(ticker=ticker, timestamps=timestamps[window - 1:], values=sma(prices, window))
+        return IndicatorSeries(ticker=ticker, timestamps=timestamps, values=ema(prices, window))
@@ -0,0 +1,15 @@
+from typing import Optional
+
+from src.domain.models import Price
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+
+class GetPriceAsOfUseCase:
+    def __init__(self, repository: PriceRepository):
+        self.repository = repository
+
+    async def execute(self, ticker: str, timestamp: int, tolerance: Optional[int] = None) -> Optional[Price]:
+        # без tolerance - последняя цена на момент timestamp, с tolerance - ближайшая в пределах tolerance секунд
+        if tolerance is None:
+            return await self.repository.get_at_or_before(ticker, timestamp)
+        return await self.repository.get_nearest(ticker, timestamp, tolerance)
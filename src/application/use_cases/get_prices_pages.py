@@ -0,0 +1,20 @@
+from typing import Dict, List, Optional, Sequence
+
+from src.domain.models import Price
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+
+class GetPricesPagesUseCase:
+    def __init__(self, repository: PriceRepository):
+        self.repository = repository
+
+    async def execute(
+            self,
+            tickers: Sequence[str],
+            limit: int,
+            after: Optional[int] = None,
+            before: Optional[int] = None
+    ) -> Dict[str, List[Price]]:
+        return await self.repository.get_pages_by_tickers(
+            list(dict.fromkeys(tickers)), limit, after=after, before=before
+        )
@@ -0,0 +1,17 @@
+from typing import Optional, Tuple
+
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+
+class GetPricesVersionUseCase:
+    def __init__(self, repository: PriceRepository):
+        self.repository = repository
+
+    async def execute(
+            self,
+            ticker: str,
+            limit: Optional[int] = None,
+            after: Optional[int] = None,
+            before: Optional[int] = None
+    ) -> Tuple[int, Optional[int], Optional[int]]:
+        return await self.repository.get_page_version(ticker, limit, after=after, before=before)
@@ -0,0 +1,22 @@
+from typing import List
+
+from src.domain.analytics import VolatilityWindow, annualize, realized_volatility
+from src.domain.models import CANDLE_INTERVALS
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+
+class GetRealizedVolatilityUseCase:
+    def __init__(self, repository: PriceRepository):
+        self.repository = repository
+
+    async def execute(self, ticker: str, start: int, end: int, interval: str) -> List[VolatilityWindow]:
+        interval_seconds = CANDLE_INTERVALS[interval]
+        timestamps, prices = (await self.repository.get_price_series(ticker, after=start - 1, before=end)).numpy()
+        buckets, volatility, counts = realized_volatility(timestamps, prices, interval_seconds)
+        annualized = annualize(volatility, interval_seconds)
+        return [
+            VolatilityWindow(ticker=ticker, bucket=bucket, volatility=value, annualized=yearly, count=count)
+            for bucket, value, yearly, count in zip(
+                buckets.tolist(), volatility.tolist(), annualized.tolist(), counts.tolist()
+            )
+        ]
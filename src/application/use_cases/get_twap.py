@@ -0,0 +1,33 @@
+from typing import Dict, List, Sequence
+
+from src.domain.analytics import TwapWindow, twap
+from src.domain.models import CANDLE_INTERVALS
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+
+class GetTwapUseCase:
+    def __init__(self, repository: PriceRepository):
+        self.repository = repository
+
+    async def execute(
+            self,
+            tickers: Sequence[str],
+            start: int,
+            end: int,
+            interval: str
+    ) -> Dict[str, List[TwapWindow]]:
+        interval_seconds = CANDLE_INTERVALS[interval]
+        series_by_ticker = await self.repository.get_price_series_by_tickers(
+            list(dict.fromkeys(tickers)), after=start - 1, before=end
+        )
+        result = {}
+        for ticker, series in series_by_ticker.items():
+            timestamps, prices = series.numpy()
+            buckets, averages, means, counts = twap(timestamps, prices, end, interval_seconds)
+            result[ticker] = [
+                TwapWindow(ticker=ticker, bucket=bucket, twap=average, mean=mean, count=count)
+                for bucket, average, mean, count in zip(
+                    buckets.tolist(), averages.tolist(), means.tolist(), counts.tolist()
+                )
+            ]
+        return result
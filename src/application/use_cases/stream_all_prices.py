@@ -0,0 +1,18 @@
+from typing import AsyncIterator, List, Optional
+
+from src.domain.models import Price
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+
+class StreamAllPricesUseCase:
+    def __init__(self, repository: PriceRepository):
+        self.repository = repository
+
+    def execute(
+            self,
+            ticker: str,
+            after: Optional[int] = None,
+            before: Optional[int] = None,
+            chunk_size: int = 1000
+    ) -> AsyncIterator[List[Price]]:
+        return self.repository.iter_by_ticker(ticker, after=after, before=before, chunk_size=chunk_size)
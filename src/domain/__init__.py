@@ -1,3 +1,3 @@
-from .models import Price, Ticker
+from .models import CANDLE_INTERVALS, Candle, Price, PriceGap, Ticker, index_name_to_ticker
 
-__all__ = ["Price", "Ticker"]
+__all__ = ["CANDLE_INTERVALS", "Candle", "Price", "PriceGap", "Ticker", "index_name_to_ticker"]
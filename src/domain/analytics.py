@@ -0,0 +1,135 @@
+import math
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Tuple
+
+# numpy (~70 мс импорта) загружается при первом расчете, а не при старте API: функции импортируют его сами
+if TYPE_CHECKING:
+    import numpy as np
+
+SECONDS_PER_YEAR = 365 * 86400
+MOVING_AVERAGES = ("sma", "ema")
+
+
+# значение показателя на каждую точку: timestamps[i] - момент, к которому относится values[i]
+@dataclass
+class IndicatorSeries:
+    ticker: str
+    timestamps: "np.ndarray"
+    values: "np.ndarray"
+
+
+@dataclass
+class VolatilityWindow:
+    ticker: str
+    bucket: int
+    volatility: float
+    annualized: float
+    count: int
+
+
+@dataclass
+class TwapWindow:
+    ticker: str
+    bucket: int
+    twap: float
+    mean: float
+    count: int
+
+
+def log_returns(prices: "np.ndarray") -> "np.ndarray":
+    # r[i] = ln(p[i+1] / p[i]), на одну точку меньше, чем цен
+    import numpy as np
+
+    return np.diff(np.log(prices))
+
+
+def _bucket_starts(bucket_ids: "np.ndarray") -> "np.ndarray":
+    # индексы, с которых начинается каждый bucket в отсортированном массиве
+    import numpy as np
+
+    if not len(bucket_ids):
+        return np.empty(0, dtype=np.intp)
+    return np.concatenate(([0], np.flatnonzero(np.diff(bucket_ids)) + 1))
+
+
+def realized_volatility(
+        timestamps: "np.ndarray",
+        prices: "np.ndarray",
+        interval_seconds: int
+) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    # sqrt(сумма r^2) по окнам interval_seconds; доходность относится к окну своей конечной точки.
+    # Возвращает (начало окна, волатильность за окно, число доходностей в окне)
+    import numpy as np
+
+    returns = log_returns(prices)
+    buckets = timestamps[1:] // interval_seconds * interval_seconds
+    starts = _bucket_starts(buckets)
+    if not len(starts):
+        return buckets, returns, np.empty(0, dtype=np.int64)
+    volatility = np.sqrt(np.add.reduceat(returns * returns, starts))
+    counts = np.diff(np.append(starts, len(returns)))
+    return buckets[starts], volatility, counts
+
+
+def annualize(volatility: "np.ndarray", interval_seconds: int) -> "np.ndarray":
+    return volatility * math.sqrt(SECONDS_PER_YEAR / interval_seconds)
+
+
+def sma(values: "np.ndarray", window: int) -> "np.ndarray":
+    # скользящее среднее через накопленную сумму; значения сдвинуты к первому, чтобы сумма по году
+    # минутных цен не теряла точность. Первое значение - для точек [0, window)
+    import numpy as np
+
+    if len(values) < window:
+        return np.empty(0, dtype=np.float64)
+    base = values[0]
+    cumulative = np.cumsum(np.concatenate(([0.0], values - base)))
+    return (cumulative[window:] - cumulative[:-window]) / window + base
+
+
+def ema(values: "np.ndarray", span: int) -> "np.ndarray":
+    # EMA как в pandas ewm(span, adjust=False): e[0] = x[0], e[i] = a*x[i] + (1-a)*e[i-1].
+    # Рекуррентность разворачивается в блоке: e[i] = d^(i+1) * (e[-1] + a * sum x[k] / d^(k+1)), d = 1-a;
+    # блок ограничен так, чтобы d^-len не переполнял float64
+    import numpy as np
+
+    alpha = 2.0 / (span + 1)
+    decay = 1.0 - alpha
+    if span <= 1 or not len(values):
+        return np.array(values, dtype=np.float64)
+    result = np.empty(len(values), dtype=np.float64)
+    block = max(1, int(600 / -math.log(decay)))
+    previous = values[0]
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        powers = decay ** np.arange(1, len(chunk) + 1)
+        result[start:start + len(chunk)] = powers * (previous + alpha * np.cumsum(chunk / powers))
+        previous = result[start + len(chunk) - 1]
+    return result
+
+
+def twap(
+        timestamps: "np.ndarray",
+        prices: "np.ndarray",
+        end: int,
+        interval_seconds: int
+) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray", "np.ndarray"]:
+    # средняя цена, взвешенная временем действия: цена держится до следующей точки, но не дольше конца окна
+    # и конца диапазона end. Возвращает (начало окна, twap, простое среднее, число точек)
+    import numpy as np
+
+    buckets = timestamps // interval_seconds * interval_seconds
+    starts = _bucket_starts(buckets)
+    if not len(starts):
+        empty = np.empty(0, dtype=np.float64)
+        return buckets, empty, empty, np.empty(0, dtype=np.int64)
+    until = np.minimum(np.append(timestamps[1:], end), np.minimum(buckets + interval_seconds, end))
+    weights = np.maximum(until - timestamps, 0).astype(np.float64)
+    counts = np.diff(np.append(starts, len(prices)))
+    sums = np.add.reduceat(prices, starts)
+    weight_sums = np.add.reduceat(weights, starts)
+    weighted = np.add.reduceat(prices * weights, starts)
+    means = sums / counts
+    # окно из одной точки в самый конец диапазона не имеет длительности - берем простое среднее
+    safe = np.where(weight_sums > 0, weight_sums, 1.0)
+    return buckets[starts], np.where(weight_sums > 0, weighted / safe, means), means, counts
@@ -0,0 +1,114 @@
+from typing import Dict, Optional, Sequence
+
+from src.domain.models import Price
+from src.infrastructure.cache.price_index import PriceIndex
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+
+class LatestPriceCache:
+    def __init__(self):
+        self._latest: Dict[str, Price] = {}
+        # пока уведомления не приходят, кэшу верить нельзя - все запросы идут в БД
+        self.enabled = False
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, ticker: str) -> Optional[Price]:
+        if not self.enabled:
+            return None
+        return self._latest.get(ticker)
+
+    def update(self, price: Price) -> None:
+        if not self.enabled:
+            return
+        current = self._latest.get(price.ticker)
+        # уведомления и чтения из БД могут прийти не по порядку - старую цену поверх новой не пишем
+        if current is None or price.timestamp >= current.timestamp:
+            self._latest[price.ticker] = price
+
+    def set_enabled(self, enabled: bool) -> None:
+        self.enabled = enabled
+        if not enabled:
+            self._latest.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._latest)}
+
+
+class CachedPriceRepository(PriceRepository):
+    def __init__(
+            self,
+            db: Database,
+            cache: Optional[LatestPriceCache],
+            price_index: Optional[PriceIndex] = None,
+            index_db: Optional[Database] = None
+    ):
+        super().__init__(db)
+        self.cache = cache
+        self.price_index = price_index
+        # индекс дочитывается по NOTIFY основной базы, поэтому и читает из нее: отстающая реплика вернула бы
+        # пустой хвост, а серия уже не dirty - as_of и nearest отдавали бы старое до следующей цены
+        self._index_repository = PriceRepository(index_db) if index_db is not None and index_db is not db else self
+
+    async def get_last_by_ticker(self, ticker: str) -> Optional[Price]:
+        if self.cache is None:
+            return await super().get_last_by_ticker(ticker)
+        cached = self.cache.get(ticker)
+        if cached is not None:
+            self.cache.hits += 1
+            return cached
+        self.cache.misses += 1
+        price = await super().get_last_by_ticker(ticker)
+        if price is not None:
+            self.cache.update(price)
+        return price
+
+    async def get_last_by_tickers(self, tickers: Sequence[str]) -> Dict[str, Price]:
+        if self.cache is None:
+            return await super().get_last_by_tickers(tickers)
+        found: Dict[str, Price] = {}
+        missing = []
+        for ticker in tickers:
+            cached = self.cache.get(ticker)
+            if cached is not None:
+                found[ticker] = cached
+            else:
+                missing.append(ticker)
+        self.cache.hits += len(found)
+        if missing:
+            # в БД идем одним запросом только за теми, кого нет в кэше
+            self.cache.misses += len(missing)
+            for ticker, price in (await super().get_last_by_tickers(missing)).items():
+                self.cache.update(price)
+                found[ticker] = price
+        return found
+
+    async def get_at_or_before(self, ticker: str, timestamp: int) -> Optional[Price]:
+        series = await self._get_series(ticker)
+        if series is not None and timestamp >= series.start:
+            found = series.at_or_before(timestamp)
+            if found is not None:
+                self.price_index.hits += 1
+                return Price(ticker=ticker, price=found[1], timestamp=found[0])
+        # раньше окна (или в окне до timestamp нет точек) - ответ может быть только в БД
+        if self.price_index is not None:
+            self.price_index.fallbacks += 1
+        return await super().get_at_or_before(ticker, timestamp)
+
+    async def get_nearest(self, ticker: str, timestamp: int, tolerance: int) -> Optional[Price]:
+        series = await self._get_series(ticker)
+        if series is not None and timestamp - tolerance >= series.start:
+            self.price_index.hits += 1
+            found = series.nearest(timestamp, tolerance)
+            if found is None:
+                return None
+            return Price(ticker=ticker, price=found[1], timestamp=found[0])
+        if self.price_index is not None:
+            self.price_index.fallbacks += 1
+        return await super().get_nearest(ticker, timestamp, tolerance)
+
+    async def _get_series(self, ticker: str):
+        if self.price_index is None:
+            return None
+        return await self.price_index.get_series(ticker, self._index_repository)
@@ -0,0 +1,118 @@
+import asyncio
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from src.domain.models import Price
+
+if TYPE_CHECKING:
+    from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+
+class TickerSeries:
+    # окно истории одного тикера: timestamps и цены в плотных массивах, отсортированы по времени
+    def __init__(self, start: int):
+        self.start = start
+        self.timestamps = array("q")
+        self.prices = array("d")
+        self.loaded = False
+        self.dirty = False
+        self.invalid = False
+
+    @property
+    def last_timestamp(self) -> int:
+        return self.timestamps[-1] if self.timestamps else self.start
+
+    def extend(self, timestamps, prices) -> None:
+        self.timestamps.extend(timestamps)
+        self.prices.extend(prices)
+
+    def trim(self, start: int) -> None:
+        cut = bisect_left(self.timestamps, start)
+        if cut:
+            del self.timestamps[:cut]
+            del self.prices[:cut]
+        self.start = start
+
+    def at_or_before(self, timestamp: int) -> Optional[Tuple[int, float]]:
+        position = bisect_right(self.timestamps, timestamp) - 1
+        if position < 0:
+            return None
+        return self.timestamps[position], self.prices[position]
+
+    def nearest(self, timestamp: int, tolerance: int) -> Optional[Tuple[int, float]]:
+        position = bisect_left(self.timestamps, timestamp)
+        candidates = []
+        if position > 0:
+            candidates.append(position - 1)
+        if position < len(self.timestamps):
+            candidates.append(position)
+        best = None
+        for candidate in candidates:
+            distance = abs(self.timestamps[candidate] - timestamp)
+            # при равном расстоянии выигрывает более ранняя точка (она идет первой)
+            if distance <= tolerance and (best is None or distance < abs(self.timestamps[best] - timestamp)):
+                best = candidate
+        if best is None:
+            return None
+        return self.timestamps[best], self.prices[best]
+
+
+class PriceIndex:
+    # окно последних window_seconds по каждому тикеру; грузится при первом обращении и дочитывается
+    # из БД по уведомлениям о новых ценах
+    def __init__(self, window_seconds: int = 7 * 86400):
+        self.window_seconds = window_seconds
+        self._series: Dict[str, TickerSeries] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.enabled = False
+        self.hits = 0
+        self.fallbacks = 0
+
+    def set_enabled(self, enabled: bool) -> None:
+        self.enabled = enabled
+        if not enabled:
+            self._series.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "fallbacks": self.fallbacks,
+            "tickers": len(self._series),
+            "points": sum(len(series.timestamps) for series in self._series.values()),
+        }
+
+    def on_price(self, price: Price) -> None:
+        series = self._series.get(price.ticker)
+        if series is None:
+            return
+        if price.timestamp > series.last_timestamp:
+            series.dirty = True
+        elif price.timestamp >= series.start:
+            # в окно дописали строку задним числом - проще перечитать окно целиком
+            series.invalid = True
+
+    async def get_series(self, ticker: str, repository: "PriceRepository") -> Optional[TickerSeries]:
+        if not self.enabled:
+            return None
+        series = self._series.get(ticker)
+        if series is not None and series.loaded and not series.dirty and not series.invalid:
+            return series
+        lock = self._locks.setdefault(ticker, asyncio.Lock())
+        async with lock:
+            series = self._series.get(ticker)
+            if series is None or series.invalid or not series.loaded:
+                # серия регистрируется до запроса: уведомления, пришедшие во время загрузки, пометят ее dirty
+                series = TickerSeries(start=int(time.time()) - self.window_seconds)
+                self._series[ticker] = series
+                timestamps, prices = await repository.get_series_since(ticker, series.start - 1)
+                series.extend(timestamps, prices)
+                series.loaded = True
+            elif series.dirty:
+                series.dirty = False
+                timestamps, prices = await repository.get_series_since(ticker, series.last_timestamp)
+                series.extend(timestamps, prices)
+                if series.last_timestamp - series.start > 2 * self.window_seconds:
+                    series.trim(series.last_timestamp - self.window_seconds)
+        return series
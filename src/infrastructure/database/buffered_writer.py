@@ -0,0 +1,144 @@
+import asyncio
+import logging
+from typing import List, Optional
+
+import asyncpg
+
+from src.domain.models import Price
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class BufferedPriceWriter:
+    def __init__(
+            self,
+            repository: PriceRepository,
+            max_batch_size: int = 500,
+            flush_interval: float = 1.0,
+            max_buffer_size: int = 10000,
+            max_retries: int = 5,
+            retry_base_delay: float = 0.5,
+            retry_max_delay: float = 10.0
+    ):
+        self.repository = repository
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        # когда буфер полон, write() ждет - так медленная БД притормаживает источник, а не съедает память
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_buffer_size)
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        self.flushed_rows = 0
+        self.failed_rows = 0
+        self.retries = 0
+        self.batches = 0
+
+    def stats(self) -> dict:
+        return {
+            "flushed_rows": self.flushed_rows,
+            "failed_rows": self.failed_rows,
+            "retries": self.retries,
+            "batches": self.batches,
+            "queued": self._queue.qsize(),
+        }
+
+    async def __aenter__(self) -> "BufferedPriceWriter":
+        self.start()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def write(self, price: Price) -> None:
+        if self._closed:
+            raise RuntimeError("BufferedPriceWriter is closed")
+        if self._task is None:
+            # без фоновой задачи буфер никто не разбирает: на полном буфере write() ждал бы вечно
+            raise RuntimeError("BufferedPriceWriter is not started, use start() or async with")
+        await self._put(price)
+
+    async def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._task is None:
+            return
+        await self._put(_STOP)
+        await self._task
+
+    def _raise_if_failed(self) -> None:
+        if self._task is not None and self._task.done():
+            self._task.result()
+
+    async def _put(self, item) -> None:
+        # фоновая задача упала - очередь больше никто не читает: ее исключение отдается вызывающему,
+        # а не оставляет write() и close() ждать место в полном буфере вечно
+        self._raise_if_failed()
+        if not self._queue.full():
+            await self._queue.put(item)
+            return
+        put = asyncio.ensure_future(self._queue.put(item))
+        try:
+            await asyncio.wait((put, self._task), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if not put.done():
+                put.cancel()
+        self._raise_if_failed()
+
+    async def _collect_batch(self) -> List:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.max_batch_size and batch[-1] is not _STOP:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _flush(self, batch: List[Price]) -> None:
+        if not batch:
+            return
+        # запись идемпотентна (уникальный индекс тикер + timestamp), пачку можно повторять. Пока идут повторы,
+        # буфер не разбирается и write() притормаживает источник; после max_retries пачка теряется, а поток
+        # тиков продолжается. Непредвиденные исключения не глотаются - они завершают задачу и всплывают в write()
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self.repository.save_many(batch)
+                break
+            except (asyncpg.PostgresError, asyncpg.InterfaceError, OSError, asyncio.TimeoutError):
+                if attempt == self.max_retries:
+                    logger.exception("Failed to flush %d prices after %d retries", len(batch), attempt)
+                    self.failed_rows += len(batch)
+                    return
+                delay = min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt)
+                logger.warning("Failed to flush %d prices, retrying in %.1fs", len(batch), delay, exc_info=True)
+                self.retries += 1
+                await asyncio.sleep(delay)
+        self.flushed_rows += len(batch)
+        self.batches += 1
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect_batch()
+            stopping = batch[-1] is _STOP
+            if stopping:
+                batch.pop()
+            await self._flush(batch)
+            if stopping:
+                return
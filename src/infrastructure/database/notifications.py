@@ -0,0 +1,97 @@
+import asyncio
+import json
+import logging
+from typing import Callable, List, Optional
+
+import asyncpg
+
+from src.domain.models import Price
+
+logger = logging.getLogger(__name__)
+
+# канал NOTIFY, в который триггер на prices пишет последнюю цену каждого тикера из вставки
+PRICE_UPDATES_CHANNEL = "price_updates"
+
+PriceCallback = Callable[[Price], None]
+StateCallback = Callable[[bool], None]
+
+
+class PriceUpdateListener:
+    # держит отдельное соединение с LISTEN (из пула его брать нельзя) и раздает цены подписчикам
+    def __init__(self, database_url: str, reconnect_delay: float = 1.0, max_reconnect_delay: float = 30.0):
+        self.database_url = database_url
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._price_callbacks: List[PriceCallback] = []
+        self._state_callbacks: List[StateCallback] = []
+        self._conn: Optional[asyncpg.Connection] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._stopped = False
+
+    @property
+    def connected(self) -> bool:
+        return self._conn is not None and not self._conn.is_closed()
+
+    def subscribe(self, callback: PriceCallback) -> None:
+        self._price_callbacks.append(callback)
+
+    def on_state_change(self, callback: StateCallback) -> None:
+        # подписчик узнает, когда уведомления могли потеряться (False) и когда они снова идут (True)
+        self._state_callbacks.append(callback)
+
+    async def start(self) -> None:
+        self._stopped = False
+        try:
+            await self._connect()
+        except (OSError, asyncpg.PostgresError, asyncio.TimeoutError) as error:
+            logger.warning("LISTEN %s failed: %r", PRICE_UPDATES_CHANNEL, error)
+            self._schedule_reconnect()
+
+    async def stop(self) -> None:
+        self._stopped = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            await conn.close()
+        self._set_state(False)
+
+    async def _connect(self) -> None:
+        conn = await asyncpg.connect(self.database_url)
+        conn.add_termination_listener(self._on_termination)
+        await conn.add_listener(PRICE_UPDATES_CHANNEL, self._on_notification)
+        self._conn = conn
+        self._set_state(True)
+
+    def _on_notification(self, conn, pid, channel, payload: str) -> None:
+        data = json.loads(payload)
+        price = Price(ticker=data["ticker"], price=float(data["price"]), timestamp=int(data["timestamp"]))
+        for callback in self._price_callbacks:
+            callback(price)
+
+    def _on_termination(self, conn) -> None:
+        if self._conn is conn:
+            self._conn = None
+        self._set_state(False)
+        if not self._stopped:
+            self._schedule_reconnect()
+
+    def _set_state(self, connected: bool) -> None:
+        for callback in self._state_callbacks:
+            callback(connected)
+
+    def _schedule_reconnect(self) -> None:
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        delay = self.reconnect_delay
+        while not self._stopped:
+            await asyncio.sleep(delay)
+            try:
+                await self._connect()
+                return
+            except (OSError, asyncpg.PostgresError, asyncio.TimeoutError) as error:
+                logger.warning("LISTEN %s reconnect failed: %r", PRICE_UPDATES_CHANNEL, error)
+                delay = min(delay * 2, self.max_reconnect_delay)
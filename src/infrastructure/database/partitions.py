@@ -0,0 +1,70 @@
+import re
+from datetime import datetime, timezone
+from typing import List, Tuple
+
+import asyncpg
+
+# prices секционирована по месяцам: секция prices_pYYYYMM хранит timestamp из [начало месяца, начало следующего)
+PARTITION_PREFIX = "prices_p"
+# сколько месяцев вперед секции создаются заранее, чтобы запись в начале месяца не упиралась в DDL
+PARTITION_MONTHS_AHEAD = 2
+
+_BOUND_PATTERN = re.compile(r"FROM \('?(-?\d+)'?\) TO \('?(-?\d+)'?\)")
+
+
+def month_start(timestamp: int) -> int:
+    moment = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+    return int(datetime(moment.year, moment.month, 1, tzinfo=timezone.utc).timestamp())
+
+
+def next_month_start(timestamp: int) -> int:
+    moment = datetime.fromtimestamp(month_start(timestamp), tz=timezone.utc)
+    year, month = (moment.year + 1, 1) if moment.month == 12 else (moment.year, moment.month + 1)
+    return int(datetime(year, month, 1, tzinfo=timezone.utc).timestamp())
+
+
+def months_between(start: int, end: int) -> List[int]:
+    # начала месяцев, покрывающих [start, end]
+    months = []
+    month = month_start(start)
+    while month <= end:
+        months.append(month)
+        month = next_month_start(month)
+    return months
+
+
+def partition_name(month: int) -> str:
+    return PARTITION_PREFIX + datetime.fromtimestamp(month, tz=timezone.utc).strftime("%Y%m")
+
+
+async def create_partition(conn: asyncpg.Connection, month: int) -> None:
+    try:
+        await conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF prices "
+            f"FOR VALUES FROM ({month}) TO ({next_month_start(month)})"
+        )
+    except (asyncpg.DuplicateTableError, asyncpg.UniqueViolationError):
+        # секцию одновременно создал другой процесс
+        pass
+
+
+async def list_partitions(conn: asyncpg.Connection) -> List[Tuple[str, int, int]]:
+    rows = await conn.fetch("""
+        SELECT child.relname AS name, pg_get_expr(child.relpartbound, child.oid) AS bound
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = 'prices'::regclass
+    """)
+    partitions = []
+    for row in rows:
+        match = _BOUND_PATTERN.search(row["bound"])
+        if match:
+            partitions.append((row["name"], int(match.group(1)), int(match.group(2))))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+async def drop_partition(conn: asyncpg.Connection, name: str) -> None:
+    # DETACH CONCURRENTLY не берет эксклюзивную блокировку на prices, чтение и запись не останавливаются;
+    # выполняется вне транзакции
+    await conn.execute(f"ALTER TABLE prices DETACH PARTITION {name} CONCURRENTLY")
+    await conn.execute(f"DROP TABLE {name}")
@@ -1,85 +1,784 @@
-from typing import List, Optional
+import asyncio
+import json
+import time
+from array import array
+from contextlib import AsyncExitStack, asynccontextmanager, suppress
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
-from src.domain.models import Price
+from src.domain.models import CANDLE_INTERVALS, Candle, Price, PriceGap, PriceSeries
 from src.infrastructure.database.connection import Database
+from src.infrastructure.database.notifications import PRICE_UPDATES_CHANNEL
+from src.infrastructure.database.partitions import (
+    PARTITION_MONTHS_AHEAD,
+    create_partition,
+    drop_partition,
+    list_partitions,
+    month_start,
+    months_between,
+)
+from src.infrastructure.metrics import INGEST_LAG, instrument_queries
 
+TICKER_TIMESTAMP_INDEX = "uq_prices_ticker_timestamp"
+LEGACY_TICKER_TIMESTAMP_INDEX = "idx_ticker_timestamp"
+# CREATE ... IF NOT EXISTS и CREATE OR REPLACE из нескольких процессов сразу (дочерние процессы prefork, реплики API)
+# падают на каталоге с "tuple concurrently updated": схему создает один процесс, остальные ждут и видят готовые объекты
+SCHEMA_LOCK_NAME = "prices_schema"
 
+# в prices хранится smallint id тикера; запрос по имени подставляет id через InitPlan, поэтому
+# план остается индексным спуском по (ticker_id, timestamp) с отсечением секций по времени
+_TICKER_ID = "(SELECT id FROM tickers WHERE name = $1)"
+
+# id для списка тикеров, недостающие добавляются; NOT EXISTS не дает ON CONFLICT тратить значения
+# smallint-последовательности на уже известные тикеры
+_RESOLVE_TICKERS = """
+    WITH requested AS (
+        SELECT unnest($1::varchar[]) AS name
+    ),
+    created AS (
+        INSERT INTO tickers (name)
+        SELECT name FROM requested
+        WHERE NOT EXISTS (SELECT 1 FROM tickers WHERE tickers.name = requested.name)
+        ON CONFLICT (name) DO NOTHING
+        RETURNING id, name
+    )
+    SELECT id, name FROM created
+    UNION ALL
+    SELECT tickers.id, tickers.name FROM tickers JOIN requested USING (name)
+"""
+
+# интервалы, для которых свечи считаются при записи и хранятся в price_rollups
+ROLLUP_INTERVALS = ("1h", "1d")
+ROLLUP_INTERVAL_SECONDS = [CANDLE_INTERVALS[interval] for interval in ROLLUP_INTERVALS]
+
+# агрегирует новые строки по (ticker, интервал, bucket) и сливает с уже посчитанной свечой;
+# {source} - набор строк (ticker, price, timestamp), интервалы передаются параметром ${intervals}
+_ROLLUP_UPSERT = """
+    INSERT INTO price_rollups (
+        ticker, interval_seconds, bucket, open, high, low, close,
+        open_timestamp, close_timestamp, price_sum, count
+    )
+    SELECT src.ticker,
+           intervals.seconds,
+           src.timestamp / intervals.seconds * intervals.seconds,
+           (array_agg(src.price ORDER BY src.timestamp))[1],
+           max(src.price),
+           min(src.price),
+           (array_agg(src.price ORDER BY src.timestamp DESC))[1],
+           min(src.timestamp),
+           max(src.timestamp),
+           sum(src.price),
+           count(*)
+    FROM {source}
+    CROSS JOIN unnest(${intervals}::int[]) AS intervals(seconds)
+    GROUP BY src.ticker, intervals.seconds, src.timestamp / intervals.seconds * intervals.seconds
+    ON CONFLICT (ticker, interval_seconds, bucket) DO {conflict_action}
+"""
+
+_ROLLUP_MERGE = """UPDATE SET
+        open = CASE WHEN EXCLUDED.open_timestamp < price_rollups.open_timestamp
+                    THEN EXCLUDED.open ELSE price_rollups.open END,
+        open_timestamp = LEAST(price_rollups.open_timestamp, EXCLUDED.open_timestamp),
+        high = GREATEST(price_rollups.high, EXCLUDED.high),
+        low = LEAST(price_rollups.low, EXCLUDED.low),
+        close = CASE WHEN EXCLUDED.close_timestamp >= price_rollups.close_timestamp
+                     THEN EXCLUDED.close ELSE price_rollups.close END,
+        close_timestamp = GREATEST(price_rollups.close_timestamp, EXCLUDED.close_timestamp),
+        price_sum = price_rollups.price_sum + EXCLUDED.price_sum,
+        count = price_rollups.count + EXCLUDED.count"""
+
+_ROLLUP_REPLACE = """UPDATE SET
+        open = EXCLUDED.open, high = EXCLUDED.high, low = EXCLUDED.low, close = EXCLUDED.close,
+        open_timestamp = EXCLUDED.open_timestamp, close_timestamp = EXCLUDED.close_timestamp,
+        price_sum = EXCLUDED.price_sum, count = EXCLUDED.count"""
+
+
+# запросы горячего пути чтения с постоянным текстом: asyncpg готовит каждый текст один раз на соединение
+# и держит в statement cache, warm_up прогоняет их на всех соединениях пула до первого запроса API
+_LAST_PRICE = f"SELECT price, timestamp FROM prices WHERE ticker_id = {_TICKER_ID} ORDER BY timestamp DESC LIMIT 1"
+
+_LAST_PRICES = """
+    SELECT tickers.name AS ticker, latest.price, latest.timestamp
+    FROM tickers
+    CROSS JOIN LATERAL (
+        SELECT price, timestamp FROM prices
+        WHERE ticker_id = tickers.id
+        ORDER BY timestamp DESC
+        LIMIT 1
+    ) AS latest
+    WHERE tickers.name = ANY($1::varchar[])
+"""
+
+_PAGES_BY_TICKERS = """
+    SELECT tickers.name AS ticker, page.price, page.timestamp
+    FROM tickers
+    CROSS JOIN LATERAL (
+        SELECT price, timestamp FROM prices
+        WHERE ticker_id = tickers.id
+          AND timestamp > coalesce($2::bigint, -9223372036854775808)
+          AND timestamp < coalesce($3::bigint, 9223372036854775807)
+        ORDER BY timestamp DESC
+        LIMIT $4
+    ) AS page
+    WHERE tickers.name = ANY($1::varchar[])
+    ORDER BY tickers.name, page.timestamp DESC
+"""
+
+_PRICE_AT = f"SELECT price, timestamp FROM prices WHERE ticker_id = {_TICKER_ID} AND timestamp = $2 LIMIT 1"
+
+_PRICE_AT_OR_BEFORE = f"""
+    SELECT price, timestamp
+    FROM prices
+    WHERE ticker_id = {_TICKER_ID} AND timestamp <= $2
+    ORDER BY timestamp DESC
+    LIMIT 1
+"""
+
+_NEAREST_PRICE = f"""
+    SELECT price, timestamp FROM (
+        (SELECT price, timestamp FROM prices
+         WHERE ticker_id = {_TICKER_ID} AND timestamp <= $2 AND timestamp >= $2 - $3
+         ORDER BY timestamp DESC LIMIT 1)
+        UNION ALL
+        (SELECT price, timestamp FROM prices
+         WHERE ticker_id = {_TICKER_ID} AND timestamp > $2 AND timestamp <= $2 + $3
+         ORDER BY timestamp LIMIT 1)
+    ) AS candidates
+    ORDER BY abs(timestamp - $2), timestamp
+    LIMIT 1
+"""
+
+# цены тикера одной строкой: int8send/float8send склеены в bytea, на стороне Python это frombytes в array,
+# без объекта на каждое значение
+_SERIES_COLUMNS = """
+    coalesce(string_agg(int8send(timestamp), ''::bytea ORDER BY timestamp), ''::bytea) AS timestamps,
+    coalesce(string_agg(float8send(price), ''::bytea ORDER BY timestamp), ''::bytea) AS prices
+"""
+
+_SERIES_SINCE = f"SELECT {_SERIES_COLUMNS} FROM prices WHERE ticker_id = {_TICKER_ID} AND timestamp > $2"
+
+# запрос -> аргументы прогрева: пустой тикер ничего не находит, выполнение почти бесплатное
+READ_QUERIES = {
+    _LAST_PRICE: ("",),
+    _LAST_PRICES: ([],),
+    _PAGES_BY_TICKERS: ([], None, None, 1),
+    _PRICE_AT: ("", 0),
+    _PRICE_AT_OR_BEFORE: ("", 0),
+    _NEAREST_PRICE: ("", 0, 0),
+    _SERIES_SINCE: ("", 0),
+}
+
+
+@asynccontextmanager
+async def _advisory_lock(conn, name: str):
+    # сессионная блокировка: если соединение оборвется, сервер снимет ее сам
+    await conn.execute("SELECT pg_advisory_lock(hashtext($1))", name)
+    try:
+        yield
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock(hashtext($1))", name)
+
+
+@instrument_queries
 class PriceRepository:
     def __init__(self, db: Database):
         self.db = db
+        # id тикеров и уже существующие месячные секции; записи в словарь не удаляются, поэтому кэш не устаревает
+        self._ticker_ids: Dict[str, int] = {}
+        self._partitions: Set[int] = set()
 
     async def create_table_if_not_exists(self):
         pool = await self.db.get_pool()
-        async with pool.acquire() as conn:
+        async with pool.acquire() as conn, _advisory_lock(conn, SCHEMA_LOCK_NAME):
+            relkind = await conn.fetchval("SELECT relkind::text FROM pg_class WHERE oid = to_regclass('prices')")
+            if relkind == "r":
+                raise RuntimeError(
+                    "prices has the legacy unpartitioned layout, run python -m src.infrastructure.tasks.migrate_schema"
+                )
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS tickers (
+                    id SMALLINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+                    name VARCHAR(32) NOT NULL UNIQUE
+                )
+            """)
+            # компактная строка: 8-байтовые колонки впереди, smallint в конце - без выравнивающих дыр
             await conn.execute("""
                 CREATE TABLE IF NOT EXISTS prices (
-                    id SERIAL PRIMARY KEY,
-                    ticker VARCHAR(10) NOT NULL,
-                    price DECIMAL(20, 8) NOT NULL,
                     timestamp BIGINT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    price DOUBLE PRECISION NOT NULL,
+                    ticker_id SMALLINT NOT NULL REFERENCES tickers (id)
+                ) PARTITION BY RANGE (timestamp)
+            """)
+            # уникальность (тикер, timestamp) делает запись идемпотентной: повтор задачи после retry или
+            # наложение запусков beat не плодят дубли. Пока жив старый неуникальный индекс, в истории могут
+            # быть дубли - его заменяет python -m src.infrastructure.tasks.dedup_prices
+            if not await conn.fetchval(f"SELECT to_regclass('{LEGACY_TICKER_TIMESTAMP_INDEX}') IS NOT NULL"):
+                await conn.execute(f"""
+                    CREATE UNIQUE INDEX IF NOT EXISTS {TICKER_TIMESTAMP_INDEX}
+                    ON prices(ticker_id, timestamp DESC)
+                """)
+            # строки приходят по возрастанию времени, BRIN на диапазоны по всем тикерам занимает килобайты
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_prices_timestamp_brin
+                ON prices USING brin (timestamp)
+            """)
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS price_rollups (
+                    ticker VARCHAR(32) NOT NULL,
+                    interval_seconds INTEGER NOT NULL,
+                    bucket BIGINT NOT NULL,
+                    open DOUBLE PRECISION NOT NULL,
+                    high DOUBLE PRECISION NOT NULL,
+                    low DOUBLE PRECISION NOT NULL,
+                    close DOUBLE PRECISION NOT NULL,
+                    open_timestamp BIGINT NOT NULL,
+                    close_timestamp BIGINT NOT NULL,
+                    price_sum DOUBLE PRECISION NOT NULL,
+                    count BIGINT NOT NULL,
+                    PRIMARY KEY (ticker, interval_seconds, bucket)
                 )
             """)
+            # любая вставка (save, COPY, бэкфилл) рассылает последнюю цену по каждому тикеру - по ней
+            # API-процессы обновляют кэш последних цен
+            await conn.execute(f"""
+                CREATE OR REPLACE FUNCTION notify_price_updates() RETURNS trigger AS $$
+                BEGIN
+                    PERFORM pg_notify(
+                        '{PRICE_UPDATES_CHANNEL}',
+                        json_build_object('ticker', ticker, 'price', price, 'timestamp', timestamp)::text
+                    )
+                    FROM (
+                        SELECT DISTINCT ON (new_rows.ticker_id) tickers.name AS ticker, new_rows.price, new_rows.timestamp
+                        FROM new_rows
+                        JOIN tickers ON tickers.id = new_rows.ticker_id
+                        ORDER BY new_rows.ticker_id, new_rows.timestamp DESC
+                    ) AS latest;
+                    RETURN NULL;
+                END
+                $$ LANGUAGE plpgsql
+            """)
             await conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_ticker_timestamp 
-                ON prices(ticker, timestamp DESC)
+                CREATE OR REPLACE TRIGGER prices_notify_updates
+                AFTER INSERT ON prices
+                REFERENCING NEW TABLE AS new_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION notify_price_updates()
             """)
+            now = int(time.time())
+            await self._ensure_partitions(conn, months_between(now, now + PARTITION_MONTHS_AHEAD * 31 * 86400))
+
+    async def warm_up(self) -> None:
+        # при старте API: все min_size соединений пула держатся одновременно, и на каждом запросы чтения
+        # попадают в statement cache - первые запросы не платят ни за соединение, ни за разбор и планирование
+        pool = await self.db.get_pool()
+        async with AsyncExitStack() as stack:
+            connections = [await stack.enter_async_context(pool.acquire()) for _ in range(pool.get_min_size())]
+            for conn in connections:
+                for query, args in READ_QUERIES.items():
+                    await conn.fetch(query, *args)
+
+    async def _ensure_partitions(self, conn, months: Iterable[int]) -> None:
+        for month in sorted(set(months) - self._partitions):
+            await create_partition(conn, month)
+            self._partitions.add(month)
+
+    async def _get_ticker_ids(self, conn, tickers: Iterable[str]) -> Dict[str, int]:
+        missing = [ticker for ticker in set(tickers) if ticker not in self._ticker_ids]
+        # пустой ответ возможен, если тикер одновременно добавил другой процесс - тогда следующий запрос его увидит
+        while missing:
+            rows = await conn.fetch(_RESOLVE_TICKERS, missing)
+            self._ticker_ids.update((row["name"], row["id"]) for row in rows)
+            missing = [ticker for ticker in missing if ticker not in self._ticker_ids]
+        return self._ticker_ids
+
+    async def _prepare_write(self, conn, prices: Sequence[Price]) -> Dict[str, int]:
+        # DDL секций и вставка тикеров - до транзакции записи, после прогрева оба шага не ходят в БД
+        await self._ensure_partitions(conn, {month_start(price.timestamp) for price in prices})
+        return await self._get_ticker_ids(conn, (price.ticker for price in prices))
+
+    async def ensure_partitions(self, start: int, end: int) -> None:
+        # секции под [start, end] - перед бэкфиллом истории или заранее на следующие месяцы
+        pool = await self.db.get_pool()
+        async with pool.acquire() as conn:
+            await self._ensure_partitions(conn, months_between(start, end))
+
+    async def drop_partitions_before(self, cutoff: int) -> List[str]:
+        # удаление целыми секциями: без DELETE по строкам и без последующего VACUUM
+        pool = await self.db.get_pool()
+        async with pool.acquire() as conn:
+            dropped = []
+            for name, start, end in await list_partitions(conn):
+                if end <= cutoff:
+                    await drop_partition(conn, name)
+                    self._partitions.discard(start)
+                    dropped.append(name)
+            return dropped
 
     async def save(self, price: Price) -> None:
+        # строка и свечи в price_rollups обновляются одним запросом; повтор той же (ticker, timestamp)
+        # пропускается, и в свечи попадают только действительно вставленные строки
+        pool = await self.db.get_pool()
+        async with pool.acquire() as conn:
+            ticker_ids = await self._prepare_write(conn, [price])
+            await conn.execute(
+                """
+                WITH inserted AS (
+                    INSERT INTO prices (ticker_id, price, timestamp) VALUES ($1, $2, $3)
+                    ON CONFLICT DO NOTHING
+                    RETURNING price, timestamp
+                )
+                """ + _ROLLUP_UPSERT.format(
+                    source="(SELECT $5::varchar AS ticker, price, timestamp FROM inserted) AS src",
+                    intervals=4,
+                    conflict_action=_ROLLUP_MERGE
+                ),
+                ticker_ids[price.ticker], price.price, price.timestamp, ROLLUP_INTERVAL_SECONDS, price.ticker
+            )
+        INGEST_LAG.observe(price)
+
+    async def save_many(self, prices: Sequence[Price]) -> None:
+        # COPY не умеет ON CONFLICT, поэтому пачка передается тремя массивами в один INSERT ... ON CONFLICT
+        # DO NOTHING; вставка и свечи из его RETURNING - один запрос, без отдельной транзакции.
+        # На пачках по 500 строк это на уровне COPY во временную таблицу с последующим INSERT
+        if not prices:
+            return
+        pool = await self.db.get_pool()
+        async with pool.acquire() as conn:
+            ticker_ids = await self._prepare_write(conn, prices)
+            await conn.execute(
+                """
+                WITH inserted AS (
+                    INSERT INTO prices (timestamp, price, ticker_id)
+                    SELECT * FROM unnest($1::bigint[], $2::float8[], $3::smallint[])
+                    ON CONFLICT DO NOTHING
+                    RETURNING ticker_id, price, timestamp
+                )
+                """ + _ROLLUP_UPSERT.format(
+                    source="""(
+                        SELECT tickers.name AS ticker, inserted.price, inserted.timestamp
+                        FROM inserted JOIN tickers ON tickers.id = inserted.ticker_id
+                    ) AS src""",
+                    intervals=4,
+                    conflict_action=_ROLLUP_MERGE
+                ),
+                [price.timestamp for price in prices],
+                [price.price for price in prices],
+                [ticker_ids[price.ticker] for price in prices],
+                ROLLUP_INTERVAL_SECONDS
+            )
+        for price in prices:
+            INGEST_LAG.observe(price)
+
+    async def rebuild_rollups(self, ticker: str, start: int, end: int) -> None:
+        # пересчет свечей из сырых строк за [start, end); границы должны совпадать с границами дневных свечей
         pool = await self.db.get_pool()
         async with pool.acquire() as conn:
             await conn.execute(
-                "INSERT INTO prices (ticker, price, timestamp) VALUES ($1, $2, $3)",
-                price.ticker, price.price, price.timestamp
+                _ROLLUP_UPSERT.format(
+                    source=f"""(
+                        SELECT $1::varchar AS ticker, price, timestamp FROM prices
+                        WHERE ticker_id = {_TICKER_ID} AND timestamp >= $2 AND timestamp < $3
+                    ) AS src""",
+                    intervals=4,
+                    conflict_action=_ROLLUP_REPLACE
+                ),
+                ticker, start, end, ROLLUP_INTERVAL_SECONDS
+            )
+
+    async def get_history_bounds(self, ticker: str) -> Optional[Tuple[int, int]]:
+        pool = await self.db.get_pool()
+        async with pool.acquire() as conn:
+            row = await conn.fetchrow(
+                f"SELECT min(timestamp) AS first, max(timestamp) AS last FROM prices WHERE ticker_id = {_TICKER_ID}",
+                ticker
+            )
+            if row and row["first"] is not None:
+                return row["first"], row["last"]
+            return None
+
+    async def get_stored_tickers(self) -> List[str]:
+        # словарь tickers маленький, DISTINCT по prices не нужен
+        pool = await self.db.get_pool()
+        async with pool.acquire() as conn:
+            rows = await conn.fetch("SELECT name FROM tickers ORDER BY name")
+            return [row["name"] for row in rows]
+
+    async def find_gaps(self, tickers: Sequence[str], start: int, end: int, max_gap: int) -> List[PriceGap]:
+        # один проход оконной функцией по [start, end) для всех тикеров: расстояние до следующей точки
+        # больше max_gap - это дыра; у последней точки "следующая" - конец окна, так видна и текущая остановка.
+        # К точкам окна добавляется последняя точка тикера до start (LATERAL по индексу тикер + timestamp), иначе
+        # дыра, начавшаяся раньше окна, не видна. Ее отрезок обрезается по start: start - виртуальный предшественник.
+        # Тикер без единой точки ни в окне, ни до него дырой не считается - неизвестно, должен ли он там быть
+        pool = await self.db.get_pool()
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT tickers.name AS ticker, gaps.gap_start, gaps.gap_end
+                FROM (
+                    SELECT ticker_id,
+                           greatest(timestamp, $2) AS gap_start,
+                           coalesce(lead(timestamp) OVER (PARTITION BY ticker_id ORDER BY timestamp), $3) AS gap_end
+                    FROM (
+                        SELECT ticker_id, timestamp
+                        FROM prices
+                        WHERE ticker_id IN (SELECT id FROM tickers WHERE name = ANY($1::varchar[]))
+                          AND timestamp >= $2 AND timestamp < $3
+                        UNION ALL
+                        SELECT tickers.id, before.timestamp
+                        FROM tickers
+                        CROSS JOIN LATERAL (
+                            SELECT timestamp FROM prices
+                            WHERE ticker_id = tickers.id AND timestamp < $2
+                            ORDER BY timestamp DESC
+                            LIMIT 1
+                        ) AS before
+                        WHERE tickers.name = ANY($1::varchar[])
+                    ) AS points
+                ) AS gaps
+                JOIN tickers ON tickers.id = gaps.ticker_id
+                WHERE gaps.gap_end - gaps.gap_start > $4
+                ORDER BY tickers.name, gaps.gap_start
+                """,
+                list(tickers), start, end, max_gap
             )
+            return [PriceGap(ticker=row["ticker"], start=row["gap_start"], end=row["gap_end"]) for row in rows]
 
     async def get_all_by_ticker(self, ticker: str) -> List[Price]:
         pool = await self.db.get_pool()
         async with pool.acquire() as conn:
             rows = await conn.fetch(
-                "SELECT ticker, price, timestamp FROM prices WHERE ticker = $1 ORDER BY timestamp DESC",
+                f"SELECT price, timestamp FROM prices WHERE ticker_id = {_TICKER_ID} ORDER BY timestamp DESC",
                 ticker
             )
             price_list = []
             for row in rows:
                 price_list.append(Price(
-                    ticker=row["ticker"],
+                    ticker=ticker,
                     price=float(row["price"]),
                     timestamp=row["timestamp"]
                 ))
             return price_list
 
-    async def get_last_by_ticker(self, ticker: str) -> Optional[Price]:
+    @staticmethod
+    def _range_conditions(ticker: str, after: Optional[int], before: Optional[int]) -> Tuple[str, list]:
+        # keyset: граница по timestamp вместо OFFSET, чтобы каждая страница шла по индексу
+        conditions = [f"ticker_id = {_TICKER_ID}"]
+        args: list = [ticker]
+        if after is not None:
+            args.append(after)
+            conditions.append(f"timestamp > ${len(args)}")
+        if before is not None:
+            args.append(before)
+            conditions.append(f"timestamp < ${len(args)}")
+        return " AND ".join(conditions), args
+
+    @classmethod
+    def _range_query(cls, ticker: str, after: Optional[int], before: Optional[int]) -> Tuple[str, list]:
+        where, args = cls._range_conditions(ticker, after, before)
+        return f"SELECT price, timestamp FROM prices WHERE {where} ORDER BY timestamp DESC", args
+
+    async def get_page_json(
+            self,
+            ticker: str,
+            limit: Optional[int] = None,
+            after: Optional[int] = None,
+            before: Optional[int] = None
+    ) -> Tuple[bytes, int, Optional[int]]:
+        # JSON-массив для /all собирает PostgreSQL одной строкой - без Record, Price и PriceResponse на каждую цену.
+        # Текст тот же, что у json.dumps(..., separators=(",", ":")) в FastAPI: price::text при extra_float_digits
+        # по умолчанию (PostgreSQL 12+) - кратчайшее точное представление, как repr(float); целым значениям
+        # дописывается ".0", как у Python (от 1e15 PostgreSQL уже пишет экспоненту - это тоже валидный JSON).
+        # Возвращает (тело, число строк, timestamp последней строки) - последние два нужны для курсора страниц
+        query, args = self._range_query(ticker, after, before)
+        if limit is not None:
+            args.append(limit)
+            query = f"{query} LIMIT ${len(args)}"
+        args.append('{"ticker":' + json.dumps(ticker, ensure_ascii=False) + ',"price":')
         pool = await self.db.get_pool()
         async with pool.acquire() as conn:
             row = await conn.fetchrow(
-                "SELECT ticker, price, timestamp FROM prices WHERE ticker = $1 ORDER BY timestamp DESC LIMIT 1",
-                ticker
+                f"""
+                SELECT count(*) AS count,
+                       min(timestamp) AS last_timestamp,
+                       '[' || coalesce(
+                           string_agg(
+                               ${len(args)}::text
+                               || CASE WHEN price = trunc(price) AND abs(price) < 1e15
+                                       THEN price::text || '.0' ELSE price::text END
+                               || ',"timestamp":' || timestamp || '}}',
+                               ','
+                               ORDER BY timestamp DESC
+                           ),
+                           ''
+                       ) || ']' AS body
+                FROM ({query}) AS page
+                """,
+                *args
+            )
+            return row["body"].encode(), row["count"], row["last_timestamp"]
+
+    async def get_page_version(
+            self,
+            ticker: str,
+            limit: Optional[int] = None,
+            after: Optional[int] = None,
+            before: Optional[int] = None
+    ) -> Tuple[int, Optional[int], Optional[int]]:
+        # (число строк, первый и последний timestamp) той же страницы, что у get_page_json, только по индексу, без
+        # цен: строки только добавляются, поэтому версия меняется вместе с телом ответа и годится для ETag. Одних
+        # числа строк и максимума мало: у полной страницы с limit дозагруженная внутрь цена вытесняет самую старую,
+        # число строк и максимум те же, а сдвигается минимум
+        where, args = self._range_conditions(ticker, after, before)
+        query = f"SELECT timestamp FROM prices WHERE {where} ORDER BY timestamp DESC"
+        if limit is not None:
+            args.append(limit)
+            query = f"{query} LIMIT ${len(args)}"
+        pool = await self.db.get_pool()
+        async with pool.acquire() as conn:
+            row = await conn.fetchrow(
+                f"SELECT count(*) AS count, min(timestamp) AS first, max(timestamp) AS last FROM ({query}) AS page",
+                *args
             )
+            return row["count"], row["first"], row["last"]
+
+    async def iter_by_ticker(
+            self,
+            ticker: str,
+            after: Optional[int] = None,
+            before: Optional[int] = None,
+            chunk_size: int = 1000
+    ) -> AsyncIterator[List[Price]]:
+        # серверный курсор: в памяти одновременно не больше chunk_size строк
+        query, args = self._range_query(ticker, after, before)
+        pool = await self.db.get_pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                cursor = await conn.cursor(query, *args)
+                while True:
+                    rows = await cursor.fetch(chunk_size)
+                    if not rows:
+                        break
+                    yield [
+                        Price(ticker=ticker, price=float(row["price"]), timestamp=row["timestamp"])
+                        for row in rows
+                    ]
+
+    async def iter_csv(
+            self,
+            ticker: str,
+            after: Optional[int] = None,
+            before: Optional[int] = None,
+            timeout: Optional[float] = None
+    ) -> AsyncIterator[bytes]:
+        # COPY ... TO STDOUT: CSV (ticker,price,timestamp по возрастанию времени, без заголовка) форматирует
+        # PostgreSQL, строки не проходят через Record и Price. Куски идут через короткую очередь: пока клиент
+        # не забрал уже прочитанное, COPY стоит. Границы кусков не совпадают с границами строк
+        where, args = self._range_conditions(ticker, after, before)
+        query = f"SELECT $1::text AS ticker, price, timestamp FROM prices WHERE {where} ORDER BY timestamp"
+        chunks: asyncio.Queue = asyncio.Queue(maxsize=16)
+        pool = await self.db.get_pool()
+        async with pool.acquire() as conn:
+            async def put(data) -> None:
+                # asyncpg отдает bytearray, а StreamingResponse кодирует все, что не bytes, как строку
+                await chunks.put(bytes(data))
+
+            async def copy():
+                try:
+                    await conn.copy_from_query(query, *args, output=put, format="csv", timeout=timeout)
+                finally:
+                    await chunks.put(None)
+
+            task = asyncio.ensure_future(copy())
+            try:
+                while True:
+                    chunk = await chunks.get()
+                    if chunk is None:
+                        break
+                    yield chunk
+                await task
+            finally:
+                if not task.done():
+                    # клиент ушел посреди выгрузки: COPY прерывается, соединение сбрасывает пул
+                    task.cancel()
+                    with suppress(asyncio.CancelledError):
+                        await task
+
+    async def get_last_by_ticker(self, ticker: str) -> Optional[Price]:
+        pool = await self.db.get_pool()
+        async with pool.acquire() as conn:
+            row = await conn.fetchrow(_LAST_PRICE, ticker)
             if row:
                 return Price(
-                    ticker=row["ticker"],
+                    ticker=ticker,
                     price=float(row["price"]),
                     timestamp=row["timestamp"]
                 )
             return None
 
+    async def get_last_by_tickers(self, tickers: Sequence[str]) -> Dict[str, Price]:
+        # LATERAL + LIMIT 1 - по одному спуску по индексу на тикер, в отличие от DISTINCT ON,
+        # который перебирает всю историю каждого тикера
+        pool = await self.db.get_pool()
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(_LAST_PRICES, list(tickers))
+            return {
+                row["ticker"]: Price(ticker=row["ticker"], price=float(row["price"]), timestamp=row["timestamp"])
+                for row in rows
+            }
+
+    async def get_pages_by_tickers(
+            self,
+            tickers: Sequence[str],
+            limit: int,
+            after: Optional[int] = None,
+            before: Optional[int] = None
+    ) -> Dict[str, List[Price]]:
+        # та же страница, что get_page_json, для нескольких тикеров одним запросом
+        pool = await self.db.get_pool()
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(_PAGES_BY_TICKERS, list(tickers), after, before, limit)
+            pages: Dict[str, List[Price]] = {ticker: [] for ticker in tickers}
+            for row in rows:
+                pages[row["ticker"]].append(
+                    Price(ticker=row["ticker"], price=float(row["price"]), timestamp=row["timestamp"])
+                )
+            return pages
+
     async def get_by_ticker_and_date(self, ticker: str, timestamp: int) -> Optional[Price]:
         pool = await self.db.get_pool()
         async with pool.acquire() as conn:
-            row = await conn.fetchrow(
-                """
-                SELECT ticker, price, timestamp 
-                FROM prices 
-                WHERE ticker = $1 AND timestamp = $2
-                LIMIT 1
-                """,
-                ticker, timestamp
-            )
+            row = await conn.fetchrow(_PRICE_AT, ticker, timestamp)
             if row:
                 return Price(
-                    ticker=row["ticker"],
+                    ticker=ticker,
                     price=float(row["price"]),
                     timestamp=row["timestamp"]
                 )
             return None
+
+    async def get_at_or_before(self, ticker: str, timestamp: int) -> Optional[Price]:
+        pool = await self.db.get_pool()
+        async with pool.acquire() as conn:
+            row = await conn.fetchrow(_PRICE_AT_OR_BEFORE, ticker, timestamp)
+            if row:
+                return Price(ticker=ticker, price=float(row["price"]), timestamp=row["timestamp"])
+            return None
+
+    async def get_nearest(self, ticker: str, timestamp: int, tolerance: int) -> Optional[Price]:
+        # по одной ближайшей строке с каждой стороны, обе берутся из индекса; при равном расстоянии - более ранняя
+        pool = await self.db.get_pool()
+        async with pool.acquire() as conn:
+            row = await conn.fetchrow(_NEAREST_PRICE, ticker, timestamp, tolerance)
+            if row:
+                return Price(ticker=ticker, price=float(row["price"]), timestamp=row["timestamp"])
+            return None
+
+    async def get_series_since(self, ticker: str, after: int) -> Tuple[array, array]:
+        # два массива одной строкой, по возрастанию timestamp - без объекта на каждую цену
+        pool = await self.db.get_pool()
+        async with pool.acquire() as conn:
+            row = await conn.fetchrow(_SERIES_SINCE, ticker, after)
+            series = PriceSeries.from_network_bytes(ticker, row["timestamps"], row["prices"])
+            return series.timestamps, series.prices
+
+    async def get_price_series(
+            self,
+            ticker: str,
+            after: Optional[int] = None,
+            before: Optional[int] = None
+    ) -> PriceSeries:
+        # то же, что get_all_by_ticker / страница по after-before, но по возрастанию времени и в PriceSeries
+        where, args = self._range_conditions(ticker, after, before)
+        pool = await self.db.get_pool()
+        async with pool.acquire() as conn:
+            row = await conn.fetchrow(f"SELECT {_SERIES_COLUMNS} FROM prices WHERE {where}", *args)
+            return PriceSeries.from_network_bytes(ticker, row["timestamps"], row["prices"])
+
+    async def get_price_series_by_tickers(
+            self,
+            tickers: Sequence[str],
+            after: Optional[int] = None,
+            before: Optional[int] = None
+    ) -> Dict[str, PriceSeries]:
+        # серии нескольких тикеров одним запросом; неизвестных тикеров в ответе нет, у известных без точек
+        # в диапазоне - пустая серия
+        pool = await self.db.get_pool()
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(
+                f"""
+                SELECT tickers.name AS ticker, series.timestamps, series.prices
+                FROM tickers
+                CROSS JOIN LATERAL (
+                    SELECT {_SERIES_COLUMNS}
+                    FROM prices
+                    WHERE ticker_id = tickers.id
+                      AND timestamp > coalesce($2::bigint, -9223372036854775808)
+                      AND timestamp < coalesce($3::bigint, 9223372036854775807)
+                ) AS series
+                WHERE tickers.name = ANY($1::varchar[])
+                """,
+                list(tickers), after, before
+            )
+            return {
+                row["ticker"]: PriceSeries.from_network_bytes(row["ticker"], row["timestamps"], row["prices"])
+                for row in rows
+            }
+
+    async def get_candles(self, ticker: str, start: int, end: int, interval_seconds: int) -> List[Candle]:
+        # timestamp хранится в секундах, поэтому timestamp / N * N - это date_bin от начала эпохи;
+        # агрегирует сам PostgreSQL, по индексу (ticker_id, timestamp)
+        pool = await self.db.get_pool()
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(
+                f"""
+                SELECT timestamp / $4 * $4 AS bucket,
+                       (array_agg(price ORDER BY timestamp))[1] AS open,
+                       max(price) AS high,
+                       min(price) AS low,
+                       (array_agg(price ORDER BY timestamp DESC))[1] AS close,
+                       avg(price) AS mean,
+                       count(*) AS count
+                FROM prices
+                WHERE ticker_id = {_TICKER_ID} AND timestamp >= $2 AND timestamp < $3
+                GROUP BY bucket
+                ORDER BY bucket
+                """,
+                ticker, start, end, interval_seconds
+            )
+            return [
+                Candle(
+                    ticker=ticker,
+                    bucket=row["bucket"],
+                    open=float(row["open"]),
+                    high=float(row["high"]),
+                    low=float(row["low"]),
+                    close=float(row["close"]),
+                    mean=float(row["mean"]),
+                    count=row["count"]
+                )
+                for row in rows
+            ]
+
+    async def get_rollup_candles(self, ticker: str, start: int, end: int, interval_seconds: int) -> List[Candle]:
+        pool = await self.db.get_pool()
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT bucket, open, high, low, close, price_sum / count AS mean, count
+                FROM price_rollups
+                WHERE ticker = $1 AND interval_seconds = $4 AND bucket >= $2 AND bucket < $3
+                ORDER BY bucket
+                """,
+                ticker, start, end, interval_seconds
+            )
+            return [
+                Candle(
+                    ticker=ticker,
+                    bucket=row["bucket"],
+                    open=float(row["open"]),
+                    high=float(row["high"]),
+                    low=float(row["low"]),
+                    close=float(row["close"]),
+                    mean=float(row["mean"]),
+                    count=row["count"]
+                )
+                for row in rows
+            ]
@@ -0,0 +1,122 @@
+import asyncio
+from typing import AsyncIterator, List
+
+EXPORT_FORMATS = ("csv", "arrow", "parquet")
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+FILE_EXTENSIONS = {"csv": "csv", "arrow": "arrows", "parquet": "parquet"}
+COLUMNS = ["ticker", "price", "timestamp"]
+CSV_HEADER = (",".join(COLUMNS) + "\n").encode()
+DEFAULT_BATCH_BYTES = 4 * 1024 * 1024
+
+
+class _ChunkSink:
+    # file-like для писателей pyarrow: записанное копится и забирается после каждого батча
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def _csv_blocks(chunks: AsyncIterator[bytes], batch_bytes: int) -> AsyncIterator[bytes]:
+    # куски COPY склеиваются в блоки не меньше batch_bytes, обрезанные по концу строки
+    pending: List[bytes] = []
+    size = 0
+    async for chunk in chunks:
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= batch_bytes:
+            data = b"".join(pending)
+            cut = data.rfind(b"\n") + 1
+            if cut:
+                yield data[:cut]
+            pending = [data[cut:]]
+            size = len(pending[0])
+    if size:
+        yield b"".join(pending)
+
+
+class _ArrowEncoder:
+    # CSV-блок -> RecordBatch парсит pyarrow.csv целиком в C, объектов на строку нет;
+    # ticker - словарь из одного значения (в pandas это category)
+    def __init__(self, fmt: str):
+        # pyarrow нужен только выгрузке и импортируется при первом ее вызове, а не при старте API
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+
+        self._pa = pa
+        self._read_options = pa_csv.ReadOptions(column_names=COLUMNS)
+        self.schema = pa.schema([
+            ("ticker", pa.dictionary(pa.int32(), pa.string())),
+            ("price", pa.float64()),
+            ("timestamp", pa.int64()),
+        ])
+        self._convert_options = pa_csv.ConvertOptions(column_types=self.schema)
+        self._read_csv = pa_csv.read_csv
+        self._sink = _ChunkSink()
+        self._parquet = fmt == "parquet"
+        if self._parquet:
+            import pyarrow.parquet as pq
+
+            self._writer = pq.ParquetWriter(pa.PythonFile(self._sink, mode="w"), self.schema)
+        else:
+            self._writer = pa.ipc.new_stream(pa.PythonFile(self._sink, mode="w"), self.schema)
+
+    def encode(self, block: bytes) -> bytes:
+        table = self._read_csv(
+            self._pa.py_buffer(block), read_options=self._read_options, convert_options=self._convert_options
+        )
+        if self._parquet:
+            # одна группа строк Parquet на блок
+            self._writer.write_table(table, row_group_size=max(table.num_rows, 1))
+        else:
+            self._writer.write_table(table)
+        return self._sink.take()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._sink.take()
+
+
+async def encode_prices(
+        chunks: AsyncIterator[bytes],
+        fmt: str,
+        batch_bytes: int = DEFAULT_BATCH_BYTES
+) -> AsyncIterator[bytes]:
+    # chunks - CSV из PriceRepository.iter_csv; на выходе байты файла выбранного формата по мере готовности
+    if fmt == "csv":
+        yield CSV_HEADER
+        async for chunk in chunks:
+            yield chunk
+        return
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    encoder = _ArrowEncoder(fmt)
+    async for block in _csv_blocks(chunks, batch_bytes):
+        # pyarrow отпускает GIL, разбор блока в потоке не держит event loop
+        data = await asyncio.to_thread(encoder.encode, block)
+        if data:
+            yield data
+    yield encoder.close()
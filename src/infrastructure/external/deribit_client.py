@@ -1,61 +1,276 @@
 import asyncio
+import logging
+import random
 import time
-from typing import Optional
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterable, List, Optional
 
 import aiohttp
 
-from src.domain.models import Price
+from src.domain.models import Price, index_name_to_ticker
+from src.infrastructure.external.resilience import CircuitBreaker, TokenBucket
+from src.infrastructure.metrics import UPSTREAM_LATENCY
+
+logger = logging.getLogger(__name__)
+
+# кредиты Deribit для публичных запросов вне matching engine: пул 50 000, пополнение 10 000/с, запрос - 500
+DERIBIT_CREDITS_CAPACITY = 50_000
+DERIBIT_CREDITS_PER_SECOND = 10_000
+DERIBIT_REQUEST_COST = 500
+# диапазоны public/get_index_chart_data, отсчитываются от текущего момента; чем короче, тем мельче шаг точек
+CHART_RANGES = [("1h", 3600), ("1d", 86400), ("2d", 2 * 86400), ("1m", 30 * 86400), ("1y", 365 * 86400), ("all", None)]
+# JSON-RPC код Deribit для превышения лимита
+TOO_MANY_REQUESTS_CODE = 10028
+
+
+class _RetryableError(Exception):
+    pass
+
+
+class _RateLimitedError(_RetryableError):
+    def __init__(self, retry_after: Optional[float]):
+        super().__init__("rate limited")
+        self.retry_after = retry_after
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    # Retry-After - секунды или HTTP-дата (RFC 9110); непонятное значение - None, тогда пауза из _backoff
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
 
 
 class DeribitClient:
-    def __init__(self, base_url: str = "https://www.deribit.com/api/v2"):
+    def __init__(
+            self,
+            base_url: str = "https://www.deribit.com/api/v2",
+            max_concurrency: int = 20,
+            request_timeout: float = 5.0,
+            keepalive_timeout: float = 15.0,
+            connect_timeout: float = 2.0,
+            read_timeout: float = 5.0,
+            max_retries: int = 3,
+            retry_base_delay: float = 0.2,
+            retry_max_delay: float = 2.0,
+            cycle_deadline: float = 20.0,
+            rate_limiter: Optional[TokenBucket] = None,
+            circuit_breaker: Optional[CircuitBreaker] = None
+    ):
         self.base_url = base_url
         self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._request_timeout = request_timeout
+        self._connect_timeout = connect_timeout
+        self._read_timeout = read_timeout
+        self._keepalive_timeout = keepalive_timeout
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.cycle_deadline = cycle_deadline
+        self.rate_limiter = rate_limiter or TokenBucket(DERIBIT_CREDITS_CAPACITY, DERIBIT_CREDITS_PER_SECOND)
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        # счетчики исходов: attempts - все HTTP-попытки, остальные - по одной на исход
+        self.attempts = 0
+        self.successes = 0
+        self.failures = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.server_errors = 0
+        self.rate_limited = 0
+        self.circuit_rejected = 0
+        self.deadline_exceeded = 0
+
+    def stats(self) -> dict:
+        return {
+            "attempts": self.attempts,
+            "successes": self.successes,
+            "failures": self.failures,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "server_errors": self.server_errors,
+            "rate_limited": self.rate_limited,
+            "rate_limiter_waits": self.rate_limiter.waits,
+            "circuit_rejected": self.circuit_rejected,
+            "circuit_opened": self.circuit_breaker.opened,
+            "circuit_state": self.circuit_breaker.state,
+            "deadline_exceeded": self.deadline_exceeded,
+        }
 
     async def _get_session(self) -> aiohttp.ClientSession:
         if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession()
+            connector = aiohttp.TCPConnector(keepalive_timeout=self._keepalive_timeout)
+            self._session = aiohttp.ClientSession(connector=connector)
         return self._session
 
     async def close(self):
         if self._session and not self._session.closed:
             await self._session.close()
 
-    async def get_index_price(self, index_name: str) -> Optional[float]:
-        session = await self._get_session()
-        url = f"{self.base_url}/public/get_index_price"
-        params = {"index_name": index_name}
+    def _backoff(self, attempt: int) -> float:
+        # full jitter: одновременно упавшие запросы не повторяются синхронной волной
+        return random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt))
 
-        try:
-            async with session.get(url, params=params) as response:
+    async def _request_once(
+            self,
+            session: aiohttp.ClientSession,
+            method: str,
+            params: dict,
+            remaining: float
+    ) -> Optional[Any]:
+        url = f"{self.base_url}/public/{method}"
+        timeout = aiohttp.ClientTimeout(
+            total=min(self._request_timeout, remaining),
+            connect=self._connect_timeout,
+            sock_read=self._read_timeout
+        )
+        async with self._semaphore:
+            async with session.get(url, params=params, timeout=timeout) as response:
+                if response.status == 429:
+                    retry_after = response.headers.get("Retry-After") if response.headers else None
+                    raise _RateLimitedError(_parse_retry_after(retry_after))
+                if response.status >= 500:
+                    self.server_errors += 1
+                    raise _RetryableError(f"HTTP {response.status}")
                 if response.status == 200:
-                    api_response = await response.json()
-                    index_data = api_response.get("result")
-                    if index_data:
-                        index_price = index_data.get("index_price")
-                        return index_price
+                    # обрезанное или не-JSON тело - сбой upstream, как 5xx
+                    try:
+                        api_response = await response.json()
+                    except (aiohttp.ContentTypeError, ValueError) as error:
+                        raise _RetryableError(f"malformed response: {error}")
+                    if not isinstance(api_response, dict):
+                        raise _RetryableError("malformed response: not a JSON object")
+                    return api_response.get("result")
+                # прочие ответы (например, неизвестный индекс) повторять бессмысленно
+                try:
+                    api_response = await response.json(content_type=None)
+                except ValueError:
+                    api_response = None
+                error = (api_response or {}).get("error") or {}
+                if error.get("code") == TOO_MANY_REQUESTS_CODE:
+                    raise _RateLimitedError(None)
+                logger.warning("Deribit returned HTTP %s for %s %s: %s", response.status, method, params, error)
                 return None
-        except (aiohttp.ClientError, asyncio.TimeoutError):
-            return None
 
-    async def get_btc_price(self) -> Optional[Price]:
-        index_price = await self.get_index_price("btc_usd")
-        if not index_price:
-            return None
+    async def _call(self, method: str, params: dict, deadline: Optional[float] = None) -> Optional[Any]:
+        # повторы с экспоненциальной задержкой укладываются в deadline (time.monotonic) цикла опроса;
+        # None - результата нет, причина видна в счетчиках и логе
+        session = await self._get_session()
+        if deadline is None:
+            deadline = time.monotonic() + self.cycle_deadline
+        attempt = 0
+        while True:
+            # сначала цепь: пока она открыта, запросы не тратят кредиты и не ждут их до deadline
+            if not self.circuit_breaker.allow():
+                self.circuit_rejected += 1
+                self.failures += 1
+                return None
+            acquired = False
+            try:
+                acquired = await self.rate_limiter.acquire(DERIBIT_REQUEST_COST, deadline)
+            finally:
+                if not acquired:
+                    # попытки не будет (нет кредитов или отмена) - пробный слот достается следующему запросу
+                    self.circuit_breaker.release()
+            if not acquired:
+                self.deadline_exceeded += 1
+                self.failures += 1
+                logger.warning("Deribit credits won't refill before the deadline, skipping %s %s", method, params)
+                return None
+            remaining = deadline - time.monotonic()
+            self.attempts += 1
+            started = time.perf_counter()
+            # исход попытки записан в circuit breaker; иначе (отмена, непредвиденная ошибка) пробный слот
+            # освобождается в finally, чтобы полуоткрытая цепь не отклоняла запросы до перезапуска процесса
+            recorded = False
+            try:
+                result = await self._request_once(session, method, params, remaining)
+            except _RateLimitedError as error:
+                UPSTREAM_LATENCY.labels(method, "rate_limited").observe(time.perf_counter() - started)
+                # 429 - upstream жив, это не повод открывать цепь
+                self.rate_limited += 1
+                self.rate_limiter.drain()
+                self.circuit_breaker.record_success()
+                recorded = True
+                delay = max(error.retry_after or 0.0, self._backoff(attempt))
+                reason = "rate limited"
+            except (_RetryableError, aiohttp.ClientError, asyncio.TimeoutError) as error:
+                timed_out = isinstance(error, asyncio.TimeoutError)
+                UPSTREAM_LATENCY.labels(method, "timeout" if timed_out else "error").observe(
+                    time.perf_counter() - started
+                )
+                if timed_out:
+                    self.timeouts += 1
+                self.circuit_breaker.record_failure()
+                recorded = True
+                delay = self._backoff(attempt)
+                reason = str(error) or type(error).__name__
+            else:
+                UPSTREAM_LATENCY.labels(method, "ok").observe(time.perf_counter() - started)
+                self.circuit_breaker.record_success()
+                recorded = True
+                self.successes += 1
+                return result
+            finally:
+                if not recorded:
+                    self.circuit_breaker.release()
 
-        return Price(
-            ticker="BTC_USD",
-            price=index_price,
-            timestamp=int(time.time())
-        )
+            attempt += 1
+            if attempt > self.max_retries or time.monotonic() + delay >= deadline:
+                if attempt <= self.max_retries:
+                    self.deadline_exceeded += 1
+                self.failures += 1
+                logger.warning("Giving up on %s %s after %d attempts: %s", method, params, attempt, reason)
+                return None
+            self.retries += 1
+            await asyncio.sleep(delay)
 
-    async def get_eth_price(self) -> Optional[Price]:
-        index_price = await self.get_index_price("eth_usd")
+    async def get_index_price(self, index_name: str, deadline: Optional[float] = None) -> Optional[float]:
+        index_data = await self._call("get_index_price", {"index_name": index_name}, deadline)
+        if index_data:
+            return index_data.get("index_price")
+        return None
+
+    async def get_index_history(
+            self,
+            index_name: str,
+            start: int,
+            end: int,
+            deadline: Optional[float] = None
+    ) -> List[Price]:
+        # get_index_chart_data принимает не границы, а диапазон от текущего момента; берем самый короткий,
+        # покрывающий start - у него самое мелкое разрешение - и оставляем точки строго внутри (start, end)
+        span = int(time.time()) - start
+        chart_range = next((name for name, seconds in CHART_RANGES if seconds is None or seconds >= span))
+        points = await self._call("get_index_chart_data", {"index_name": index_name, "range": chart_range}, deadline)
+        ticker = index_name_to_ticker(index_name)
+        history: Dict[int, Price] = {}
+        for timestamp_ms, price in points or []:
+            timestamp = timestamp_ms // 1000
+            if start < timestamp < end and timestamp not in history:
+                history[timestamp] = Price(ticker=ticker, price=price, timestamp=timestamp)
+        return list(history.values())
+
+    async def get_price(self, index_name: str, deadline: Optional[float] = None) -> Optional[Price]:
+        index_price = await self.get_index_price(index_name, deadline)
         if not index_price:
             return None
 
         return Price(
-            ticker="ETH_USD",
+            ticker=index_name_to_ticker(index_name),
             price=index_price,
             timestamp=int(time.time())
         )
+
+    async def get_index_prices(self, index_names: Iterable[str]) -> List[Price]:
+        # запросы идут параллельно, одновременно в полете не больше max_concurrency;
+        # общий deadline не дает медленному upstream растянуть цикл опроса
+        deadline = time.monotonic() + self.cycle_deadline
+        prices = await asyncio.gather(*(self.get_price(index_name, deadline) for index_name in index_names))
+        return [price for price in prices if price is not None]
@@ -0,0 +1,110 @@
+import asyncio
+import itertools
+import json
+import logging
+from typing import AsyncIterator, Iterable, List, Optional
+
+import aiohttp
+
+from src.domain.models import Price, index_name_to_ticker
+
+logger = logging.getLogger(__name__)
+
+PRICE_INDEX_CHANNEL = "deribit_price_index.{index_name}"
+
+
+class DeribitWebSocketClient:
+    def __init__(
+            self,
+            ws_url: str = "wss://www.deribit.com/ws/api/v2",
+            heartbeat_interval: int = 10,
+            reconnect_delay: float = 1.0,
+            max_reconnect_delay: float = 30.0
+    ):
+        self.ws_url = ws_url
+        self.heartbeat_interval = heartbeat_interval
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._request_ids = itertools.count(1)
+        self.connections = 0
+        self.malformed_frames = 0
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    async def _send(self, ws: aiohttp.ClientWebSocketResponse, method: str, params: dict) -> None:
+        await ws.send_json({
+            "jsonrpc": "2.0",
+            "id": next(self._request_ids),
+            "method": method,
+            "params": params
+        })
+
+    async def _subscribe(self, ws: aiohttp.ClientWebSocketResponse, index_names: List[str]) -> None:
+        await self._send(ws, "public/set_heartbeat", {"interval": self.heartbeat_interval})
+        channels = [PRICE_INDEX_CHANNEL.format(index_name=name) for name in index_names]
+        await self._send(ws, "public/subscribe", {"channels": channels})
+
+    async def _handle_message(self, ws: aiohttp.ClientWebSocketResponse, message: dict) -> Optional[Price]:
+        method = message.get("method")
+        if method == "heartbeat":
+            if message.get("params", {}).get("type") == "test_request":
+                await self._send(ws, "public/test", {})
+            return None
+        if method != "subscription":
+            if "error" in message:
+                logger.warning("Deribit WebSocket error: %s", message["error"])
+            return None
+
+        tick = message.get("params", {}).get("data") or {}
+        index_name = tick.get("index_name")
+        index_price = tick.get("price")
+        if not index_name or not index_price:
+            return None
+        return Price(
+            ticker=index_name_to_ticker(index_name),
+            price=index_price,
+            timestamp=int(tick["timestamp"]) // 1000
+        )
+
+    async def _read_prices(self, ws: aiohttp.ClientWebSocketResponse) -> AsyncIterator[Price]:
+        # если сервер молчит дольше двух интервалов heartbeat - соединение считаем мертвым
+        receive_timeout = self.heartbeat_interval * 2
+        while True:
+            ws_message = await ws.receive(timeout=receive_timeout)
+            if ws_message.type != aiohttp.WSMsgType.TEXT:
+                return
+            try:
+                price = await self._handle_message(ws, json.loads(ws_message.data))
+            except (ValueError, TypeError, KeyError, AttributeError) as error:
+                # битый кадр (не JSON, не объект, тик без полей) пропускается - из-за него поток не рвется
+                self.malformed_frames += 1
+                logger.warning("Skipping malformed Deribit WebSocket frame: %r", error)
+                continue
+            if price is not None:
+                yield price
+
+    async def stream_prices(self, index_names: Iterable[str]) -> AsyncIterator[Price]:
+        index_names = list(index_names)
+        delay = self.reconnect_delay
+        while True:
+            session = await self._get_session()
+            try:
+                async with session.ws_connect(self.ws_url, receive_timeout=None) as ws:
+                    self.connections += 1
+                    await self._subscribe(ws, index_names)
+                    async for price in self._read_prices(ws):
+                        delay = self.reconnect_delay
+                        yield price
+                logger.warning("Deribit WebSocket closed, reconnecting in %.1fs", delay)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                logger.warning("Deribit WebSocket error %r, reconnecting in %.1fs", error, delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
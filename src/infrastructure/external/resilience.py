@@ -0,0 +1,85 @@
+import asyncio
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    # кредитная модель Deribit: у ключа есть пул кредитов, каждый запрос списывает cost, пул пополняется
+    # с постоянной скоростью; запрос ждет, пока кредитов хватит, вместо того чтобы получить 429
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waits = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    async def acquire(self, cost: float, deadline: Optional[float] = None) -> bool:
+        # False - кредиты не накопятся до deadline (по time.monotonic), запрос лучше не начинать
+        async with self._lock:
+            self._refill()
+            if self._tokens < cost:
+                wait = (cost - self._tokens) / self.refill_per_second
+                if deadline is not None and time.monotonic() + wait > deadline:
+                    return False
+                self.waits += 1
+                await asyncio.sleep(wait)
+                self._refill()
+            self._tokens -= cost
+            return True
+
+    def drain(self) -> None:
+        # сервер ответил 429 - наша оценка пула разошлась с его, начинаем копить с нуля
+        self._refill()
+        self._tokens = 0.0
+
+
+class CircuitBreaker:
+    # после failure_threshold неудач подряд запросы сразу отклоняются на reset_timeout секунд,
+    # потом пропускается одна пробная попытка: успех закрывает цепь, неудача снова открывает
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.opened = 0
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def release(self) -> None:
+        # попытка не дала исхода (отмена, непредвиденная ошибка): пробный слот освобождается, состояние не меняется
+        self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.opened += 1
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._probe_in_flight = False
@@ -0,0 +1,108 @@
+import asyncio
+import json
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from src.domain.models import Price
+
+
+class HubFullError(Exception):
+    pass
+
+
+class Subscription:
+    # непрочитанное одного клиента: по тикеру держится только последняя цена. Медленный клиент не тормозит
+    # раздачу и не копит очередь - промежуточные цены заменяются (coalesced), память ограничена числом тикеров
+    def __init__(self, tickers: Iterable[str]):
+        self.tickers = frozenset(tickers)
+        self._pending: Dict[str, str] = {}
+        self._ready = asyncio.Event()
+        self.coalesced = 0
+        self.active = True
+
+    def push(self, ticker: str, message: str) -> bool:
+        # True, если непрочитанная цена тикера заменена новой
+        replaced = ticker in self._pending
+        if replaced:
+            self.coalesced += 1
+        self._pending[ticker] = message
+        self._ready.set()
+        return replaced
+
+    async def get(self) -> List[str]:
+        # ждет хотя бы одно обновление и забирает все накопленные, по одному сообщению на тикер
+        while not self._pending:
+            self._ready.clear()
+            await self._ready.wait()
+        messages = list(self._pending.values())
+        self._pending.clear()
+        return messages
+
+
+class PriceHub:
+    # одна раздача на процесс API: цены приходят из PriceUpdateListener (LISTEN/NOTIFY), каждая кодируется
+    # в JSON один раз и раскладывается подписчикам своего тикера; запросов в БД на клиента нет
+    def __init__(self, max_subscribers: int = 10000):
+        self.max_subscribers = max_subscribers
+        self._by_ticker: Dict[str, Set[Subscription]] = {}
+        # последняя цена тикера: (timestamp, готовый JSON) - снимок для новых подписчиков
+        self._latest: Dict[str, Tuple[int, str]] = {}
+        self._subscribers = 0
+        self.published = 0
+        self.delivered = 0
+        self.coalesced = 0
+
+    def set_enabled(self, enabled: bool) -> None:
+        # пока LISTEN отключен, цены могли пройти мимо - устаревший снимок новым подписчикам не отдаем
+        if not enabled:
+            self._latest.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "subscribers": self._subscribers,
+            "tickers": len(self._by_ticker),
+            "published": self.published,
+            "delivered": self.delivered,
+            "coalesced": self.coalesced,
+        }
+
+    def subscribe(self, tickers: Iterable[str]) -> Subscription:
+        if self._subscribers >= self.max_subscribers:
+            raise HubFullError(f"At most {self.max_subscribers} live subscribers")
+        subscription = Subscription(tickers)
+        for ticker in subscription.tickers:
+            self._by_ticker.setdefault(ticker, set()).add(subscription)
+            # сразу отдаем последнюю известную цену, чтобы клиенту не ждать следующего обновления
+            latest = self._latest.get(ticker)
+            if latest is not None:
+                subscription.push(ticker, latest[1])
+        self._subscribers += 1
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        # повторный вызов ничего не делает: SSE освобождает подписку и из генератора, и из ответа
+        if not subscription.active:
+            return
+        subscription.active = False
+        for ticker in subscription.tickers:
+            subscribers = self._by_ticker.get(ticker)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._by_ticker[ticker]
+        self._subscribers -= 1
+
+    def publish(self, price: Price) -> None:
+        latest = self._latest.get(price.ticker)
+        # дозагрузка истории тоже шлет NOTIFY - цена старее уже отданной клиентам не новость
+        if latest is not None and price.timestamp < latest[0]:
+            return
+        message = json.dumps({"ticker": price.ticker, "price": price.price, "timestamp": price.timestamp})
+        self._latest[price.ticker] = (price.timestamp, message)
+        self.published += 1
+        subscribers: Optional[Set[Subscription]] = self._by_ticker.get(price.ticker)
+        if not subscribers:
+            return
+        for subscription in subscribers:
+            if subscription.push(price.ticker, message):
+                self.coalesced += 1
+        self.delivered += len(subscribers)
@@ -0,0 +1,132 @@
+import inspect
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, Mapping
+
+from prometheus_client import REGISTRY, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from src.domain.models import Price
+
+# от сотен микросекунд (быстрые запросы к БД, ожидание свободного соединения) до таймаута Deribit
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+UPSTREAM_LATENCY = Histogram(
+    "deribit_request_duration_seconds",
+    "Latency of a single Deribit HTTP attempt",
+    ["method", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds",
+    "Latency of PriceRepository methods, including pool acquisition",
+    ["method"],
+    buckets=LATENCY_BUCKETS
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_acquire_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["pool"],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "API request latency per route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+
+
+def instrument_queries(cls):
+    # каждый публичный корутинный метод репозитория пишет свое время в DB_QUERY_LATENCY;
+    # дочерняя метрика берется один раз при декорировании, на вызов остаются два perf_counter и observe
+    for name, method in list(vars(cls).items()):
+        if name.startswith("_") or not inspect.iscoroutinefunction(method):
+            continue
+        setattr(cls, name, _timed(method, DB_QUERY_LATENCY.labels(name)))
+    return cls
+
+
+def _timed(method: Callable, histogram) -> Callable:
+    @wraps(method)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
+    return wrapper
+
+
+class IngestLagCollector(Collector):
+    # задержка считается в момент scrape: now - последний сохраненный timestamp тикера,
+    # поэтому остановившийся сбор виден как растущее значение, а не как застывшая метрика
+    def __init__(self):
+        self._last: Dict[str, int] = {}
+
+    def observe(self, price: Price) -> None:
+        if price.timestamp > self._last.get(price.ticker, 0):
+            self._last[price.ticker] = price.timestamp
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        now = time.time()
+        lag = GaugeMetricFamily(
+            "price_ingest_lag_seconds", "Seconds since the last stored price of the ticker", labels=["ticker"]
+        )
+        for ticker, timestamp in list(self._last.items()):
+            lag.add_metric([ticker], now - timestamp)
+        yield lag
+
+
+class StatsCollector(Collector):
+    # счетчики, которые компоненты и так ведут в stats() (кэш, индекс, клиент Deribit, воркер),
+    # читаются только при scrape - горячий путь не меняется
+    def __init__(self):
+        self._sources: Dict[str, Callable[[], Mapping]] = {}
+
+    def register(self, prefix: str, stats: Callable[[], Mapping]) -> None:
+        self._sources[prefix] = stats
+
+    def unregister(self, prefix: str) -> None:
+        self._sources.pop(prefix, None)
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        for prefix, stats in list(self._sources.items()):
+            for key, value in stats().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    yield GaugeMetricFamily(f"{prefix}_{key}", f"{prefix} stats: {key}", value=value)
+
+
+class PoolCollector(Collector):
+    # занятость пулов asyncpg снимается при scrape из get_size/get_idle_size, а не счетчиком на каждый acquire;
+    # saturation = in_use / max
+    def __init__(self):
+        self._pools: Dict[str, Any] = {}
+
+    def register(self, name: str, pool) -> None:
+        self._pools[name] = pool
+
+    def unregister(self, name: str) -> None:
+        self._pools.pop(name, None)
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        families = {
+            state: GaugeMetricFamily(f"db_pool_connections_{state}", f"Pool connections: {state}", labels=["pool"])
+            for state in ("in_use", "open", "max")
+        }
+        for name, pool in list(self._pools.items()):
+            size = pool.get_size()
+            families["in_use"].add_metric([name], size - pool.get_idle_size())
+            families["open"].add_metric([name], size)
+            families["max"].add_metric([name], pool.get_max_size())
+        yield from families.values()
+
+
+INGEST_LAG = IngestLagCollector()
+STATS = StatsCollector()
+POOLS = PoolCollector()
+REGISTRY.register(INGEST_LAG)
+REGISTRY.register(STATS)
+REGISTRY.register(POOLS)
@@ -1,3 +1,14 @@
-from src.infrastructure.tasks.fetch_prices import celery_app
+# Celery и redis нужны только воркеру и beat: задачи и их расписание живут в fetch_prices и maintenance, а CLI пакета
+# (export_prices, retention, backfill_gaps, stream_prices, ...) их не импортируют. aiohttp грузят только CLI, которые
+# ходят в Deribit (backfill_gaps, stream_prices). celery -A src.infrastructure.tasks ищет атрибут app - при первом
+# обращении создается приложение и регистрируются все задачи
+def __getattr__(name):
+    if name in ("celery_app", "app"):
+        from src.infrastructure.tasks import maintenance  # noqa: F401  регистрирует задачи обслуживания
+        from src.infrastructure.tasks.fetch_prices import celery_app
 
-__all__ = ["celery_app"]
\ No newline at end of file
+        return celery_app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ["celery_app"]
@@ -0,0 +1,130 @@
+import argparse
+import asyncio
+import bisect
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from src.domain.models import Price, PriceGap, index_name_to_ticker
+from src.infrastructure.config import get_settings
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+from src.infrastructure.external.deribit_client import DeribitClient
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BackfillReport:
+    gaps: int
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def _inside_gaps(history: List[Price], gaps: List[PriceGap]) -> List[Price]:
+    # gaps одного тикера отсортированы и не пересекаются: точка подходит, если лежит строго внутри своей дыры
+    starts = [gap.start for gap in gaps]
+    inside = []
+    for price in history:
+        position = bisect.bisect_left(starts, price.timestamp) - 1
+        if position >= 0 and price.timestamp < gaps[position].end:
+            inside.append(price)
+    return inside
+
+
+async def backfill_gaps(
+        repository: PriceRepository,
+        client: DeribitClient,
+        index_names: Iterable[str],
+        start: int,
+        end: int,
+        max_gap: int,
+        concurrency: int = 4,
+        batch_size: int = 5000
+) -> BackfillReport:
+    # дыры каждый раз ищутся заново по БД, а запись идет через ON CONFLICT DO NOTHING, поэтому прерванный
+    # бэкфилл просто запускается снова - заполненные дыры уже не найдутся, повторные строки пропустятся
+    started = time.perf_counter()
+    index_by_ticker = {index_name_to_ticker(index_name): index_name for index_name in index_names}
+    gaps = await repository.find_gaps(list(index_by_ticker), start, end, max_gap)
+    gaps_by_ticker: Dict[str, List[PriceGap]] = {}
+    for gap in gaps:
+        gaps_by_ticker.setdefault(gap.ticker, []).append(gap)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    rows = 0
+
+    async def fill(ticker: str, ticker_gaps: List[PriceGap]) -> None:
+        # один запрос истории на тикер, покрывающий все его дыры; тикеры идут параллельно
+        nonlocal rows
+        async with semaphore:
+            history = await client.get_index_history(
+                index_by_ticker[ticker], ticker_gaps[0].start, ticker_gaps[-1].end
+            )
+        missing = _inside_gaps(history, ticker_gaps)
+        for batch_start in range(0, len(missing), batch_size):
+            await repository.save_many(missing[batch_start:batch_start + batch_size])
+        rows += len(missing)
+        logger.info("Backfilled %d rows into %d gaps of %s", len(missing), len(ticker_gaps), ticker)
+
+    await asyncio.gather(*(fill(ticker, ticker_gaps) for ticker, ticker_gaps in gaps_by_ticker.items()))
+    report = BackfillReport(gaps=len(gaps), rows=rows, seconds=time.perf_counter() - started)
+    logger.info(
+        "Backfill finished: %d gaps, %d rows in %.2fs (%.0f rows/s)",
+        report.gaps, report.rows, report.seconds, report.rows_per_second
+    )
+    return report
+
+
+async def run_backfill(index_names: Optional[List[str]], days: float, max_gap: int, concurrency: int) -> None:
+    settings = get_settings()
+    db = Database()
+    repo = PriceRepository(db)
+    client = DeribitClient(
+        base_url=settings.deribit_base_url,
+        max_concurrency=settings.deribit_max_concurrency,
+        request_timeout=settings.deribit_request_timeout,
+        connect_timeout=settings.deribit_connect_timeout,
+        read_timeout=settings.deribit_read_timeout,
+        max_retries=settings.deribit_max_retries,
+        cycle_deadline=settings.deribit_cycle_deadline
+    )
+    if days * 86400 > settings.http_cache_immutable_after_seconds:
+        # закрытые диапазоны отдаются с immutable и ETag без запроса в БД: клиенты и CDN не увидят дозагруженное
+        logger.warning(
+            "Backfilling deeper than HTTP_CACHE_IMMUTABLE_AFTER_SECONDS (%ds): cached responses for the filled "
+            "ranges go stale, purge the HTTP caches afterwards", settings.http_cache_immutable_after_seconds
+        )
+    try:
+        await repo.create_table_if_not_exists()
+        now = int(time.time())
+        await backfill_gaps(
+            repo, client, index_names or settings.deribit_index_names, int(now - days * 86400), now, max_gap, concurrency
+        )
+    finally:
+        await client.close()
+        await db.close()
+
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Поиск дыр в prices и дозагрузка истории из Deribit")
+    parser.add_argument("--index", action="append", help="индекс Deribit (можно несколько), по умолчанию DERIBIT_INDEX_NAMES")
+    parser.add_argument(
+        "--days", type=float, default=settings.backfill_lookback_seconds / 86400,
+        help="глубина поиска; глубже HTTP_CACHE_IMMUTABLE_AFTER_SECONDS - закэшированные immutable-ответы устареют"
+    )
+    parser.add_argument("--max-gap", type=int, default=settings.backfill_max_gap_seconds, help="секунд без цены")
+    parser.add_argument("--concurrency", type=int, default=settings.backfill_concurrency)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_backfill(args.index, args.days, args.max_gap, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import asyncio
+import logging
+from typing import Iterable, Optional
+
+from src.domain.models import CANDLE_INTERVALS
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+logger = logging.getLogger(__name__)
+
+DAY_SECONDS = CANDLE_INTERVALS["1d"]
+
+
+async def backfill_rollups(
+        repository: PriceRepository,
+        tickers: Optional[Iterable[str]] = None,
+        chunk_days: int = 7
+) -> int:
+    # пересчитываем свечи кусками по chunk_days, чтобы не держать длинную транзакцию на всю историю;
+    # границы кусков кратны суткам, поэтому каждая свеча целиком попадает в один кусок
+    chunk_seconds = chunk_days * DAY_SECONDS
+    chunks = 0
+    tickers = list(tickers) if tickers else await repository.get_stored_tickers()
+    for ticker in tickers:
+        bounds = await repository.get_history_bounds(ticker)
+        if bounds is None:
+            continue
+        start = bounds[0] // DAY_SECONDS * DAY_SECONDS
+        end = bounds[1] // DAY_SECONDS * DAY_SECONDS + DAY_SECONDS
+        for chunk_start in range(start, end, chunk_seconds):
+            chunk_end = min(chunk_start + chunk_seconds, end)
+            await repository.rebuild_rollups(ticker, chunk_start, chunk_end)
+            chunks += 1
+        logger.info("Rebuilt rollups for %s: %d..%d", ticker, start, end)
+    return chunks
+
+
+async def run_backfill(tickers: Optional[Iterable[str]], chunk_days: int) -> None:
+    db = Database()
+    repo = PriceRepository(db)
+    try:
+        await repo.create_table_if_not_exists()
+        chunks = await backfill_rollups(repo, tickers, chunk_days)
+        logger.info("Rollup backfill finished, %d chunks", chunks)
+    finally:
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пересчет price_rollups из истории prices")
+    parser.add_argument("--ticker", action="append", help="тикер (можно несколько), по умолчанию все из prices")
+    parser.add_argument("--chunk-days", type=int, default=7)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_backfill(args.ticker, args.chunk_days))
+
+
+if __name__ == "__main__":
+    main()
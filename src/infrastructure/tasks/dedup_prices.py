@@ -0,0 +1,143 @@
+import argparse
+import asyncio
+import logging
+from typing import Dict, Set, Tuple
+
+import asyncpg
+
+from src.domain.models import CANDLE_INTERVALS
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.partitions import list_partitions
+from src.infrastructure.database.repositories.price_repository import (
+    LEGACY_TICKER_TIMESTAMP_INDEX,
+    TICKER_TIMESTAMP_INDEX,
+    PriceRepository,
+)
+
+logger = logging.getLogger(__name__)
+
+DAY_SECONDS = CANDLE_INTERVALS["1d"]
+INDEX_BUILD_ATTEMPTS = 3
+
+# из каждой группы одинаковых (ticker_id, timestamp) остается физически первая строка
+_DELETE_DUPLICATES = """
+    DELETE FROM {partition}
+    WHERE ctid = ANY(ARRAY(
+        SELECT ctid FROM (
+            SELECT ctid, row_number() OVER (PARTITION BY ticker_id, timestamp ORDER BY ctid) AS copy
+            FROM {partition}
+            WHERE timestamp >= $1 AND timestamp < $2
+        ) AS numbered
+        WHERE copy > 1
+    ))
+    RETURNING ticker_id, timestamp
+"""
+
+
+async def _delete_duplicates(
+        conn: asyncpg.Connection,
+        partition: str,
+        start: int,
+        end: int,
+        batch_seconds: int,
+        affected: Set[Tuple[int, int]]
+) -> int:
+    # каждый диапазон - отдельный короткий DELETE в autocommit: блокируются только удаляемые строки
+    removed = 0
+    if not await conn.fetchval(f"SELECT EXISTS (SELECT 1 FROM {partition})"):
+        return removed
+    for batch_start in range(start, end, batch_seconds):
+        rows = await conn.fetch(_DELETE_DUPLICATES.format(partition=partition), batch_start, batch_start + batch_seconds)
+        removed += len(rows)
+        affected.update((row["ticker_id"], row["timestamp"] // DAY_SECONDS * DAY_SECONDS) for row in rows)
+    if removed:
+        logger.info("Removed %d duplicates from %s", removed, partition)
+    return removed
+
+
+async def _build_partition_index(
+        conn: asyncpg.Connection,
+        partition: str,
+        start: int,
+        end: int,
+        batch_seconds: int,
+        affected: Set[Tuple[int, int]]
+) -> int:
+    # CONCURRENTLY не блокирует запись в секцию; если за время построения в ней успели появиться новые дубли,
+    # индекс получится невалидным - чистим секцию еще раз и строим заново
+    index = f"{partition}_ticker_timestamp_key"
+    attached = await conn.fetchval(
+        """
+        SELECT EXISTS (
+            SELECT 1 FROM pg_inherits
+            JOIN pg_index ON pg_index.indexrelid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass($1) AND pg_index.indrelid = to_regclass($2)
+        )
+        """,
+        TICKER_TIMESTAMP_INDEX, partition
+    )
+    if attached:
+        return 0
+    removed = 0
+    for attempt in range(INDEX_BUILD_ATTEMPTS):
+        await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index}")
+        try:
+            await conn.execute(f"CREATE UNIQUE INDEX CONCURRENTLY {index} ON {partition} (ticker_id, timestamp DESC)")
+            break
+        except asyncpg.UniqueViolationError:
+            logger.warning("New duplicates in %s while building %s, retrying", partition, index)
+            removed += await _delete_duplicates(conn, partition, start, end, batch_seconds, affected)
+    else:
+        raise RuntimeError(f"Could not build {index}: duplicates keep appearing")
+    await conn.execute(f"ALTER INDEX {TICKER_TIMESTAMP_INDEX} ATTACH PARTITION {index}")
+    return removed
+
+
+async def deduplicate_prices(repository: PriceRepository, batch_seconds: int = 3600) -> int:
+    # 1) дубли удаляются по секциям диапазонами по batch_seconds;
+    # 2) уникальный индекс строится без долгих блокировок: пустой ON ONLY на prices, по одному
+    #    CREATE INDEX CONCURRENTLY на секцию и ATTACH - после последнего ATTACH индекс становится валидным;
+    # 3) старый неуникальный индекс удаляется, свечи за затронутые сутки пересчитываются
+    pool = await repository.db.get_pool()
+    affected: Set[Tuple[int, int]] = set()
+    removed = 0
+    async with pool.acquire() as conn:
+        if not await conn.fetchval(f"SELECT to_regclass('{LEGACY_TICKER_TIMESTAMP_INDEX}') IS NOT NULL"):
+            logger.info("%s already replaced by %s, nothing to do", LEGACY_TICKER_TIMESTAMP_INDEX, TICKER_TIMESTAMP_INDEX)
+            return 0
+        await conn.execute(
+            f"CREATE UNIQUE INDEX IF NOT EXISTS {TICKER_TIMESTAMP_INDEX} ON ONLY prices (ticker_id, timestamp DESC)"
+        )
+        partitions = await list_partitions(conn)
+        for partition, start, end in partitions:
+            removed += await _delete_duplicates(conn, partition, start, end, batch_seconds, affected)
+        for partition, start, end in partitions:
+            removed += await _build_partition_index(conn, partition, start, end, batch_seconds, affected)
+        await conn.execute(f"DROP INDEX {LEGACY_TICKER_TIMESTAMP_INDEX}")
+        tickers: Dict[int, str] = dict(await conn.fetch("SELECT id, name FROM tickers"))
+
+    for ticker_id, day in sorted(affected):
+        await repository.rebuild_rollups(tickers[ticker_id], day, day + DAY_SECONDS)
+    logger.info("Removed %d duplicates, rebuilt rollups for %d ticker-days", removed, len(affected))
+    return removed
+
+
+async def run_dedup(batch_seconds: int) -> None:
+    db = Database()
+    repo = PriceRepository(db)
+    try:
+        await deduplicate_prices(repo, batch_seconds)
+    finally:
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Удаление дублей (ticker, timestamp) и замена индекса на уникальный")
+    parser.add_argument("--batch-seconds", type=int, default=3600, help="диапазон timestamp на один DELETE")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_dedup(args.batch_seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from typing import BinaryIO, Optional
+
+from src.application.use_cases.export_prices import ExportPricesUseCase
+from src.infrastructure.config import get_settings
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+from src.infrastructure.export.price_export import EXPORT_FORMATS
+
+logger = logging.getLogger(__name__)
+
+
+async def export_prices(
+        repository: PriceRepository,
+        output: BinaryIO,
+        ticker: str,
+        fmt: str,
+        after: Optional[int] = None,
+        before: Optional[int] = None
+) -> int:
+    settings = get_settings()
+    written = 0
+    chunks = ExportPricesUseCase(repository).execute(
+        ticker, fmt, after=after, before=before,
+        timeout=settings.export_timeout, batch_bytes=settings.export_batch_bytes
+    )
+    async for chunk in chunks:
+        output.write(chunk)
+        written += len(chunk)
+    return written
+
+
+async def run_export(path: str, ticker: str, fmt: str, after: Optional[int], before: Optional[int]) -> None:
+    db = Database(get_settings().database_replica_url)
+    repo = PriceRepository(db)
+    started = time.perf_counter()
+    try:
+        if path == "-":
+            written = await export_prices(repo, sys.stdout.buffer, ticker, fmt, after, before)
+        else:
+            with open(path, "wb") as output:
+                written = await export_prices(repo, output, ticker, fmt, after, before)
+    finally:
+        await db.close()
+    elapsed = time.perf_counter() - started
+    logger.info("Exported %s as %s: %d bytes in %.1fs", ticker, fmt, written, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Выгрузка истории цен тикера в CSV, Arrow IPC stream или Parquet")
+    parser.add_argument("--ticker", required=True)
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    parser.add_argument("--after", type=int, help="timestamp, строго после которого начинать")
+    parser.add_argument("--before", type=int, help="timestamp, строго до которого выгружать")
+    parser.add_argument("--output", required=True, help="путь к файлу, - для stdout")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    asyncio.run(run_export(args.output, args.ticker, args.format, args.after, args.before))
+
+
+if __name__ == "__main__":
+    main()
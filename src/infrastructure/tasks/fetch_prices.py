@@ -1,52 +1,90 @@
-import os
+import time
+from typing import List
 
 from celery import Celery
 
-from src.infrastructure.database.connection import Database
-from src.infrastructure.database.repositories.price_repository import PriceRepository
-from src.infrastructure.external.deribit_client import DeribitClient
+from src.domain.models import Price, index_name_to_ticker
+from src.infrastructure.config import get_settings
+from src.infrastructure.metrics import STATS
+from src.infrastructure.tasks.ingest_scheduler import due_indices, get_coordinator, partition
+from src.infrastructure.tasks.worker_resources import WorkerResources, worker_resources
+
+settings = get_settings()
 
 celery_app = Celery(
     "deribit_client",
-    broker=os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0"),
-    backend=os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/0")
+    broker=settings.celery_broker_url,
+    backend=settings.celery_result_backend
 )
 
 
 @celery_app.task
 def fetch_prices():
-    import asyncio
+    async def fetch_and_save(resources: WorkerResources) -> int:
+        prices = await resources.client.get_index_prices(settings.deribit_index_names)
+        await resources.repository.save_many(prices)
+        return len(prices)
 
-    async def fetch_and_save():
-        db = Database()
-        client = DeribitClient()
-        repo = PriceRepository(db)
+    saved = worker_resources.run(fetch_and_save)
+    return {"saved": saved, "overhead_seconds": worker_resources.last_overhead_seconds}
 
-        try:
-            await db.connect()
-            await repo.create_table_if_not_exists()
 
-            btc_price = await client.get_btc_price()
-            if btc_price:
-                await repo.save(btc_price)
+# счетчики запусков шардов в этом процессе воркера
+SHARD_STATS = {"runs": 0, "skipped": 0, "fetched": 0}
+STATS.register("ingest_shards", lambda: dict(SHARD_STATS))
 
-            eth_price = await client.get_eth_price()
-            if eth_price:
-                await repo.save(eth_price)
-        finally:
-            await client.close()
-            await db.close()
 
+@celery_app.task
+def fetch_price_shard(shard: int, shards: int):
+    # shards приходит из расписания: задачи, отправленные до смены INGEST_SHARDS, доделывают свою долю
+    # старого разбиения, а не половину нового
+    started = time.time()
+    index_names = partition(settings.deribit_index_names, shards)[shard]
+    coordinator = get_coordinator(settings.ingest_redis_url or settings.celery_broker_url)
+    lock = coordinator.acquire(shard, settings.ingest_shard_deadline)
+    if lock is None:
+        # предыдущий запуск шарда еще идет; остальные шарды его не ждут
+        SHARD_STATS["skipped"] += 1
+        return {"shard": shard, "skipped": True}
     try:
-        loop = asyncio.get_event_loop()
-        if loop.is_closed():
-            asyncio.run(fetch_and_save())
-        else:
-            loop.run_until_complete(fetch_and_save())
-    except RuntimeError:
-        asyncio.run(fetch_and_save())
+        due = due_indices(
+            index_names,
+            coordinator.last_fetched(index_names),
+            settings.deribit_index_intervals,
+            settings.ingest_default_interval,
+            started,
+            settings.ingest_tick_seconds
+        )
+        prices: List[Price] = []
+        if due:
+            async def fetch_and_save(resources: WorkerResources) -> List[Price]:
+                fetched = await resources.client.get_index_prices(due)
+                await resources.repository.save_many(fetched)
+                return fetched
+
+            prices = worker_resources.run(fetch_and_save)
+            # неудачные индексы не отмечаются и повторяются на следующем такте, а не через интервал
+            saved_tickers = {price.ticker for price in prices}
+            coordinator.mark_fetched(
+                [index_name for index_name in due if index_name_to_ticker(index_name) in saved_tickers], started
+            )
+    finally:
+        coordinator.release(lock)
+    SHARD_STATS["runs"] += 1
+    SHARD_STATS["fetched"] += len(prices)
+    return {"shard": shard, "due": len(due), "saved": len(prices)}
 
 
 @celery_app.on_after_configure.connect
 def setup_periodic_tasks(sender, **kwargs):
-    sender.add_periodic_task(60.0, fetch_prices.s(), name='fetch prices every minute')
+    # задача на шард каждый такт; expires - дедлайн в очереди: не взятая воркером до следующего такта задача
+    # отбрасывается, а не копится за зависшим шардом. fetch_prices (все индексы одной задачей) остается
+    # для ручного запуска
+    tick = settings.ingest_tick_seconds
+    for shard in range(settings.ingest_shards):
+        sender.add_periodic_task(
+            tick,
+            fetch_price_shard.s(shard, settings.ingest_shards),
+            name=f'fetch prices shard {shard + 1}/{settings.ingest_shards}',
+            expires=tick
+        )
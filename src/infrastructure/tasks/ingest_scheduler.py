@@ -0,0 +1,102 @@
+import bisect
+import hashlib
+import logging
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+# точек на шард в кольце: при 100 доля индексов у шардов отличается от 1/N в пределах ~10%
+RING_REPLICAS = 100
+KEY_PREFIX = "ingest"
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    # консистентное хеширование: при смене числа шардов с N на N+1 переезжает ~1/(N+1) индексов,
+    # остальные остаются у своих шардов
+    def __init__(self, shards: int, replicas: int = RING_REPLICAS):
+        if shards < 1:
+            raise ValueError("At least one shard is required")
+        points = sorted((_hash(f"{shard}:{replica}"), shard) for shard in range(shards) for replica in range(replicas))
+        self._keys = [key for key, _ in points]
+        self._shards = [shard for _, shard in points]
+
+    def shard_for(self, key: str) -> int:
+        position = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._shards[position]
+
+
+def partition(index_names: Iterable[str], shards: int) -> Dict[int, List[str]]:
+    ring = HashRing(shards)
+    result: Dict[int, List[str]] = {shard: [] for shard in range(shards)}
+    for index_name in index_names:
+        result[ring.shard_for(index_name)].append(index_name)
+    return result
+
+
+def due_indices(
+        index_names: Iterable[str],
+        last_fetched: Mapping[str, float],
+        intervals: Mapping[str, float],
+        default_interval: float,
+        now: float,
+        tick: float
+) -> List[str]:
+    # задача шарда стартует чуть позже своего слота beat; допуск в полтакта, чтобы индекс с интервалом 60
+    # при такте 10 не съезжал на 70 секунд из-за задержки в очереди
+    due = []
+    for index_name in index_names:
+        last = last_fetched.get(index_name)
+        if last is None or now - last >= intervals.get(index_name, default_interval) - tick / 2:
+            due.append(index_name)
+    return due
+
+
+class ShardCoordinator:
+    # состояние шардов в Redis, общее для всех воркеров: блокировка запуска и время последнего опроса индексов.
+    # Блокировка живет не дольше deadline, так что упавший воркер не держит шард
+    def __init__(self, redis_client, prefix: str = KEY_PREFIX):
+        self._redis = redis_client
+        self._prefix = prefix
+
+    def acquire(self, shard: int, deadline: float):
+        # None, если шард еще обрабатывается предыдущим запуском
+        lock = self._redis.lock(f"{self._prefix}:shard:{shard}:lock", timeout=deadline)
+        return lock if lock.acquire(blocking=False) else None
+
+    @staticmethod
+    def release(lock) -> None:
+        try:
+            lock.release()
+        except redis.exceptions.LockError:
+            # deadline истек и блокировку уже взял следующий запуск - его не трогаем
+            logger.warning("Shard lock expired before release")
+
+    def last_fetched(self, index_names: List[str]) -> Dict[str, float]:
+        # время опроса хранится по индексу, а не по шарду: после смены числа шардов переехавший индекс
+        # не опрашивается внепланово
+        if not index_names:
+            return {}
+        values = self._redis.hmget(f"{self._prefix}:last", index_names)
+        return {index_name: float(value) for index_name, value in zip(index_names, values) if value is not None}
+
+    def mark_fetched(self, index_names: Iterable[str], timestamp: float) -> None:
+        mapping = {index_name: timestamp for index_name in index_names}
+        if mapping:
+            self._redis.hset(f"{self._prefix}:last", mapping=mapping)
+
+
+_coordinator: Optional[ShardCoordinator] = None
+
+
+def get_coordinator(redis_url: str) -> ShardCoordinator:
+    # один клиент Redis на процесс воркера, как и WorkerResources
+    global _coordinator
+    if _coordinator is None:
+        _coordinator = ShardCoordinator(redis.Redis.from_url(redis_url))
+    return _coordinator
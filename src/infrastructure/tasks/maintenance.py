@@ -0,0 +1,47 @@
+import time
+from typing import List
+
+from src.infrastructure.config import get_settings
+from src.infrastructure.tasks.backfill_gaps import BackfillReport, backfill_gaps
+from src.infrastructure.tasks.fetch_prices import celery_app
+from src.infrastructure.tasks.retention import DAY_SECONDS, apply_retention
+from src.infrastructure.tasks.worker_resources import WorkerResources, worker_resources
+
+# обертки Celery над retention и backfill_gaps живут отдельно, чтобы CLI этих модулей не тянули Celery и redis.
+# Имена задач прежние - сообщения в очереди и записи beat, созданные до переноса, находят свой обработчик
+
+
+@celery_app.task(name="src.infrastructure.tasks.retention.maintain_partitions")
+def maintain_partitions():
+    retention_days = get_settings().retention_days
+
+    async def maintain(resources: WorkerResources) -> List[str]:
+        return await apply_retention(resources.repository, retention_days)
+
+    return {"dropped": worker_resources.run(maintain)}
+
+
+@celery_app.task(name="src.infrastructure.tasks.backfill_gaps.backfill_price_gaps")
+def backfill_price_gaps():
+    settings = get_settings()
+
+    async def backfill(resources: WorkerResources) -> BackfillReport:
+        now = int(time.time())
+        return await backfill_gaps(
+            resources.repository,
+            resources.client,
+            settings.deribit_index_names,
+            now - settings.backfill_lookback_seconds,
+            now,
+            settings.backfill_max_gap_seconds,
+            settings.backfill_concurrency
+        )
+
+    report = worker_resources.run(backfill)
+    return {"gaps": report.gaps, "rows": report.rows, "rows_per_second": report.rows_per_second}
+
+
+@celery_app.on_after_configure.connect
+def setup_maintenance_tasks(sender, **kwargs):
+    sender.add_periodic_task(float(DAY_SECONDS), maintain_partitions.s(), name='maintain price partitions daily')
+    sender.add_periodic_task(3600.0, backfill_price_gaps.s(), name='backfill price gaps hourly')
@@ -0,0 +1,111 @@
+import argparse
+import asyncio
+import logging
+
+from src.domain.models import CANDLE_INTERVALS
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+logger = logging.getLogger(__name__)
+
+DAY_SECONDS = CANDLE_INTERVALS["1d"]
+LEGACY_TABLE = "prices_legacy"
+
+
+async def migrate_legacy_prices(db: Database, repository: PriceRepository, chunk_days: int = 1) -> int:
+    # старая prices переименовывается (мгновенно), новая схема создается рядом, после чего процессы с новым
+    # кодом уже могут писать; история переносится кусками по времени - каждый кусок одной транзакцией
+    # DELETE ... RETURNING -> INSERT, поэтому прерванную миграцию можно просто запустить снова.
+    # Дубли (ticker, timestamp) из старой таблицы отбрасываются уникальным индексом новой
+    pool = await db.get_pool()
+    async with pool.acquire() as conn:
+        relkind = await conn.fetchval("SELECT relkind::text FROM pg_class WHERE oid = to_regclass('prices')")
+        if relkind == "r":
+            async with conn.transaction():
+                await conn.execute(f"ALTER TABLE prices RENAME TO {LEGACY_TABLE}")
+                await conn.execute("ALTER INDEX IF EXISTS idx_ticker_timestamp RENAME TO idx_legacy_ticker_timestamp")
+                await conn.execute(f"DROP TRIGGER IF EXISTS prices_notify_updates ON {LEGACY_TABLE}")
+                if await conn.fetchval("SELECT to_regclass('price_rollups') IS NOT NULL"):
+                    await conn.execute("""
+                        ALTER TABLE price_rollups
+                            ALTER COLUMN ticker TYPE VARCHAR(32),
+                            ALTER COLUMN open TYPE DOUBLE PRECISION,
+                            ALTER COLUMN high TYPE DOUBLE PRECISION,
+                            ALTER COLUMN low TYPE DOUBLE PRECISION,
+                            ALTER COLUMN close TYPE DOUBLE PRECISION,
+                            ALTER COLUMN price_sum TYPE DOUBLE PRECISION
+                    """)
+            logger.info("Renamed legacy prices to %s", LEGACY_TABLE)
+        elif await conn.fetchval(f"SELECT to_regclass('{LEGACY_TABLE}') IS NULL"):
+            logger.info("Nothing to migrate")
+            return 0
+
+    await repository.create_table_if_not_exists()
+
+    async with pool.acquire() as conn:
+        # индекс по времени нужен, чтобы каждый кусок выбирался без полного прохода по старой таблице
+        await conn.execute(f"CREATE INDEX IF NOT EXISTS idx_legacy_timestamp ON {LEGACY_TABLE} (timestamp)")
+        await conn.execute(f"""
+            INSERT INTO tickers (name)
+            SELECT DISTINCT ticker FROM {LEGACY_TABLE}
+            WHERE NOT EXISTS (SELECT 1 FROM tickers WHERE tickers.name = {LEGACY_TABLE}.ticker)
+            ON CONFLICT (name) DO NOTHING
+        """)
+        bounds = await conn.fetchrow(f"SELECT min(timestamp) AS first, max(timestamp) AS last FROM {LEGACY_TABLE}")
+
+    moved = 0
+    if bounds["first"] is not None:
+        await repository.ensure_partitions(bounds["first"], bounds["last"])
+        chunk_seconds = chunk_days * DAY_SECONDS
+        start = bounds["first"] // DAY_SECONDS * DAY_SECONDS
+        async with pool.acquire() as conn:
+            for chunk_start in range(start, bounds["last"] + 1, chunk_seconds):
+                async with conn.transaction():
+                    status = await conn.execute(
+                        f"""
+                        WITH moved AS (
+                            DELETE FROM {LEGACY_TABLE}
+                            WHERE timestamp >= $1 AND timestamp < $2
+                            RETURNING ticker, price, timestamp
+                        )
+                        INSERT INTO prices (timestamp, price, ticker_id)
+                        SELECT moved.timestamp, moved.price, tickers.id
+                        FROM moved
+                        JOIN tickers ON tickers.name = moved.ticker
+                        ON CONFLICT DO NOTHING
+                        """,
+                        chunk_start, chunk_start + chunk_seconds
+                    )
+                moved += int(status.split()[-1])
+                logger.info("Moved %d rows so far", moved)
+
+    async with pool.acquire() as conn:
+        remaining = await conn.fetchval(f"SELECT count(*) FROM {LEGACY_TABLE}")
+        if remaining == 0:
+            await conn.execute(f"DROP TABLE {LEGACY_TABLE}")
+            logger.info("Dropped %s", LEGACY_TABLE)
+        else:
+            logger.warning("%s still has %d rows, rerun the migration", LEGACY_TABLE, remaining)
+    return moved
+
+
+async def run_migration(chunk_days: int) -> None:
+    db = Database()
+    repo = PriceRepository(db)
+    try:
+        moved = await migrate_legacy_prices(db, repo, chunk_days)
+        logger.info("Migration finished, %d rows moved", moved)
+    finally:
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Перенос prices в секционированную компактную схему")
+    parser.add_argument("--chunk-days", type=int, default=1, help="сколько суток истории переносить одной транзакцией")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_migration(args.chunk_days))
+
+
+if __name__ == "__main__":
+    main()
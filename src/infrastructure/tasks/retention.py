@@ -0,0 +1,51 @@
+import argparse
+import asyncio
+import logging
+import time
+from typing import List, Optional
+
+from src.domain.models import CANDLE_INTERVALS
+from src.infrastructure.config import get_settings
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.partitions import PARTITION_MONTHS_AHEAD
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+logger = logging.getLogger(__name__)
+
+DAY_SECONDS = CANDLE_INTERVALS["1d"]
+
+
+async def apply_retention(repository: PriceRepository, retention_days: int, now: Optional[int] = None) -> List[str]:
+    # секции, целиком старше retention_days, удаляются; заодно создаются секции на следующие месяцы.
+    # price_rollups не трогаем - свечи занимают немного и остаются для длинных диапазонов
+    now = int(time.time()) if now is None else now
+    await repository.ensure_partitions(now, now + PARTITION_MONTHS_AHEAD * 31 * DAY_SECONDS)
+    if retention_days <= 0:
+        return []
+    dropped = await repository.drop_partitions_before(now - retention_days * DAY_SECONDS)
+    if dropped:
+        logger.info("Dropped partitions: %s", ", ".join(dropped))
+    return dropped
+
+
+async def run_retention(retention_days: int) -> None:
+    db = Database()
+    repo = PriceRepository(db)
+    try:
+        await repo.create_table_if_not_exists()
+        dropped = await apply_retention(repo, retention_days)
+        logger.info("Retention finished, %d partitions dropped", len(dropped))
+    finally:
+        await db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Удаление старых секций prices и создание секций наперед")
+    parser.add_argument("--days", type=int, default=None, help="сколько суток хранить, по умолчанию RETENTION_DAYS")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_retention(get_settings().retention_days if args.days is None else args.days))
+
+
+if __name__ == "__main__":
+    main()
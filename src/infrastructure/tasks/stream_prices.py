@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import signal
+from typing import Iterable
+
+from prometheus_client import start_http_server
+
+from src.infrastructure.config import get_settings
+from src.infrastructure.database.buffered_writer import BufferedPriceWriter
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+from src.infrastructure.external.deribit_ws_client import DeribitWebSocketClient
+from src.infrastructure.metrics import STATS
+
+logger = logging.getLogger(__name__)
+
+STOP_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+
+class PriceStreamIngestor:
+    def __init__(self, client: DeribitWebSocketClient, writer: BufferedPriceWriter):
+        self.client = client
+        self.writer = writer
+        self.saved_ticks = 0
+
+    async def run(self, index_names: Iterable[str]) -> None:
+        async for price in self.client.stream_prices(index_names):
+            await self.writer.write(price)
+            self.saved_ticks += 1
+
+
+async def ingest_until_stopped(
+        client: DeribitWebSocketClient, writer: BufferedPriceWriter, index_names: Iterable[str]
+) -> None:
+    # docker stop шлет SIGTERM: прием тиков отменяется, а вызывающий блок async with BufferedPriceWriter выходит
+    # обычным путем и дописывает буфер в БД. Без обработчика процесс завершался бы с непустым буфером
+    loop = asyncio.get_running_loop()
+    ingest = asyncio.create_task(PriceStreamIngestor(client, writer).run(index_names))
+    for signum in STOP_SIGNALS:
+        loop.add_signal_handler(signum, ingest.cancel)
+    try:
+        await asyncio.wait({ingest})
+    finally:
+        for signum in STOP_SIGNALS:
+            loop.remove_signal_handler(signum)
+        ingest.cancel()
+    if ingest.cancelled():
+        logger.info("Stopping, flushing %d buffered prices", writer.stats()["queued"])
+        return
+    ingest.result()
+
+
+async def run_streaming() -> None:
+    settings = get_settings()
+    db = Database()
+    repo = PriceRepository(db)
+    client = DeribitWebSocketClient(
+        ws_url=settings.deribit_ws_url,
+        heartbeat_interval=settings.deribit_ws_heartbeat_interval,
+        max_reconnect_delay=settings.deribit_ws_max_reconnect_delay
+    )
+
+    if settings.stream_metrics_port:
+        start_http_server(settings.stream_metrics_port)
+    try:
+        await db.connect()
+        await repo.create_table_if_not_exists()
+        async with BufferedPriceWriter(
+                repo,
+                max_batch_size=settings.write_batch_size,
+                flush_interval=settings.write_flush_interval,
+                max_buffer_size=settings.write_buffer_size,
+                max_retries=settings.write_max_retries,
+                retry_base_delay=settings.write_retry_base_delay,
+                retry_max_delay=settings.write_retry_max_delay
+        ) as writer:
+            STATS.register("buffered_writer", writer.stats)
+            await ingest_until_stopped(client, writer, settings.deribit_index_names)
+    finally:
+        await client.close()
+        await db.close()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_streaming())
+
+
+if __name__ == "__main__":
+    main()
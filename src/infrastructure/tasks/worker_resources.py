@@ -0,0 +1,136 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
+from celery.utils.log import current_process_index
+from prometheus_client import start_http_server
+
+from src.infrastructure.config import get_settings
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+from src.infrastructure.external.deribit_client import DeribitClient
+from src.infrastructure.external.resilience import CircuitBreaker, TokenBucket
+from src.infrastructure.metrics import STATS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+# event loop, пул БД и HTTP-сессия живут весь процесс воркера, а не одну задачу
+class WorkerResources:
+    def __init__(self):
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.db: Optional[Database] = None
+        self.client: Optional[DeribitClient] = None
+        self.repository: Optional[PriceRepository] = None
+        self.setup_seconds = 0.0
+        self.last_overhead_seconds = 0.0
+        self.total_overhead_seconds = 0.0
+        self.tasks_run = 0
+
+    def stats(self) -> dict:
+        return {
+            "setup_seconds": self.setup_seconds,
+            "last_overhead_seconds": self.last_overhead_seconds,
+            "total_overhead_seconds": self.total_overhead_seconds,
+            "tasks_run": self.tasks_run,
+        }
+
+    @property
+    def started(self) -> bool:
+        return self.loop is not None
+
+    def start(self) -> None:
+        if self.started:
+            return
+        started = time.perf_counter()
+        settings = get_settings()
+        self.loop = asyncio.new_event_loop()
+        self.db = Database()
+        self.client = DeribitClient(
+            base_url=settings.deribit_base_url,
+            max_concurrency=settings.deribit_max_concurrency,
+            request_timeout=settings.deribit_request_timeout,
+            keepalive_timeout=settings.deribit_keepalive_timeout,
+            connect_timeout=settings.deribit_connect_timeout,
+            read_timeout=settings.deribit_read_timeout,
+            max_retries=settings.deribit_max_retries,
+            retry_base_delay=settings.deribit_retry_base_delay,
+            retry_max_delay=settings.deribit_retry_max_delay,
+            cycle_deadline=settings.deribit_cycle_deadline,
+            rate_limiter=TokenBucket(settings.deribit_credits_capacity, settings.deribit_credits_per_second),
+            circuit_breaker=CircuitBreaker(
+                settings.deribit_circuit_failure_threshold, settings.deribit_circuit_reset_timeout
+            )
+        )
+        self.repository = PriceRepository(self.db)
+        STATS.register("deribit_client", self.client.stats)
+        self.loop.run_until_complete(self._setup())
+        self.setup_seconds = time.perf_counter() - started
+        logger.info("Worker resources ready in %.3fs", self.setup_seconds)
+
+    async def _setup(self) -> None:
+        await self.db.connect()
+        await self.repository.create_table_if_not_exists()
+
+    def run(self, work: Callable[["WorkerResources"], Awaitable[T]]) -> T:
+        # overhead = все время задачи минус сама работа: старт ресурсов, запуск корутины в loop
+        started = time.perf_counter()
+        self.start()
+        work_seconds = 0.0
+
+        async def timed_work() -> T:
+            nonlocal work_seconds
+            work_started = time.perf_counter()
+            try:
+                return await work(self)
+            finally:
+                work_seconds = time.perf_counter() - work_started
+
+        try:
+            return self.loop.run_until_complete(timed_work())
+        finally:
+            self.last_overhead_seconds = time.perf_counter() - started - work_seconds
+            self.total_overhead_seconds += self.last_overhead_seconds
+            self.tasks_run += 1
+
+    def shutdown(self) -> None:
+        if not self.started:
+            return
+        try:
+            self.loop.run_until_complete(self._teardown())
+        finally:
+            self.loop.close()
+            self.loop = None
+
+    async def _teardown(self) -> None:
+        try:
+            await self.client.close()
+        finally:
+            await self.db.close()
+
+
+worker_resources = WorkerResources()
+STATS.register("worker", worker_resources.stats)
+
+
+def start_worker_exporter(port: int) -> None:
+    # у каждого процесса prefork свои метрики в памяти, поэтому и свой порт: базовый + номер процесса
+    if port:
+        start_http_server(port + (current_process_index(base=0) or 0))
+
+
+@worker_process_init.connect
+def _start_worker_exporter(**kwargs):
+    # хук должен быть мгновенным: Celery убивает дочерний процесс, не закончивший init за несколько секунд,
+    # а исключение здесь перезапускает его по кругу. Пул и схема поднимаются в run() на первой задаче
+    start_worker_exporter(get_settings().worker_metrics_port)
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _shutdown_worker_resources(**kwargs):
+    worker_resources.shutdown()
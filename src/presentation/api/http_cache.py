@@ -0,0 +1,49 @@
+import hashlib
+import time
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+# цены только добавляются, а закрытый диапазон не меняется совсем - его можно хранить в кэше сколько угодно
+IMMUTABLE = "public, max-age=31536000, immutable"
+# открытый диапазон кэшировать можно, но перед использованием - проверить ETag
+REVALIDATE = "no-cache"
+# CompressionMiddleware дописывает кодировку к ETag сжатого ответа: у разных байт разные строгие ETag
+ENCODING_ETAG_SUFFIXES = ("-gzip", "-br")
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def is_closed(end: Optional[int], immutable_after_seconds: int) -> bool:
+    # новых цен раньше end уже не будет: и запись, и дозагрузка дыр работают ближе к текущему моменту
+    return end is not None and end <= time.time() - immutable_after_seconds
+
+
+def _strip_encoding(etag: str) -> str:
+    for suffix in ENCODING_ETAG_SUFFIXES:
+        if etag.endswith(suffix + '"'):
+            return etag[:-len(suffix) - 1] + '"'
+    return etag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    # If-None-Match сравнивается слабо (RFC 9110): W/ и суффикс кодировки не мешают совпадению
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or _strip_encoding(candidate.removeprefix("W/")) == etag:
+            return True
+    return False
+
+
+def caching_headers(etag: str, immutable: bool) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": IMMUTABLE if immutable else REVALIDATE}
+
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
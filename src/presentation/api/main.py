@@ -1,21 +1,115 @@
-from contextlib import asynccontextmanager
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+from typing import Optional
 
+import asyncpg
 from fastapi import FastAPI
 
+from src.infrastructure.cache.price_cache import LatestPriceCache
+from src.infrastructure.cache.price_index import PriceIndex
+from src.infrastructure.config import get_settings
 from src.infrastructure.database.connection import Database
-from src.presentation.api.routes import prices
+from src.infrastructure.database.notifications import PriceUpdateListener
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+from src.infrastructure.live.price_hub import PriceHub
+from src.infrastructure.metrics import INGEST_LAG, STATS
+from src.presentation.api.middleware import CompressionMiddleware, RequestMetricsMiddleware
+from src.presentation.api.routes import analytics, health, metrics, prices
 
-_db_instance = Database()
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# пока БД недоступна, прогрев повторяется с нарастающей паузой, а /ready отвечает 503
+STARTUP_RETRY_DELAY = 1.0
+STARTUP_MAX_RETRY_DELAY = 30.0
+
+
+def _create_listener(app: FastAPI, db: Database) -> Optional[PriceUpdateListener]:
+    if not (settings.latest_price_cache_enabled or settings.price_index_enabled or settings.live_feed_enabled):
+        return None
+    # кэш, индекс и живая лента валидны, только пока приходят уведомления, поэтому следят за состоянием LISTEN
+    listener = PriceUpdateListener(db.database_url)
+    listener.subscribe(INGEST_LAG.observe)
+    if settings.latest_price_cache_enabled:
+        cache = LatestPriceCache()
+        listener.on_state_change(cache.set_enabled)
+        listener.subscribe(cache.update)
+        app.state.price_cache = cache
+        STATS.register("price_cache", cache.stats)
+    if settings.price_index_enabled:
+        price_index = PriceIndex(settings.price_index_window_seconds)
+        listener.on_state_change(price_index.set_enabled)
+        listener.subscribe(price_index.on_price)
+        app.state.price_index = price_index
+        STATS.register("price_index", price_index.stats)
+    if settings.live_feed_enabled:
+        # одна раздача на процесс: все подписчики кормятся из того же LISTEN-соединения
+        price_hub = PriceHub(settings.live_feed_max_subscribers)
+        listener.on_state_change(price_hub.set_enabled)
+        listener.subscribe(price_hub.publish)
+        app.state.price_hub = price_hub
+        STATS.register("price_hub", price_hub.stats)
+    return listener
+
+
+async def _warm_up(app: FastAPI, listener: Optional[PriceUpdateListener]) -> None:
+    # пул и подготовленные запросы создаются до того, как /ready пустит трафик, но не задерживают старт
+    # сервера: порт открывается сразу, а запрос, пришедший раньше, ждет тот же пул
+    delay = STARTUP_RETRY_DELAY
+    while True:
+        try:
+            await app.state.db.connect()
+            await PriceRepository(app.state.read_db).warm_up()
+            break
+        except (OSError, asyncpg.PostgresError, asyncio.TimeoutError) as error:
+            logger.warning("Database warm-up failed, retrying in %.0fs: %r", delay, error)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, STARTUP_MAX_RETRY_DELAY)
+    if listener is not None:
+        await listener.start()
+    app.state.ready = True
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await _db_instance.connect()
+    db = Database()
+    # GET-маршруты читают из реплики, если она задана; LISTEN и запись остаются на основной базе
+    read_db = Database(settings.database_replica_url, name="replica") if settings.database_replica_url else db
+    app.state.db = db
+    app.state.read_db = read_db
+    listener = _create_listener(app, db)
+    startup = asyncio.create_task(_warm_up(app, listener))
     yield
-    await _db_instance.close()
+    app.state.ready = False
+    startup.cancel()
+    with suppress(asyncio.CancelledError):
+        await startup
+    if listener is not None:
+        await listener.stop()
+    STATS.unregister("price_cache")
+    STATS.unregister("price_index")
+    STATS.unregister("price_hub")
+    if read_db is not db:
+        await read_db.close()
+    await db.close()
 
 
 app = FastAPI(title="Deribit Client API", lifespan=lifespan)
-app.state.db = _db_instance
+app.state.db = None
+app.state.read_db = None
+app.state.ready = False
+app.state.price_cache = None
+app.state.price_index = None
+app.state.price_hub = None
+
+if settings.http_compression_enabled:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.http_compression_min_size)
+# добавленный последним - внешний: задержка в метриках включает сжатие
+app.add_middleware(RequestMetricsMiddleware)
 
 app.include_router(prices.router, prefix="/api/prices", tags=["prices"])
+app.include_router(analytics.router, prefix="/api/analytics", tags=["analytics"])
+app.include_router(metrics.router)
+app.include_router(health.router)
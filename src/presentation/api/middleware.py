@@ -0,0 +1,150 @@
+import asyncio
+import gzip
+import time
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from src.infrastructure.metrics import HTTP_REQUEST_LATENCY
+
+try:
+    import brotli
+except ImportError:
+    # brotli необязателен: без него ответы сжимаются только gzip
+    brotli = None
+
+UNMATCHED_ROUTE = "unmatched"
+EVENT_STREAM_MEDIA_TYPE = b"text/event-stream"
+
+
+# чистый ASGI, без BaseHTTPMiddleware: не заворачивает ответ в лишний поток и не трогает StreamingResponse.
+# Метка route - шаблон пути (/api/prices/by-date), а не сам путь, иначе число серий растет с каждым тикером
+class RequestMetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+        self._routes: Dict[object, str] = {}
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        if not self._routes:
+            self._routes = {route.endpoint: route.path for route in scope["app"].routes if hasattr(route, "endpoint")}
+        return self._routes.get(endpoint, UNMATCHED_ROUTE)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+        event_stream = False
+
+        async def send_with_status(message):
+            nonlocal status, event_stream
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                event_stream = any(
+                    name == b"content-type" and value.startswith(EVENT_STREAM_MEDIA_TYPE)
+                    for name, value in message.get("headers", ())
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # SSE живет, пока клиент подписан - его длительность не задержка запроса и только испортит гистограмму
+            if not event_stream:
+                HTTP_REQUEST_LATENCY.labels(scope["method"], self._route(scope), status).observe(
+                    time.perf_counter() - started
+                )
+
+
+COMPRESSIBLE_MEDIA_TYPES = ("application/json", "text/")
+# ответы динамические и сжимаются на каждый запрос: на JSON цен старшие уровни дают несколько процентов размера
+# за кратное время (3 МБ /all: brotli 1 - 14 мс и 495 КБ, brotli 4 - 65 мс и 494 КБ, gzip 1 - 28 мс и 562 КБ)
+GZIP_LEVEL = 1
+BROTLI_QUALITY = 1
+# сжатие больших тел уходит в поток (zlib и brotli отпускают GIL), мелкие быстрее сжать на месте
+THREAD_COMPRESSION_SIZE = 256 * 1024
+
+
+def _accepted_encoding(scope) -> Optional[str]:
+    accepted = set()
+    for item in Headers(scope=scope).get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        if params.replace(" ", "") not in ("q=0", "q=0.0"):
+            accepted.add(name.strip().lower())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+# сжимает только ответы одним куском (/all, /ohlc, аналитика). Потоковые (stream, export, SSE) идут как есть:
+# gzip поверх SSE задерживал бы события, а Arrow и Parquet сжимать бессмысленно.
+# В отличие от GZipMiddleware Starlette, меняет ETag сжатого ответа, чтобы он оставался строгим
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    def _eligible(self, headers: MutableHeaders, message) -> bool:
+        return (
+            not message.get("more_body", False)
+            and "content-encoding" not in headers
+            and headers.get("content-type", "").startswith(COMPRESSIBLE_MEDIA_TYPES)
+            and len(message.get("body", b"")) >= self.minimum_size
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = _accepted_encoding(scope)
+        pending_start = None
+
+        async def send_compressed(message):
+            nonlocal pending_start
+            if message["type"] == "http.response.start":
+                # заголовки придерживаются до первого куска тела: только по нему видно, ответ одним куском или поток.
+                # Ответы, которые не сжимаются при любом теле, идут сразу - SSE иначе ждал бы первого события
+                content_type = Headers(raw=message["headers"]).get("content-type", "")
+                if content_type.startswith(EVENT_STREAM_MEDIA_TYPE.decode()) or not content_type.startswith(
+                        COMPRESSIBLE_MEDIA_TYPES
+                ):
+                    await send(message)
+                    return
+                pending_start = message
+                return
+            if pending_start is None:
+                await send(message)
+                return
+            start, pending_start = pending_start, None
+            headers = MutableHeaders(raw=list(start["headers"]))
+            if self._eligible(headers, message):
+                # кэш перед API должен различать сжатый и несжатый ответ, даже если этот клиент сжатия не просил
+                headers.add_vary_header("Accept-Encoding")
+                if encoding is not None:
+                    body = message["body"]
+                    if len(body) >= THREAD_COMPRESSION_SIZE:
+                        body = await asyncio.to_thread(_compress, body, encoding)
+                    else:
+                        body = _compress(body, encoding)
+                    message = {**message, "body": body}
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(body))
+                    etag = headers.get("etag")
+                    if etag is not None and etag.endswith('"'):
+                        headers["ETag"] = f'{etag[:-1]}-{encoding}"'
+            await send({**start, "headers": headers.raw})
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
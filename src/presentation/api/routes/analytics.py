@@ -0,0 +1,99 @@
+from typing import Dict, List, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
+
+from src.application.use_cases.get_log_returns import GetLogReturnsUseCase
+from src.application.use_cases.get_moving_average import GetMovingAverageUseCase
+from src.application.use_cases.get_realized_volatility import GetRealizedVolatilityUseCase
+from src.application.use_cases.get_twap import GetTwapUseCase
+from src.domain.analytics import IndicatorSeries
+from src.domain.models import CANDLE_INTERVALS
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+from src.presentation.api.routes.prices import MAX_BATCH_TICKERS, MAX_CANDLES, get_repository
+from src.presentation.schemas.analytics_schemas import IndicatorResponse, TwapResponse, VolatilityResponse
+
+router = APIRouter()
+
+# все показатели считаются по серии, целиком загруженной в память: год минутных данных - около 8 МБ
+MAX_RANGE_SECONDS = 366 * 86400
+MAX_WINDOW = 100_000
+
+
+def _check_range(start: int, end: int) -> None:
+    if end <= start:
+        raise HTTPException(status_code=400, detail="'to' must be greater than 'from'")
+    if end - start > MAX_RANGE_SECONDS:
+        raise HTTPException(status_code=400, detail="Range is too long, at most 366 days")
+
+
+def _check_buckets(start: int, end: int, interval: str) -> None:
+    if (end - start) // CANDLE_INTERVALS[interval] > MAX_CANDLES:
+        raise HTTPException(status_code=400, detail="Too many windows, use a larger interval")
+
+
+def _indicator_response(indicator: IndicatorSeries) -> JSONResponse:
+    # tolist() отдает готовые int/float, pydantic на полмиллиона значений не нужен; схема - IndicatorResponse
+    return JSONResponse({
+        "ticker": indicator.ticker,
+        "timestamps": indicator.timestamps.tolist(),
+        "values": indicator.values.tolist(),
+    })
+
+
+@router.get("/returns", response_model=IndicatorResponse)
+async def get_log_returns(
+        ticker: str,
+        start: int = Query(..., alias="from"),
+        end: int = Query(..., alias="to"),
+        repository: PriceRepository = Depends(get_repository)
+):
+    _check_range(start, end)
+    return _indicator_response(await GetLogReturnsUseCase(repository).execute(ticker, start, end))
+
+
+@router.get("/moving-average", response_model=IndicatorResponse)
+async def get_moving_average(
+        ticker: str,
+        start: int = Query(..., alias="from"),
+        end: int = Query(..., alias="to"),
+        kind: Literal["sma", "ema"] = "sma",
+        window: int = Query(60, ge=1, le=MAX_WINDOW),
+        repository: PriceRepository = Depends(get_repository)
+):
+    _check_range(start, end)
+    use_case = GetMovingAverageUseCase(repository)
+    return _indicator_response(await use_case.execute(ticker, start, end, kind, window))
+
+
+@router.get("/volatility", response_model=List[VolatilityResponse])
+async def get_realized_volatility(
+        ticker: str,
+        start: int = Query(..., alias="from"),
+        end: int = Query(..., alias="to"),
+        interval: Literal["1m", "5m", "1h", "1d"] = "1d",
+        repository: PriceRepository = Depends(get_repository)
+):
+    _check_range(start, end)
+    _check_buckets(start, end, interval)
+    windows = await GetRealizedVolatilityUseCase(repository).execute(ticker, start, end, interval)
+    return [VolatilityResponse.model_validate(window) for window in windows]
+
+
+@router.get("/twap", response_model=Dict[str, List[TwapResponse]])
+async def get_twap(
+        ticker: List[str] = Query(...),
+        start: int = Query(..., alias="from"),
+        end: int = Query(..., alias="to"),
+        interval: Literal["1m", "5m", "1h", "1d"] = "1h",
+        repository: PriceRepository = Depends(get_repository)
+):
+    _check_range(start, end)
+    _check_buckets(start, end, interval)
+    if len(ticker) > MAX_BATCH_TICKERS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_TICKERS} tickers per request")
+    windows = await GetTwapUseCase(repository).execute(ticker, start, end, interval)
+    return {
+        window_ticker: [TwapResponse.model_validate(window) for window in ticker_windows]
+        for window_ticker, ticker_windows in windows.items()
+    }
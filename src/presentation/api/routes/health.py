@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+
+router = APIRouter()
+
+
+@router.get("/ready", include_in_schema=False)
+async def ready(request: Request) -> JSONResponse:
+    # 200 - пул открыт, запросы чтения подготовлены на всех min_size соединениях, LISTEN запущен.
+    # До этого и во время остановки - 503, чтобы балансировщик не слал трафик на холодный процесс
+    if getattr(request.app.state, "ready", False):
+        return JSONResponse({"status": "ready"})
+    return JSONResponse({"status": "starting"}, status_code=503)
@@ -1,33 +1,137 @@
-from typing import List
+import asyncio
+import json
+import re
+from typing import AsyncIterator, Dict, List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, status
+from fastapi.responses import StreamingResponse
 
-from src.application.use_cases.get_all_prices import GetAllPricesUseCase
+from src.application.use_cases.export_prices import ExportPricesUseCase
+from src.application.use_cases.get_candles import GetCandlesUseCase
 from src.application.use_cases.get_last_price import GetLastPriceUseCase
+from src.application.use_cases.get_last_prices import GetLastPricesUseCase
+from src.application.use_cases.get_price_as_of import GetPriceAsOfUseCase
 from src.application.use_cases.get_price_by_date import GetPriceByDateUseCase
+from src.application.use_cases.get_prices_json import GetPricesJsonUseCase
+from src.application.use_cases.get_prices_pages import GetPricesPagesUseCase
+from src.application.use_cases.get_prices_version import GetPricesVersionUseCase
+from src.application.use_cases.stream_all_prices import StreamAllPricesUseCase
+from src.domain.models import CANDLE_INTERVALS, Price
+from src.infrastructure.cache.price_cache import CachedPriceRepository
+from src.infrastructure.config import get_settings
 from src.infrastructure.database.repositories.price_repository import PriceRepository
-from src.presentation.schemas.price_schemas import PriceResponse
+from src.infrastructure.export.price_export import FILE_EXTENSIONS, MEDIA_TYPES
+from src.infrastructure.live.price_hub import HubFullError, PriceHub, Subscription
+from src.presentation.api.http_cache import caching_headers, etag_matches, is_closed, make_etag, not_modified
+from src.presentation.schemas.price_schemas import CandleResponse, PriceResponse
 
 router = APIRouter()
 
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+# через сколько браузерный EventSource переподключается после обрыва
+SSE_RETRY_MILLISECONDS = 3000
+NEXT_CURSOR_HEADER = "X-Next-Before"
+MAX_CANDLES = 10000
+MAX_BATCH_TICKERS = 100
+
 
 async def get_repository(request: Request) -> PriceRepository:
-    db = request.app.state.db
+    # все маршруты здесь только читают, поэтому берут пул реплики (без реплики это тот же основной пул)
+    db = getattr(request.app.state, "read_db", None) or request.app.state.db
+    cache = getattr(request.app.state, "price_cache", None)
+    price_index = getattr(request.app.state, "price_index", None)
+    if cache is not None or price_index is not None:
+        return CachedPriceRepository(db, cache, price_index, index_db=request.app.state.db)
     return PriceRepository(db)
 
 
+def _price_json(price: Price) -> str:
+    return json.dumps({"ticker": price.ticker, "price": price.price, "timestamp": price.timestamp})
+
+
+async def _ndjson_lines(chunks: AsyncIterator[List[Price]]) -> AsyncIterator[bytes]:
+    async for prices in chunks:
+        yield "".join(_price_json(price) + "\n" for price in prices).encode()
+
+
+async def _json_array(chunks: AsyncIterator[List[Price]]) -> AsyncIterator[bytes]:
+    # тот же JSON-массив, что и без stream, но собирается по кускам
+    yield b"["
+    first_chunk = True
+    async for prices in chunks:
+        body = ",".join(_price_json(price) for price in prices)
+        yield (body if first_chunk else "," + body).encode()
+        first_chunk = False
+    yield b"]"
+
+
 @router.get("/all", response_model=List[PriceResponse])
-async def get_all_prices(ticker: str, repository: PriceRepository = Depends(get_repository)):
-    use_case = GetAllPricesUseCase(repository)
-    prices = await use_case.execute(ticker)
-    price_responses = []
-    for price in prices:
-        price_responses.append(PriceResponse(
-            ticker=price.ticker,
-            price=price.price,
-            timestamp=price.timestamp
-        ))
-    return price_responses
+async def get_all_prices(
+        request: Request,
+        ticker: str,
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+        after: Optional[int] = None,
+        before: Optional[int] = None,
+        stream: bool = False,
+        repository: PriceRepository = Depends(get_repository)
+):
+    if stream:
+        chunks = StreamAllPricesUseCase(repository).execute(ticker, after=after, before=before)
+        if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+            return StreamingResponse(_ndjson_lines(chunks), media_type=NDJSON_MEDIA_TYPE)
+        return StreamingResponse(_json_array(chunks), media_type="application/json")
+
+    page_size = None
+    if limit is not None or after is not None or before is not None:
+        page_size = limit or DEFAULT_PAGE_SIZE
+    # закрытый диапазон не меняется, и ETag строится по параметрам без запроса в БД; у открытого - по числу строк,
+    # первому и последнему timestamp страницы (запрос по индексу). Совпал If-None-Match - 304 без сборки тела
+    closed = is_closed(before, get_settings().http_cache_immutable_after_seconds)
+    if closed:
+        etag = make_etag("all", ticker, page_size, after, before)
+    else:
+        version = await GetPricesVersionUseCase(repository).execute(ticker, page_size, after=after, before=before)
+        etag = make_etag("all", ticker, page_size, after, before, *version)
+    headers = caching_headers(etag, immutable=closed)
+    if etag_matches(request, etag):
+        return not_modified(headers)
+    # тело собирается в БД; response_model остается ради схемы OpenAPI, а готовый Response FastAPI не валидирует
+    body, count, last_timestamp = await GetPricesJsonUseCase(repository).execute(
+        ticker, page_size, after=after, before=before
+    )
+    response = Response(content=body, media_type="application/json", headers=headers)
+    if page_size is not None and count == page_size:
+        # следующая страница: тот же запрос с before=<timestamp последней записи>
+        response.headers[NEXT_CURSOR_HEADER] = str(last_timestamp)
+    return response
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {media_type: {} for media_type in MEDIA_TYPES.values()}}}
+)
+async def export_prices(
+        ticker: str,
+        fmt: Literal["csv", "arrow", "parquet"] = Query("csv", alias="format"),
+        after: Optional[int] = None,
+        before: Optional[int] = None,
+        repository: PriceRepository = Depends(get_repository)
+):
+    # история по возрастанию времени файлом CSV, Arrow IPC stream или Parquet; читается COPY кусками,
+    # память не зависит от длины диапазона
+    settings = get_settings()
+    body = ExportPricesUseCase(repository).execute(
+        ticker, fmt, after=after, before=before,
+        timeout=settings.export_timeout, batch_bytes=settings.export_batch_bytes
+    )
+    filename = f"{re.sub(r'[^A-Za-z0-9_-]', '_', ticker)}.{FILE_EXTENSIONS[fmt]}"
+    return StreamingResponse(
+        body, media_type=MEDIA_TYPES[fmt], headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
 @router.get("/last", response_model=PriceResponse)
@@ -41,12 +145,189 @@ async def get_last_price(ticker: str, repository: PriceRepository = Depends(get_
 
 @router.get("/by-date", response_model=PriceResponse)
 async def get_price_by_date(
+        request: Request,
+        response: Response,
         ticker: str,
         date: int,
+        mode: Literal["exact", "as_of", "nearest"] = "exact",
+        tolerance: int = Query(60, ge=0),
         repository: PriceRepository = Depends(get_repository)
 ):
-    use_case = GetPriceByDateUseCase(repository)
-    price = await use_case.execute(ticker, date)
+    # цена на точный момент, раз записанная, не меняется; as_of и nearest - пока рядом с date могут прийти новые цены
+    window_end = date + 1 if mode == "as_of" else date + tolerance + 1
+    immutable = mode == "exact" or is_closed(window_end, get_settings().http_cache_immutable_after_seconds)
+    params_etag = make_etag("by-date", ticker, date, mode, tolerance if mode == "nearest" else None)
+    if immutable and etag_matches(request, params_etag):
+        return not_modified(caching_headers(params_etag, immutable=True))
+    if mode == "exact":
+        use_case = GetPriceByDateUseCase(repository)
+        price = await use_case.execute(ticker, date)
+    else:
+        use_case = GetPriceAsOfUseCase(repository)
+        price = await use_case.execute(ticker, date, tolerance if mode == "nearest" else None)
     if not price:
         raise HTTPException(status_code=404, detail="Price not found")
+    etag = params_etag if immutable else make_etag("by-date", ticker, date, mode, tolerance, price.timestamp)
+    headers = caching_headers(etag, immutable=immutable)
+    if etag_matches(request, etag):
+        return not_modified(headers)
+    response.headers.update(headers)
     return PriceResponse(ticker=price.ticker, price=price.price, timestamp=price.timestamp)
+
+
+@router.get("/ohlc", response_model=List[CandleResponse])
+async def get_candles(
+        request: Request,
+        response: Response,
+        ticker: str,
+        start: int = Query(..., alias="from"),
+        end: int = Query(..., alias="to"),
+        interval: Literal["1m", "5m", "1h", "1d"] = "1h",
+        repository: PriceRepository = Depends(get_repository)
+):
+    if end <= start:
+        raise HTTPException(status_code=400, detail="'to' must be greater than 'from'")
+    if (end - start) // CANDLE_INTERVALS[interval] > MAX_CANDLES:
+        raise HTTPException(status_code=400, detail="Too many candles, use a larger interval")
+    closed = is_closed(end, get_settings().http_cache_immutable_after_seconds)
+    if closed:
+        etag = make_etag("ohlc", ticker, start, end, interval)
+    else:
+        # свечи [from, to) меняются, только когда в диапазон добавляются цены
+        version = await GetPricesVersionUseCase(repository).execute(ticker, after=start - 1, before=end)
+        etag = make_etag("ohlc", ticker, start, end, interval, *version)
+    headers = caching_headers(etag, immutable=closed)
+    if etag_matches(request, etag):
+        return not_modified(headers)
+    response.headers.update(headers)
+    use_case = GetCandlesUseCase(repository)
+    candles = await use_case.execute(ticker, start, end, interval)
+    return [CandleResponse.model_validate(candle) for candle in candles]
+
+
+def _batch_tickers(tickers: List[str]) -> List[str]:
+    if len(tickers) > MAX_BATCH_TICKERS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_TICKERS} tickers per request")
+    return tickers
+
+
+@router.get("/batch/last", response_model=Dict[str, PriceResponse])
+async def get_last_prices(
+        ticker: List[str] = Query(...),
+        repository: PriceRepository = Depends(get_repository)
+):
+    use_case = GetLastPricesUseCase(repository)
+    prices = await use_case.execute(_batch_tickers(ticker))
+    return {
+        price_ticker: PriceResponse(ticker=price.ticker, price=price.price, timestamp=price.timestamp)
+        for price_ticker, price in prices.items()
+    }
+
+
+@router.get("/batch/all", response_model=Dict[str, List[PriceResponse]])
+async def get_prices_pages(
+        ticker: List[str] = Query(...),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        after: Optional[int] = None,
+        before: Optional[int] = None,
+        repository: PriceRepository = Depends(get_repository)
+):
+    use_case = GetPricesPagesUseCase(repository)
+    pages = await use_case.execute(_batch_tickers(ticker), limit, after=after, before=before)
+    return {
+        page_ticker: [PriceResponse(ticker=p.ticker, price=p.price, timestamp=p.timestamp) for p in prices]
+        for page_ticker, prices in pages.items()
+    }
+
+
+async def _sse_events(hub: PriceHub, subscription: Subscription, keepalive: float) -> AsyncIterator[bytes]:
+    # клиент, не успевающий читать, получает только последнюю цену тикера: промежуточные схлопывает Subscription.
+    # Первым уходит retry: заголовки и начало потока доходят до клиента сразу, не дожидаясь первой цены
+    try:
+        yield f"retry: {SSE_RETRY_MILLISECONDS}\n\n".encode()
+        while True:
+            try:
+                messages = await asyncio.wait_for(subscription.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            yield "".join(f"event: price\ndata: {message}\n\n" for message in messages).encode()
+    finally:
+        hub.unsubscribe(subscription)
+
+
+class _SubscriptionStreamingResponse(StreamingResponse):
+    # клиент может уйти раньше, чем Starlette начнет перебирать генератор, - тогда finally генератора не выполнится
+    # никогда и слот подписки останется занят; здесь подписка освобождается, как бы ни закончился ответ
+    def __init__(self, content, hub: PriceHub, subscription: Subscription, **kwargs):
+        super().__init__(content, **kwargs)
+        self._hub = hub
+        self._subscription = subscription
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._hub.unsubscribe(self._subscription)
+
+
+@router.get("/live", response_class=StreamingResponse, responses={200: {"content": {EVENT_STREAM_MEDIA_TYPE: {}}}})
+async def live_prices(request: Request, ticker: List[str] = Query(...)):
+    # Server-Sent Events: сначала последняя известная цена каждого тикера, дальше - каждая новая из LISTEN
+    hub = getattr(request.app.state, "price_hub", None)
+    if hub is None:
+        raise HTTPException(status_code=503, detail="Live feed is disabled")
+    try:
+        subscription = hub.subscribe(_batch_tickers(ticker))
+    except HubFullError as error:
+        raise HTTPException(status_code=503, detail=str(error))
+    return _SubscriptionStreamingResponse(
+        _sse_events(hub, subscription, get_settings().live_feed_keepalive_seconds),
+        hub,
+        subscription,
+        media_type=EVENT_STREAM_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _send_prices(websocket: WebSocket, subscription: Subscription) -> None:
+    while True:
+        for message in await subscription.get():
+            await websocket.send_text(message)
+
+
+async def _wait_disconnect(websocket: WebSocket) -> None:
+    # входящие сообщения не нужны, но читать их надо, иначе закрытие соединения клиентом не заметить
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@router.websocket("/live/ws")
+async def live_prices_ws(websocket: WebSocket, ticker: List[str] = Query(...)):
+    # то же, что /live, но по WebSocket: одно текстовое сообщение JSON на цену
+    hub = getattr(websocket.app.state, "price_hub", None)
+    if hub is None:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        return
+    if len(ticker) > MAX_BATCH_TICKERS:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    try:
+        subscription = hub.subscribe(ticker)
+    except HubFullError:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        return
+    try:
+        await websocket.accept()
+        tasks = {
+            asyncio.create_task(_send_prices(websocket, subscription)),
+            asyncio.create_task(_wait_disconnect(websocket)),
+        }
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        # отправка в закрытый сокет падает - это тот же разрыв соединения, не ошибка
+        for task in done:
+            task.exception()
+    finally:
+        hub.unsubscribe(subscription)
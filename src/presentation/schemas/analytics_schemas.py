@@ -0,0 +1,32 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+class IndicatorResponse(BaseModel):
+    # колонками, а не объектом на точку: год минутных данных - полмиллиона значений
+    ticker: str
+    timestamps: List[int]
+    values: List[float]
+
+
+class VolatilityResponse(BaseModel):
+    ticker: str
+    bucket: int
+    volatility: float
+    annualized: float
+    count: int
+
+    class Config:
+        from_attributes = True
+
+
+class TwapResponse(BaseModel):
+    ticker: str
+    bucket: int
+    twap: float
+    mean: float
+    count: int
+
+    class Config:
+        from_attributes = True
@@ -8,3 +8,17 @@ class PriceResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class CandleResponse(BaseModel):
+    ticker: str
+    bucket: int
+    open: float
+    high: float
+    low: float
+    close: float
+    mean: float
+    count: int
+
+    class Config:
+        from_attributes = True
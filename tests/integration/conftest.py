@@ -0,0 +1,29 @@
+import os
+
+import pytest
+
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+# интеграционные тесты ходят в настоящий PostgreSQL и пропускаются, если TEST_DATABASE_URL не задан
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+@pytest.fixture
+async def database():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    db = Database(TEST_DATABASE_URL)
+    await db.connect()
+    pool = await db.get_pool()
+    async with pool.acquire() as conn:
+        await conn.execute("DROP TABLE IF EXISTS prices, price_rollups, tickers CASCADE")
+    yield db
+    await db.close()
+
+
+@pytest.fixture
+async def repository(database):
+    repo = PriceRepository(database)
+    await repo.create_table_if_not_exists()
+    return repo
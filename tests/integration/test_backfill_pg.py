@@ -0,0 +1,60 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.domain.models import Price, PriceGap
+from src.infrastructure.tasks.backfill_gaps import backfill_gaps
+
+START = 1_700_000_000
+
+
+@pytest.mark.asyncio
+async def test_find_gaps_single_pass(repository):
+    # BTC: минута данных, дыра 10 минут, еще минута; ETH: без дыр до конца окна
+    btc = [START + i * 60 for i in range(5)] + [START + 840 + i * 60 for i in range(5)]
+    eth = [START + i * 60 for i in range(20)]
+    await repository.save_many([Price(ticker="BTC_USD", price=1.0, timestamp=t) for t in btc])
+    await repository.save_many([Price(ticker="ETH_USD", price=1.0, timestamp=t) for t in eth])
+
+    gaps = await repository.find_gaps(["BTC_USD", "ETH_USD"], START, START + 1200, 100)
+
+    assert gaps == [
+        PriceGap(ticker="BTC_USD", start=START + 240, end=START + 840),
+        PriceGap(ticker="BTC_USD", start=START + 1080, end=START + 1200),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_find_gaps_when_window_opens_inside_a_gap(repository):
+    # BTC: данные обрываются за 10 минут до окна и возвращаются через 10 минут после его начала;
+    # ETH: точки только до окна - остановка длится все окно; SOL: данные идут через границу окна без дыр
+    await repository.save_many([Price(ticker="BTC_USD", price=1.0, timestamp=START + t) for t in (-660, -600, 600, 660)])
+    await repository.save_many([Price(ticker="ETH_USD", price=1.0, timestamp=START + t) for t in (-120, -60)])
+    await repository.save_many([Price(ticker="SOL_USD", price=1.0, timestamp=START + t) for t in range(-60, 1200, 60)])
+
+    gaps = await repository.find_gaps(["BTC_USD", "ETH_USD", "SOL_USD"], START, START + 1200, 100)
+
+    assert gaps == [
+        PriceGap(ticker="BTC_USD", start=START, end=START + 600),
+        PriceGap(ticker="BTC_USD", start=START + 660, end=START + 1200),
+        PriceGap(ticker="ETH_USD", start=START, end=START + 1200),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_backfill_fills_gaps_and_rerun_is_noop(repository):
+    await repository.save_many([Price(ticker="BTC_USD", price=1.0, timestamp=START + t) for t in (0, 60, 900, 960)])
+    client = MagicMock()
+    client.get_index_history = AsyncMock(
+        return_value=[Price(ticker="BTC_USD", price=2.0, timestamp=START + t) for t in range(0, 1020, 60)]
+    )
+
+    report = await backfill_gaps(repository, client, ["btc_usd"], START, START + 1000, 120)
+    assert report.rows == 13
+    saved = await repository.get_all_by_ticker("BTC_USD")
+    assert [price.timestamp for price in saved] == [START + t for t in range(960, -1, -60)]
+    # существующие точки не перезаписаны
+    assert saved[0].price == 1.0
+
+    report = await backfill_gaps(repository, client, ["btc_usd"], START, START + 1000, 120)
+    assert report.gaps == 0
+    assert report.rows == 0
@@ -0,0 +1,50 @@
+import pytest
+
+from src.domain.models import Price
+from src.infrastructure.database.repositories.price_repository import (
+    LEGACY_TICKER_TIMESTAMP_INDEX,
+    TICKER_TIMESTAMP_INDEX,
+    PriceRepository,
+)
+from src.infrastructure.tasks.dedup_prices import deduplicate_prices
+
+DAY = 86400
+START = 1_700_000_000
+
+
+@pytest.mark.asyncio
+async def test_dedup_removes_duplicates_and_installs_unique_index(database):
+    # база в состоянии до уникального индекса: неуникальный idx_ticker_timestamp и дубли в истории
+    repository = PriceRepository(database)
+    await repository.create_table_if_not_exists()
+    pool = await database.get_pool()
+    async with pool.acquire() as conn:
+        await conn.execute(f"DROP INDEX {TICKER_TIMESTAMP_INDEX}")
+        await conn.execute(f"CREATE INDEX {LEGACY_TICKER_TIMESTAMP_INDEX} ON prices (ticker_id, timestamp DESC)")
+    # второй экземпляр репозитория видит старый индекс и уникальный не создает
+    await PriceRepository(database).create_table_if_not_exists()
+
+    prices = [Price(ticker="BTC_USD", price=100.0 + i, timestamp=START + i * 3000) for i in range(1000)]
+    await repository.save_many(prices)
+    await repository.save_many(prices[:300])
+    await repository.save_many(prices[:100])
+    assert len(await repository.get_all_by_ticker("BTC_USD")) == 1400
+
+    assert await deduplicate_prices(repository, batch_seconds=DAY) == 400
+
+    assert await repository.get_all_by_ticker("BTC_USD") == prices[::-1]
+    async with pool.acquire() as conn:
+        assert await conn.fetchval(f"SELECT to_regclass('{LEGACY_TICKER_TIMESTAMP_INDEX}')") is None
+        assert await conn.fetchval(
+            "SELECT indisvalid AND indisunique FROM pg_index WHERE indexrelid = to_regclass($1)", TICKER_TIMESTAMP_INDEX
+        )
+    # свечи пересчитаны без дублей
+    day_start = START // DAY * DAY
+    candles = await repository.get_rollup_candles("BTC_USD", day_start, day_start + DAY, DAY)
+    raw = await repository.get_candles("BTC_USD", day_start, day_start + DAY, DAY)
+    assert [candle.count for candle in candles] == [candle.count for candle in raw]
+
+    # дальше запись идемпотентна, повторный запуск ничего не делает
+    await repository.save_many(prices[:10])
+    assert len(await repository.get_all_by_ticker("BTC_USD")) == 1000
+    assert await deduplicate_prices(repository) == 0
@@ -0,0 +1,35 @@
+import asyncio
+
+import pytest
+
+from src.domain.models import Price
+from src.infrastructure.cache.price_cache import LatestPriceCache
+from src.infrastructure.database.notifications import PriceUpdateListener
+
+
+@pytest.mark.asyncio
+async def test_inserts_refresh_cache_through_notify(repository):
+    cache = LatestPriceCache()
+    listener = PriceUpdateListener(repository.db.database_url)
+    listener.on_state_change(cache.set_enabled)
+    received = asyncio.Queue()
+    listener.subscribe(cache.update)
+    listener.subscribe(received.put_nowait)
+    await listener.start()
+
+    try:
+        await repository.save_many([
+            Price(ticker="BTC_USD", price=50000.0, timestamp=1000),
+            Price(ticker="BTC_USD", price=50100.0, timestamp=1060),
+            Price(ticker="ETH_USD", price=3000.0, timestamp=1000)
+        ])
+        await repository.save(Price(ticker="ETH_USD", price=3010.0, timestamp=1060))
+
+        # одно уведомление на тикер за вставку, с самой свежей ценой
+        updates = [await asyncio.wait_for(received.get(), timeout=2) for _ in range(3)]
+    finally:
+        await listener.stop()
+
+    assert sorted((p.ticker, p.timestamp) for p in updates) == [("BTC_USD", 1060), ("ETH_USD", 1000), ("ETH_USD", 1060)]
+    assert received.empty()
+    assert not cache.enabled
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from src.domain.models import Price
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.partitions import list_partitions, month_start, next_month_start, partition_name
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+from src.infrastructure.tasks.migrate_schema import migrate_legacy_prices
+from src.infrastructure.tasks.retention import apply_retention
+
+DAY = 86400
+NOW = 1_700_000_000
+
+
+async def _partition_names(db):
+    pool = await db.get_pool()
+    async with pool.acquire() as conn:
+        return [name for name, _, _ in await list_partitions(conn)]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_schema_creation_does_not_conflict(database):
+    # как дочерние процессы prefork: у каждого свой пул, схема создается одновременно на пустой базе
+    databases = [Database(database.database_url, name=f"worker-{n}") for n in range(4)]
+    try:
+        await asyncio.gather(*(PriceRepository(db).create_table_if_not_exists() for db in databases))
+    finally:
+        await asyncio.gather(*(db.close() for db in databases))
+
+    repository = PriceRepository(database)
+    await repository.save(Price(ticker="BTC_USD", price=1.0, timestamp=NOW))
+    assert (await repository.get_last_by_ticker("BTC_USD")).price == 1.0
+
+
+@pytest.mark.asyncio
+async def test_writes_create_partitions_on_demand(repository):
+    old = Price(ticker="BTC_USD", price=1.5, timestamp=NOW - 400 * DAY)
+    await repository.save(old)
+    await repository.save_many([Price(ticker="BTC_USD", price=2.5, timestamp=NOW)])
+
+    assert await repository.get_all_by_ticker("BTC_USD") == [
+        Price(ticker="BTC_USD", price=2.5, timestamp=NOW), old
+    ]
+    expected = {partition_name(month_start(old.timestamp)), partition_name(month_start(NOW))}
+    assert expected <= set(await _partition_names(repository.db))
+
+
+@pytest.mark.asyncio
+async def test_retention_drops_whole_partitions(repository):
+    await repository.save_many([
+        Price(ticker="BTC_USD", price=1.0, timestamp=NOW - 100 * DAY),
+        Price(ticker="BTC_USD", price=2.0, timestamp=NOW - 10 * DAY),
+        Price(ticker="BTC_USD", price=3.0, timestamp=NOW)
+    ])
+
+    dropped = await apply_retention(repository, retention_days=30, now=NOW)
+
+    # секция удаляется, только если целиком старше срока хранения
+    assert "prices_p202308" in dropped
+    assert "prices_p202310" not in dropped
+    assert [p.price for p in await repository.get_all_by_ticker("BTC_USD")] == [3.0, 2.0]
+    # и заодно созданы секции наперед
+    names = await _partition_names(repository.db)
+    assert "prices_p202401" in names
+
+
+@pytest.mark.asyncio
+async def test_migrates_legacy_table(database):
+    pool = await database.get_pool()
+    async with pool.acquire() as conn:
+        await conn.execute("""
+            CREATE TABLE prices (
+                id SERIAL PRIMARY KEY,
+                ticker VARCHAR(10) NOT NULL,
+                price DECIMAL(20, 8) NOT NULL,
+                timestamp BIGINT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        await conn.execute("CREATE INDEX idx_ticker_timestamp ON prices(ticker, timestamp DESC)")
+        await conn.execute("""
+            INSERT INTO prices (ticker, price, timestamp)
+            SELECT CASE WHEN n % 2 = 0 THEN 'BTC_USD' ELSE 'ETH_USD' END, n + 0.12345678, $1 + n * 3600
+            FROM generate_series(0, 999) AS n
+        """, NOW)
+
+    repository = PriceRepository(database)
+    with pytest.raises(RuntimeError):
+        await repository.create_table_if_not_exists()
+
+    assert await migrate_legacy_prices(database, repository, chunk_days=7) == 1000
+
+    btc = await repository.get_all_by_ticker("BTC_USD")
+    assert len(btc) == 500
+    assert btc[0] == Price(ticker="BTC_USD", price=998.12345678, timestamp=NOW + 998 * 3600)
+    async with pool.acquire() as conn:
+        assert await conn.fetchval("SELECT to_regclass('prices_legacy')") is None
+    # история разложена по месячным секциям
+    assert len(await _partition_names(database)) >= 3
+
+    # повторный запуск ничего не делает, новая схема продолжает работать
+    assert await migrate_legacy_prices(database, repository) == 0
+    await repository.save(Price(ticker="ETH_USD", price=1.0, timestamp=next_month_start(NOW + 1000 * 3600)))
+    assert (await repository.get_last_by_ticker("ETH_USD")).price == 1.0
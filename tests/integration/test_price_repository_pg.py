@@ -0,0 +1,253 @@
+import json
+from contextlib import AsyncExitStack
+
+import pyarrow as pa
+import pytest
+
+from src.domain.models import Price
+from src.infrastructure.database.buffered_writer import BufferedPriceWriter
+from src.infrastructure.database.repositories.price_repository import READ_QUERIES
+from src.infrastructure.export.price_export import encode_prices
+
+
+@pytest.mark.asyncio
+async def test_save_many_copies_rows(repository):
+    prices = [Price(ticker="BTC_USD", price=50000.12345678 + i, timestamp=1234567890 + i) for i in range(100)]
+
+    await repository.save_many(prices)
+
+    saved = await repository.get_all_by_ticker("BTC_USD")
+    assert len(saved) == 100
+    assert saved[0] == Price(ticker="BTC_USD", price=50099.12345678, timestamp=1234567989)
+
+
+@pytest.mark.asyncio
+async def test_repeated_writes_are_idempotent(repository):
+    # повтор задачи после retry пишет те же (ticker, timestamp) - ни дублей, ни удвоенных свечей
+    prices = [Price(ticker="BTC_USD", price=100.0 + i, timestamp=7200 + i * 60) for i in range(30)]
+    await repository.save_many(prices)
+    await repository.save_many(prices + [prices[0]])
+    await repository.save(prices[-1])
+    await repository.save(Price(ticker="BTC_USD", price=1.0, timestamp=prices[5].timestamp))
+
+    assert await repository.get_all_by_ticker("BTC_USD") == prices[::-1]
+    assert await repository.get_by_ticker_and_date("BTC_USD", prices[5].timestamp) == prices[5]
+    candles = await repository.get_rollup_candles("BTC_USD", 7200, 9000, 3600)
+    assert [candle.count for candle in candles] == [30]
+    assert candles[0].low == 100.0
+
+
+@pytest.mark.asyncio
+async def test_buffered_writer_persists_everything_on_close(repository):
+    async with BufferedPriceWriter(repository, max_batch_size=64, flush_interval=10) as writer:
+        for i in range(1000):
+            await writer.write(Price(ticker="ETH_USD", price=3000.0 + i, timestamp=1234567890 + i))
+
+    saved = await repository.get_all_by_ticker("ETH_USD")
+    assert len(saved) == 1000
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_cover_history(repository):
+    await repository.save_many([Price(ticker="BTC_USD", price=100.0 + i, timestamp=1000 + i) for i in range(25)])
+
+    seen = []
+    before = None
+    while True:
+        body, count, last_timestamp = await repository.get_page_json("BTC_USD", 10, before=before)
+        seen.extend(price["timestamp"] for price in json.loads(body))
+        if count < 10:
+            break
+        before = last_timestamp
+
+    assert seen == list(range(1024, 999, -1))
+
+
+def _fastapi_body(prices):
+    # так /all сериализовал ответ раньше: PriceResponse -> jsonable -> JSONResponse.render
+    return json.dumps(
+        [{"ticker": p.ticker, "price": p.price, "timestamp": p.timestamp} for p in prices],
+        ensure_ascii=False, separators=(",", ":")
+    ).encode()
+
+
+@pytest.mark.asyncio
+async def test_page_json_matches_old_serialization(repository):
+    prices = [
+        Price(ticker="BTC_USD", price=price, timestamp=1000 + i)
+        for i, price in enumerate([50000.0, 0.1, 65432.12345678, 1e-7, 123456789012.0, -3.0, 1 / 3])
+    ]
+    await repository.save_many(prices)
+
+    body, count, last_timestamp = await repository.get_page_json("BTC_USD")
+    assert body == _fastapi_body(await repository.get_all_by_ticker("BTC_USD"))
+    assert (count, last_timestamp) == (7, 1000)
+
+    body, count, last_timestamp = await repository.get_page_json("BTC_USD", 3, after=1000, before=1006)
+    history = await repository.get_all_by_ticker("BTC_USD")
+    assert body == _fastapi_body([price for price in history if 1000 < price.timestamp < 1006][:3])
+    assert (count, last_timestamp) == (3, 1003)
+
+    assert await repository.get_page_json("UNKNOWN") == (b"[]", 0, None)
+
+
+@pytest.mark.asyncio
+async def test_page_version_changes_with_page(repository):
+    await repository.save_many([Price(ticker="BTC_USD", price=1.0, timestamp=1000 + i) for i in range(5)])
+
+    assert await repository.get_page_version("BTC_USD") == (5, 1000, 1004)
+    assert await repository.get_page_version("BTC_USD", 2, before=1004) == (2, 1002, 1003)
+    assert await repository.get_page_version("UNKNOWN") == (0, None, None)
+
+    # дозагруженная в середину цена меняет версию, хотя последний timestamp тот же
+    await repository.save_many([Price(ticker="BTC_USD", price=1.0, timestamp=999)])
+    assert await repository.get_page_version("BTC_USD", after=998) == (6, 999, 1004)
+
+    # полная страница: дозагруженная внутрь цена вытесняет самую старую, число строк и максимум не меняются
+    await repository.save_many([Price(ticker="BTC_USD", price=1.0, timestamp=t) for t in (1010, 1020, 1030)])
+    before = await repository.get_page_version("BTC_USD", 3, after=1000)
+    await repository.save_many([Price(ticker="BTC_USD", price=1.0, timestamp=1025)])
+    after = await repository.get_page_version("BTC_USD", 3, after=1000)
+    assert before == (3, 1010, 1030)
+    assert after == (3, 1020, 1030)
+
+@pytest.mark.asyncio
+async def test_export_round_trips_through_arrow(repository):
+    prices = [Price(ticker="BTC_USD", price=100.0 + i / 3, timestamp=1000 + i) for i in range(5000)]
+    await repository.save_many(prices)
+
+    chunks = encode_prices(repository.iter_csv("BTC_USD", after=1000, before=4999), "arrow", batch_bytes=16384)
+    table = pa.ipc.open_stream(b"".join([chunk async for chunk in chunks])).read_all()
+
+    assert [Price(**row) for row in table.to_pylist()] == prices[1:3999]
+
+
+@pytest.mark.asyncio
+async def test_abandoned_export_releases_connection(repository):
+    await repository.save_many([Price(ticker="BTC_USD", price=1.0, timestamp=i) for i in range(20000)])
+    pool = await repository.db.get_pool()
+
+    chunks = repository.iter_csv("BTC_USD")
+    assert isinstance(await chunks.__anext__(), bytes)
+    await chunks.aclose()
+
+    assert pool.get_idle_size() == pool.get_size()
+    assert await repository.get_last_by_ticker("BTC_USD") == Price(ticker="BTC_USD", price=1.0, timestamp=19999)
+
+
+@pytest.mark.asyncio
+async def test_price_series_matches_price_lists(repository):
+    prices = [Price(ticker="BTC_USD", price=100.0 + i / 7, timestamp=1000 + i) for i in range(50)]
+    await repository.save_many(prices)
+
+    series = await repository.get_price_series("BTC_USD", after=1009, before=1040)
+
+    assert series.to_prices() == prices[10:40]
+    assert (await repository.get_price_series("BTC_USD")).to_prices() == prices
+    assert len(await repository.get_price_series("UNKNOWN")) == 0
+
+
+@pytest.mark.asyncio
+async def test_price_series_by_tickers_in_one_query(repository):
+    await repository.save_many([
+        Price(ticker=ticker, price=10.0 * n + i, timestamp=1000 + i * 60)
+        for n, ticker in enumerate(["BTC_USD", "ETH_USD"], start=1)
+        for i in range(30)
+    ])
+
+    series = await repository.get_price_series_by_tickers(["BTC_USD", "ETH_USD", "UNKNOWN"], after=1100, before=2000)
+
+    assert set(series) == {"BTC_USD", "ETH_USD"}
+    for ticker in ["BTC_USD", "ETH_USD"]:
+        assert series[ticker] == await repository.get_price_series(ticker, after=1100, before=2000)
+    assert len((await repository.get_price_series_by_tickers(["BTC_USD"], after=5000))["BTC_USD"]) == 0
+
+
+@pytest.mark.asyncio
+async def test_iter_by_ticker_uses_chunks(repository):
+    await repository.save_many([Price(ticker="BTC_USD", price=100.0 + i, timestamp=1000 + i) for i in range(25)])
+
+    chunks = [chunk async for chunk in repository.iter_by_ticker("BTC_USD", after=1004, chunk_size=7)]
+
+    assert [len(chunk) for chunk in chunks] == [7, 7, 6]
+    assert chunks[0][0].timestamp == 1024
+    assert chunks[-1][-1].timestamp == 1005
+
+
+@pytest.mark.asyncio
+async def test_candles_match_python_aggregation(repository):
+    prices = [Price(ticker="BTC_USD", price=100.0 + (i * 7) % 13, timestamp=3600 * 10 + i * 45) for i in range(400)]
+    await repository.save_many(prices)
+
+    candles = await repository.get_candles("BTC_USD", 3600 * 10, 3600 * 14, 3600)
+
+    buckets = {}
+    for price in prices:
+        if price.timestamp < 3600 * 14:
+            buckets.setdefault(price.timestamp // 3600 * 3600, []).append(price)
+    assert [candle.bucket for candle in candles] == sorted(buckets)
+    for candle in candles:
+        bucket_prices = sorted(buckets[candle.bucket], key=lambda p: p.timestamp)
+        values = [p.price for p in bucket_prices]
+        assert candle.open == values[0]
+        assert candle.close == values[-1]
+        assert candle.high == max(values)
+        assert candle.low == min(values)
+        assert candle.count == len(values)
+        assert candle.mean == pytest.approx(sum(values) / len(values))
+
+
+@pytest.mark.asyncio
+async def test_as_of_queries_match_sorted_index(repository):
+    from src.infrastructure.cache.price_index import TickerSeries
+
+    timestamps = [1000, 1060, 1060, 1200, 1500]
+    await repository.save_many([Price(ticker="BTC_USD", price=float(ts), timestamp=ts) for ts in timestamps])
+    series = TickerSeries(start=0)
+    series.extend(*await repository.get_series_since("BTC_USD", 0))
+
+    def as_tuple(price):
+        return (price.timestamp, price.price) if price else None
+
+    for timestamp in [999, 1000, 1059, 1061, 1130, 1350, 2000]:
+        assert as_tuple(await repository.get_at_or_before("BTC_USD", timestamp)) == series.at_or_before(timestamp)
+        for tolerance in [0, 30, 150]:
+            db_price = await repository.get_nearest("BTC_USD", timestamp, tolerance)
+            assert as_tuple(db_price) == series.nearest(timestamp, tolerance)
+
+
+@pytest.mark.asyncio
+async def test_batch_queries_match_single_ticker_queries(repository):
+    await repository.save_many([
+        Price(ticker=ticker, price=100.0 * n + i, timestamp=1000 + i * 60)
+        for n, ticker in enumerate(["BTC_USD", "ETH_USD", "SOL_USD"], start=1)
+        for i in range(20)
+    ])
+    tickers = ["BTC_USD", "ETH_USD", "SOL_USD", "UNKNOWN"]
+
+    last = await repository.get_last_by_tickers(tickers)
+    pages = await repository.get_pages_by_tickers(tickers, 5, after=1100, before=2000)
+
+    assert set(last) == {"BTC_USD", "ETH_USD", "SOL_USD"}
+    assert pages["UNKNOWN"] == []
+    for ticker in ["BTC_USD", "ETH_USD", "SOL_USD"]:
+        assert last[ticker] == await repository.get_last_by_ticker(ticker)
+        history = await repository.get_all_by_ticker(ticker)
+        assert pages[ticker] == [price for price in history if 1100 < price.timestamp < 2000][:5]
+
+
+@pytest.mark.asyncio
+async def test_warm_up_prepares_read_queries_on_pooled_connections(repository):
+    await repository.warm_up()
+    await repository.save(Price(ticker="BTC_USD", price=100.0, timestamp=1234567890))
+
+    pool = await repository.db.get_pool()
+    async with AsyncExitStack() as stack:
+        connections = [await stack.enter_async_context(pool.acquire()) for _ in range(pool.get_min_size())]
+        for conn in connections:
+            prepared = await conn.fetchval("SELECT count(*) FROM pg_prepared_statements")
+            assert prepared >= len(READ_QUERIES)
+
+    # подготовленные запросы переживают возврат соединения в пул (RESET ALL)
+    assert await repository.get_last_by_ticker("BTC_USD") == Price(ticker="BTC_USD", price=100.0, timestamp=1234567890)
+    assert await repository.get_at_or_before("BTC_USD", 1234567899) is not None
@@ -0,0 +1,92 @@
+import random
+
+import pytest
+
+from src.domain.models import Price
+from src.infrastructure.database.repositories.price_repository import ROLLUP_INTERVAL_SECONDS
+from src.infrastructure.tasks.backfill_rollups import backfill_rollups
+
+DAY = 86400
+
+
+def _history(ticker, count, seed):
+    rng = random.Random(seed)
+    start = 20 * DAY - 5 * 3600
+    return [
+        Price(ticker=ticker, price=round(100 + rng.uniform(-5, 5), 8), timestamp=start + rng.randrange(0, 3 * DAY))
+        for _ in range(count)
+    ]
+
+
+async def _assert_rollups_match_raw(repository, ticker):
+    for interval_seconds in ROLLUP_INTERVAL_SECONDS:
+        start, end = 18 * DAY, 24 * DAY
+        raw = await repository.get_candles(ticker, start, end, interval_seconds)
+        rolled = await repository.get_rollup_candles(ticker, start, end, interval_seconds)
+        assert len(rolled) == len(raw) > 0
+        for rolled_candle, raw_candle in zip(rolled, raw):
+            assert rolled_candle.bucket == raw_candle.bucket
+            assert rolled_candle.count == raw_candle.count
+            assert rolled_candle.high == raw_candle.high
+            assert rolled_candle.low == raw_candle.low
+            assert rolled_candle.mean == pytest.approx(raw_candle.mean)
+            # при одинаковом timestamp open/close неоднозначны, сравниваем с допустимыми значениями
+            assert rolled_candle.open in await _prices_at_edge(repository, ticker, raw_candle, interval_seconds, "min")
+            assert rolled_candle.close in await _prices_at_edge(repository, ticker, raw_candle, interval_seconds, "max")
+
+
+async def _prices_at_edge(repository, ticker, candle, interval_seconds, edge):
+    pool = await repository.db.get_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(
+            f"""
+            WITH ticker AS (SELECT id FROM tickers WHERE name = $1)
+            SELECT price FROM prices WHERE ticker_id = (SELECT id FROM ticker) AND timestamp = (
+                SELECT {edge}(timestamp) FROM prices
+                WHERE ticker_id = (SELECT id FROM ticker) AND timestamp >= $2 AND timestamp < $3
+            )
+            """,
+            ticker, candle.bucket, candle.bucket + interval_seconds
+        )
+        return [float(row["price"]) for row in rows]
+
+
+@pytest.mark.asyncio
+async def test_incremental_rollups_match_raw_aggregation(repository):
+    # вперемешку одиночные save и пачки save_many, в произвольном порядке по времени
+    prices = _history("BTC_USD", 600, seed=1)
+    index = 0
+    rng = random.Random(2)
+    while index < len(prices):
+        size = rng.choice([1, 1, 7, 50])
+        batch = prices[index:index + size]
+        if size == 1:
+            await repository.save(batch[0])
+        else:
+            await repository.save_many(batch)
+        index += size
+
+    await _assert_rollups_match_raw(repository, "BTC_USD")
+
+
+@pytest.mark.asyncio
+async def test_backfill_builds_rollups_from_history(repository):
+    prices = _history("ETH_USD", 500, seed=3)
+    await repository.ensure_partitions(min(p.timestamp for p in prices), max(p.timestamp for p in prices))
+    pool = await repository.db.get_pool()
+    async with pool.acquire() as conn:
+        # история, записанная до появления price_rollups
+        ticker_id = await conn.fetchval("INSERT INTO tickers (name) VALUES ('ETH_USD') RETURNING id")
+        await conn.copy_records_to_table(
+            "prices",
+            records=[(p.timestamp, p.price, ticker_id) for p in prices],
+            columns=["timestamp", "price", "ticker_id"]
+        )
+
+    chunks = await backfill_rollups(repository, chunk_days=1)
+    assert chunks == 4
+    await _assert_rollups_match_raw(repository, "ETH_USD")
+
+    # повторный запуск ничего не удваивает
+    await backfill_rollups(repository, chunk_days=2)
+    await _assert_rollups_match_raw(repository, "ETH_USD")
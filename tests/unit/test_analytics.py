@@ -0,0 +1,115 @@
+import json
+import math
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+from unittest.mock import AsyncMock, MagicMock
+
+from src.domain import analytics
+from src.domain.models import PriceSeries
+from src.presentation.api.routes import analytics as analytics_routes
+
+PRICES = np.array([100.0, 101.0, 99.5, 102.0, 102.0, 103.5, 101.0])
+
+
+def test_log_returns():
+    expected = [math.log(b / a) for a, b in zip(PRICES, PRICES[1:])]
+    assert analytics.log_returns(PRICES) == pytest.approx(expected)
+
+
+def test_sma_matches_window_means():
+    assert analytics.sma(PRICES, 3) == pytest.approx([PRICES[i:i + 3].mean() for i in range(len(PRICES) - 2)])
+    assert len(analytics.sma(PRICES, 10)) == 0
+
+
+@pytest.mark.parametrize("span", [1, 2, 5, 200])
+def test_ema_matches_recurrence(span):
+    values = 20000 * np.exp(np.cumsum(np.random.default_rng(span).normal(0, 1e-3, 5000)))
+    alpha = 2 / (span + 1)
+    expected = [values[0]]
+    for value in values[1:]:
+        expected.append(alpha * value + (1 - alpha) * expected[-1])
+
+    assert analytics.ema(values, span) == pytest.approx(expected, rel=1e-12)
+
+
+def test_realized_volatility_groups_returns_by_window():
+    timestamps = np.array([0, 30, 60, 90, 120, 150, 180])
+
+    buckets, volatility, counts = analytics.realized_volatility(timestamps, PRICES, 60)
+
+    returns = analytics.log_returns(PRICES)
+    assert buckets.tolist() == [0, 60, 120, 180]
+    assert counts.tolist() == [1, 2, 2, 1]
+    assert volatility[1] == pytest.approx(math.sqrt(returns[1] ** 2 + returns[2] ** 2))
+    assert analytics.annualize(volatility, 86400) == pytest.approx(volatility * math.sqrt(365))
+
+
+def test_twap_weights_prices_by_duration():
+    # 100 держится 10 с, 200 - 50 с; вторая часовая свеча обрезается концом диапазона
+    timestamps = np.array([0, 10, 3600])
+    prices = np.array([100.0, 200.0, 50.0])
+
+    buckets, twap, means, counts = analytics.twap(timestamps, prices, 3700, 60)
+
+    assert buckets.tolist() == [0, 3600]
+    assert twap.tolist() == pytest.approx([(100 * 10 + 200 * 50) / 60, 50.0])
+    assert means.tolist() == [150.0, 50.0]
+    assert counts.tolist() == [2, 1]
+
+
+def _series_repo(series):
+    mock_repo = MagicMock()
+    mock_repo.get_price_series = AsyncMock(return_value=series)
+    return mock_repo
+
+
+@pytest.mark.asyncio
+async def test_returns_route_is_columnar():
+    series = PriceSeries("BTC_USD", [60, 120, 180], [100.0, 110.0, 99.0])
+    mock_repo = _series_repo(series)
+
+    response = await analytics_routes.get_log_returns("BTC_USD", start=60, end=240, repository=mock_repo)
+
+    payload = json.loads(response.body)
+    assert payload["timestamps"] == [120, 180]
+    assert payload["values"] == pytest.approx([math.log(1.1), math.log(0.9)])
+    mock_repo.get_price_series.assert_called_once_with("BTC_USD", after=59, before=240)
+
+
+@pytest.mark.asyncio
+async def test_sma_route_aligns_timestamps_to_window_end():
+    mock_repo = _series_repo(PriceSeries("BTC_USD", [1, 2, 3, 4], [1.0, 2.0, 3.0, 4.0]))
+
+    response = await analytics_routes.get_moving_average(
+        "BTC_USD", start=1, end=5, kind="sma", window=2, repository=mock_repo
+    )
+
+    assert json.loads(response.body) == {"ticker": "BTC_USD", "timestamps": [2, 3, 4], "values": [1.5, 2.5, 3.5]}
+
+
+@pytest.mark.asyncio
+async def test_twap_route_returns_windows_per_ticker():
+    mock_repo = MagicMock()
+    mock_repo.get_price_series_by_tickers = AsyncMock(return_value={
+        "BTC_USD": PriceSeries("BTC_USD", [0, 30], [100.0, 200.0]),
+        "ETH_USD": PriceSeries("ETH_USD"),
+    })
+
+    result = await analytics_routes.get_twap(
+        ["BTC_USD", "ETH_USD", "BTC_USD"], start=0, end=60, interval="1m", repository=mock_repo
+    )
+
+    assert result["BTC_USD"][0].twap == 150.0
+    assert result["ETH_USD"] == []
+    mock_repo.get_price_series_by_tickers.assert_called_once_with(["BTC_USD", "ETH_USD"], after=-1, before=60)
+
+
+@pytest.mark.asyncio
+async def test_analytics_reject_long_ranges():
+    with pytest.raises(HTTPException) as error:
+        await analytics_routes.get_realized_volatility(
+            "BTC_USD", start=0, end=400 * 86400, interval="1d", repository=MagicMock()
+        )
+    assert error.value.status_code == 400
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.domain.models import Price, PriceGap
+from src.infrastructure.tasks.backfill_gaps import backfill_gaps
+
+
+def _history(ticker, start, end, step=60):
+    return [Price(ticker=ticker, price=float(timestamp), timestamp=timestamp) for timestamp in range(start, end, step)]
+
+
+@pytest.mark.asyncio
+async def test_backfill_keeps_only_points_inside_gaps():
+    # одна выгрузка на тикер покрывает обе дыры, точки между ними уже есть в БД и не пишутся повторно
+    repository = MagicMock()
+    repository.find_gaps = AsyncMock(return_value=[
+        PriceGap(ticker="BTC_USD", start=1000, end=1300),
+        PriceGap(ticker="BTC_USD", start=2000, end=2200),
+    ])
+    repository.save_many = AsyncMock()
+    client = MagicMock()
+    client.get_index_history = AsyncMock(return_value=_history("BTC_USD", 900, 2400))
+
+    report = await backfill_gaps(repository, client, ["btc_usd"], 0, 3000, max_gap=120)
+
+    repository.find_gaps.assert_awaited_once_with(["BTC_USD"], 0, 3000, 120)
+    client.get_index_history.assert_awaited_once_with("btc_usd", 1000, 2200)
+    saved = [price.timestamp for call in repository.save_many.await_args_list for price in call.args[0]]
+    assert saved == [1020, 1080, 1140, 1200, 1260, 2040, 2100, 2160]
+    assert report.gaps == 2
+    assert report.rows == 8
+
+
+@pytest.mark.asyncio
+async def test_backfill_runs_tickers_concurrently_in_batches():
+    tracker = {"in_flight": 0, "max_in_flight": 0}
+
+    async def get_index_history(index_name, start, end):
+        tracker["in_flight"] += 1
+        tracker["max_in_flight"] = max(tracker["max_in_flight"], tracker["in_flight"])
+        await asyncio.sleep(0.01)
+        tracker["in_flight"] -= 1
+        return _history(index_name.upper(), start + 1, end, step=1)
+
+    index_names = [f"idx{i}_usd" for i in range(6)]
+    repository = MagicMock()
+    repository.find_gaps = AsyncMock(return_value=[
+        PriceGap(ticker=name.upper(), start=0, end=2501) for name in index_names
+    ])
+    repository.save_many = AsyncMock()
+    client = MagicMock()
+    client.get_index_history = AsyncMock(side_effect=get_index_history)
+
+    report = await backfill_gaps(repository, client, index_names, 0, 2501, 60, concurrency=3, batch_size=1000)
+
+    assert tracker["max_in_flight"] == 3
+    assert report.rows == 6 * 2500
+    assert repository.save_many.await_count == 6 * 3
+    assert report.rows_per_second > 0
+
+
+@pytest.mark.asyncio
+async def test_backfill_without_gaps_does_not_call_deribit():
+    repository = MagicMock()
+    repository.find_gaps = AsyncMock(return_value=[])
+    client = MagicMock()
+    client.get_index_history = AsyncMock()
+
+    report = await backfill_gaps(repository, client, ["btc_usd"], 0, 3000, 120)
+
+    client.get_index_history.assert_not_awaited()
+    assert report.rows == 0
@@ -0,0 +1,162 @@
+import asyncio
+
+import asyncpg
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.domain.models import Price
+from src.infrastructure.database.buffered_writer import BufferedPriceWriter
+
+
+def _price(i):
+    return Price(ticker="BTC_USD", price=50000.0 + i, timestamp=1234567890 + i)
+
+
+@pytest.mark.asyncio
+async def test_flushes_when_batch_is_full():
+    mock_repo = MagicMock()
+    mock_repo.save_many = AsyncMock()
+
+    async with BufferedPriceWriter(mock_repo, max_batch_size=3, flush_interval=10) as writer:
+        for i in range(6):
+            await writer.write(_price(i))
+        await asyncio.sleep(0.01)
+        # две полные пачки ушли сразу, не дожидаясь flush_interval
+        assert [len(c.args[0]) for c in mock_repo.save_many.call_args_list] == [3, 3]
+
+    assert writer.flushed_rows == 6
+
+
+@pytest.mark.asyncio
+async def test_flushes_by_time():
+    mock_repo = MagicMock()
+    mock_repo.save_many = AsyncMock()
+
+    async with BufferedPriceWriter(mock_repo, max_batch_size=100, flush_interval=0.05) as writer:
+        await writer.write(_price(0))
+        await asyncio.sleep(0.15)
+        # неполная пачка все равно сохраняется по таймеру
+        mock_repo.save_many.assert_called_once_with([_price(0)])
+
+
+@pytest.mark.asyncio
+async def test_close_flushes_remaining():
+    mock_repo = MagicMock()
+    mock_repo.save_many = AsyncMock()
+
+    writer = BufferedPriceWriter(mock_repo, max_batch_size=100, flush_interval=10)
+    writer.start()
+    for i in range(5):
+        await writer.write(_price(i))
+    await writer.close()
+
+    saved = [price for c in mock_repo.save_many.call_args_list for price in c.args[0]]
+    assert saved == [_price(i) for i in range(5)]
+    with pytest.raises(RuntimeError):
+        await writer.write(_price(6))
+
+
+@pytest.mark.asyncio
+async def test_write_blocks_when_buffer_is_full():
+    # пока БД не отвечает, writer не принимает больше max_buffer_size цен
+    release = asyncio.Event()
+
+    async def slow_save_many(prices):
+        await release.wait()
+
+    mock_repo = MagicMock()
+    mock_repo.save_many = AsyncMock(side_effect=slow_save_many)
+
+    writer = BufferedPriceWriter(mock_repo, max_batch_size=2, flush_interval=10, max_buffer_size=2)
+    writer.start()
+    for i in range(4):
+        await writer.write(_price(i))
+
+    blocked = asyncio.create_task(writer.write(_price(4)))
+    await asyncio.sleep(0.05)
+    assert not blocked.done()
+
+    release.set()
+    await asyncio.wait_for(blocked, timeout=1)
+    await writer.close()
+    assert writer.flushed_rows == 5
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_does_not_stop_writer():
+    mock_repo = MagicMock()
+    mock_repo.save_many = AsyncMock(side_effect=[asyncpg.PostgresError("boom"), None])
+
+    async with BufferedPriceWriter(mock_repo, max_batch_size=1, flush_interval=10, max_retries=0) as writer:
+        await writer.write(_price(0))
+        await writer.write(_price(1))
+
+    assert writer.failed_rows == 1
+    assert writer.flushed_rows == 1
+
+
+@pytest.mark.asyncio
+async def test_transient_failure_is_retried_with_backoff():
+    mock_repo = MagicMock()
+    mock_repo.save_many = AsyncMock(side_effect=[OSError("reset"), asyncpg.InterfaceError("closed"), None])
+
+    async with BufferedPriceWriter(
+            mock_repo, max_batch_size=2, flush_interval=10, retry_base_delay=0.01, retry_max_delay=0.02
+    ) as writer:
+        await writer.write(_price(0))
+        await writer.write(_price(1))
+
+    # та же пачка ушла с третьей попытки, ничего не потеряно
+    assert [c.args[0] for c in mock_repo.save_many.call_args_list] == [[_price(0), _price(1)]] * 3
+    assert writer.retries == 2
+    assert writer.flushed_rows == 2
+    assert writer.failed_rows == 0
+
+
+@pytest.mark.asyncio
+async def test_retries_are_bounded():
+    mock_repo = MagicMock()
+    mock_repo.save_many = AsyncMock(side_effect=asyncpg.PostgresError("down"))
+
+    async with BufferedPriceWriter(
+            mock_repo, max_batch_size=1, flush_interval=10, max_retries=2, retry_base_delay=0.001
+    ) as writer:
+        await writer.write(_price(0))
+
+    assert mock_repo.save_many.await_count == 3
+    assert writer.failed_rows == 1
+
+
+@pytest.mark.asyncio
+async def test_unexpected_error_surfaces_in_write_and_close():
+    release = asyncio.Event()
+
+    async def broken_save_many(prices):
+        await release.wait()
+        raise ValueError("bug")
+
+    mock_repo = MagicMock()
+    mock_repo.save_many = AsyncMock(side_effect=broken_save_many)
+
+    writer = BufferedPriceWriter(mock_repo, max_batch_size=1, flush_interval=10, max_buffer_size=1)
+    writer.start()
+    await writer.write(_price(0))
+    await writer.write(_price(1))
+    blocked = asyncio.create_task(writer.write(_price(2)))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    release.set()
+    # буфер полон, а разбирать его уже некому: write() не виснет, а отдает исключение задачи
+    with pytest.raises(ValueError):
+        await asyncio.wait_for(blocked, timeout=1)
+    with pytest.raises(ValueError):
+        await asyncio.wait_for(writer.close(), timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_write_before_start_is_rejected():
+    writer = BufferedPriceWriter(MagicMock(), max_buffer_size=1)
+
+    with pytest.raises(RuntimeError):
+        await asyncio.wait_for(writer.write(_price(0)), timeout=1)
@@ -0,0 +1,13 @@
+import pytest
+from pydantic import ValidationError
+
+from src.infrastructure.config import Settings
+
+
+def test_immutable_cache_window_must_cover_backfill_lookback():
+    # бэкфилл не должен дописывать цены в диапазоны, которые API уже отдает как immutable
+    with pytest.raises(ValidationError):
+        Settings(http_cache_immutable_after_seconds=3600, backfill_lookback_seconds=86400)
+
+    settings = Settings(http_cache_immutable_after_seconds=2 * 86400, backfill_lookback_seconds=86400)
+    assert settings.http_cache_immutable_after_seconds == 2 * 86400
@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 import time
@@ -54,8 +56,8 @@ async def test_get_index_price_bad_response():
 
 
 @pytest.mark.asyncio
-async def test_get_btc_price():
-    # проверяем что get_btc_price правильно формирует Price объект
+async def test_get_price_btc():
+    # проверяем что get_price правильно формирует Price объект
     client = DeribitClient()
     
     mock_response = MagicMock()
@@ -73,7 +75,7 @@ async def test_get_btc_price():
     
     with patch('aiohttp.ClientSession', return_value=mock_session):
         with patch('time.time', return_value=1234567890):
-            result = await client.get_btc_price()
+            result = await client.get_price("btc_usd")
             
             assert result is not None
             assert isinstance(result, Price)
@@ -85,7 +87,7 @@ async def test_get_btc_price():
 
 
 @pytest.mark.asyncio
-async def test_get_btc_price_none():
+async def test_get_price_none():
     # если API не вернул цену
     client = DeribitClient()
     
@@ -101,14 +103,14 @@ async def test_get_btc_price_none():
     mock_session.close = AsyncMock()
     
     with patch('aiohttp.ClientSession', return_value=mock_session):
-        result = await client.get_btc_price()
+        result = await client.get_price("btc_usd")
         assert result is None
     
     await client.close()
 
 
 @pytest.mark.asyncio
-async def test_get_eth_price():
+async def test_get_price_eth():
     # аналогично для ETH
     client = DeribitClient()
     
@@ -127,9 +129,132 @@ async def test_get_eth_price():
     
     with patch('aiohttp.ClientSession', return_value=mock_session):
         with patch('time.time', return_value=1234567890):
-            result = await client.get_eth_price()
+            result = await client.get_price("eth_usd")
             
             assert result.ticker == "ETH_USD"
             assert result.price == 3000.5
     
     await client.close()
+
+
+class _FakeResponse:
+    def __init__(self, index_price, delay, tracker):
+        self.status = 200
+        self._index_price = index_price
+        self._delay = delay
+        self._tracker = tracker
+
+    async def __aenter__(self):
+        self._tracker["in_flight"] += 1
+        self._tracker["max_in_flight"] = max(self._tracker["max_in_flight"], self._tracker["in_flight"])
+        await asyncio.sleep(self._delay)
+        return self
+
+    async def __aexit__(self, *args):
+        self._tracker["in_flight"] -= 1
+
+    async def json(self):
+        return {"result": {"index_price": self._index_price}}
+
+
+def _make_session(prices, delay=0.01):
+    # сессия, которая отвечает ценой по index_name и считает параллельные запросы
+    tracker = {"in_flight": 0, "max_in_flight": 0}
+    mock_session = MagicMock()
+    mock_session.get = MagicMock(
+        side_effect=lambda url, params, timeout: _FakeResponse(prices.get(params["index_name"]), delay, tracker)
+    )
+    mock_session.closed = False
+    mock_session.close = AsyncMock()
+    return mock_session, tracker
+
+
+@pytest.mark.asyncio
+async def test_get_index_prices_returns_all_tickers():
+    client = DeribitClient()
+    mock_session, _ = _make_session({"btc_usd": 50000.0, "eth_usd": 3000.0, "sol_usd": 150.0})
+
+    with patch('aiohttp.ClientSession', return_value=mock_session):
+        result = await client.get_index_prices(["btc_usd", "eth_usd", "sol_usd"])
+
+    assert [p.ticker for p in result] == ["BTC_USD", "ETH_USD", "SOL_USD"]
+    assert [p.price for p in result] == [50000.0, 3000.0, 150.0]
+
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_get_index_prices_skips_missing():
+    # индекс без цены просто пропускается, остальные сохраняются
+    client = DeribitClient()
+    mock_session, _ = _make_session({"btc_usd": 50000.0})
+
+    with patch('aiohttp.ClientSession', return_value=mock_session):
+        result = await client.get_index_prices(["btc_usd", "unknown_usd"])
+
+    assert len(result) == 1
+    assert result[0].ticker == "BTC_USD"
+
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_get_index_prices_bounded_concurrency():
+    # запросы идут параллельно, но не больше max_concurrency одновременно
+    client = DeribitClient(max_concurrency=5)
+    index_names = [f"idx{i}_usd" for i in range(20)]
+    mock_session, tracker = _make_session({name: 1.0 for name in index_names})
+
+    with patch('aiohttp.ClientSession', return_value=mock_session):
+        result = await client.get_index_prices(index_names)
+
+    assert len(result) == 20
+    assert tracker["max_in_flight"] == 5
+
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_get_index_price_timeout():
+    # таймаут запроса не роняет весь цикл
+    client = DeribitClient(request_timeout=0.5)
+
+    mock_session = MagicMock()
+    mock_session.get = MagicMock(side_effect=asyncio.TimeoutError)
+    mock_session.closed = False
+    mock_session.close = AsyncMock()
+
+    with patch('aiohttp.ClientSession', return_value=mock_session):
+        price = await client.get_index_price("btc_usd")
+        assert price is None
+        assert mock_session.get.call_args.kwargs["timeout"].total == 0.5
+
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_get_index_history_picks_shortest_range():
+    # окно началось 3 часа назад - хватает диапазона "1d"; точки вне (start, end) и повторы секунды отбрасываются
+    client = DeribitClient()
+
+    mock_response = MagicMock()
+    mock_response.status = 200
+    mock_response.json = AsyncMock(return_value={
+        "result": [[1_000_000, 1.0], [1_000_060_000, 2.0], [1_000_060_500, 2.5], [1_000_120_000, 3.0]]
+    })
+
+    mock_session = MagicMock()
+    mock_session.get = MagicMock()
+    mock_session.get.return_value.__aenter__ = AsyncMock(return_value=mock_response)
+    mock_session.get.return_value.__aexit__ = AsyncMock(return_value=None)
+    mock_session.closed = False
+    mock_session.close = AsyncMock()
+
+    with patch('aiohttp.ClientSession', return_value=mock_session):
+        with patch('time.time', return_value=1_000_000 + 3 * 3600):
+            history = await client.get_index_history("btc_usd", 1_000_000, 1_000_120)
+
+    assert mock_session.get.call_args.kwargs["params"] == {"index_name": "btc_usd", "range": "1d"}
+    assert history == [Price(ticker="BTC_USD", price=2.0, timestamp=1_000_060)]
+
+    await client.close()
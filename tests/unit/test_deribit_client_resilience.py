@@ -0,0 +1,268 @@
+import asyncio
+import time
+from email.utils import formatdate
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from prometheus_client import REGISTRY
+
+from src.infrastructure.external.deribit_client import DeribitClient, _parse_retry_after
+from src.infrastructure.external.resilience import CircuitBreaker, TokenBucket
+
+
+class FakeDeribit:
+    # локальный /public/get_index_price: каждый запрос берет следующий шаг сценария, последний повторяется
+    def __init__(self, script):
+        self.script = script
+        self.requests = 0
+
+    async def handler(self, request):
+        step = self.script[min(self.requests, len(self.script) - 1)]
+        self.requests += 1
+        kind, value = step
+        if kind == "sleep":
+            await asyncio.sleep(value)
+            kind, value = "ok", 1.0
+        if kind == "ok":
+            return web.json_response({"jsonrpc": "2.0", "result": {"index_price": value}})
+        if kind == "429":
+            return web.json_response(
+                {"jsonrpc": "2.0", "error": {"code": 10028, "message": "too_many_requests"}},
+                status=429,
+                headers={"Retry-After": str(value)}
+            )
+        if kind == "429_header":
+            return web.json_response(
+                {"jsonrpc": "2.0", "error": {"code": 10028, "message": "too_many_requests"}},
+                status=429,
+                headers={"Retry-After": value}
+            )
+        if kind == "garbage":
+            return web.Response(status=200, text="<html>maintenance</html>", content_type="text/html")
+        if kind == "not_found":
+            return web.json_response({"jsonrpc": "2.0", "error": {"code": 10004, "message": "not_found"}}, status=400)
+        return web.Response(status=value, text="upstream error")
+
+
+async def _start(fake):
+    app = web.Application()
+    app.router.add_get("/api/v2/public/get_index_price", fake.handler)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+def _client(server, **kwargs):
+    options = {"retry_base_delay": 0.01, "retry_max_delay": 0.05}
+    options.update(kwargs)
+    return DeribitClient(base_url=str(server.make_url("/api/v2")), **options)
+
+
+@pytest.mark.asyncio
+async def test_retries_server_errors():
+    fake = FakeDeribit([("status", 502), ("status", 503), ("ok", 50000.0)])
+    server = await _start(fake)
+    client = _client(server)
+    errors_before = REGISTRY.get_sample_value(
+        "deribit_request_duration_seconds_count", {"method": "get_index_price", "outcome": "error"}
+    ) or 0.0
+    try:
+        assert await client.get_index_price("btc_usd") == 50000.0
+        assert fake.requests == 3
+        # каждая попытка попадает в гистограмму со своим исходом
+        assert REGISTRY.get_sample_value(
+            "deribit_request_duration_seconds_count", {"method": "get_index_price", "outcome": "error"}
+        ) == errors_before + 2
+        stats = client.stats()
+        assert stats["retries"] == 2
+        assert stats["server_errors"] == 2
+        assert stats["successes"] == 1
+    finally:
+        await client.close()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_respects_retry_after_on_429():
+    fake = FakeDeribit([("429", 0.2), ("ok", 3000.0)])
+    server = await _start(fake)
+    client = _client(server)
+    try:
+        started = time.monotonic()
+        assert await client.get_index_price("eth_usd") == 3000.0
+        assert time.monotonic() - started >= 0.2
+        assert client.rate_limited == 1
+        # 429 не считается отказом upstream
+        assert client.circuit_breaker.state == CircuitBreaker.CLOSED
+    finally:
+        await client.close()
+        await server.close()
+
+
+def test_retry_after_accepts_seconds_and_http_date():
+    assert _parse_retry_after("1.5") == 1.5
+    assert 8 < _parse_retry_after(formatdate(time.time() + 10, usegmt=True)) <= 10
+    # дата в прошлом - можно повторять сразу; мусор - пауза из _backoff
+    assert _parse_retry_after(formatdate(time.time() - 10, usegmt=True)) == 0.0
+    assert _parse_retry_after("soon") is None
+    assert _parse_retry_after(None) is None
+
+
+@pytest.mark.asyncio
+async def test_unparsable_retry_after_does_not_fail_the_cycle():
+    fake = FakeDeribit([("429_header", "soon"), ("ok", 3000.0)])
+    server = await _start(fake)
+    client = _client(server)
+    try:
+        # до исправления ValueError из float("soon") ронял весь gather
+        prices = await client.get_index_prices(["eth_usd"])
+        assert [price.price for price in prices] == [3000.0]
+        assert client.rate_limited == 1
+    finally:
+        await client.close()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_malformed_body_is_retried():
+    fake = FakeDeribit([("garbage", None), ("ok", 2.5)])
+    server = await _start(fake)
+    client = _client(server)
+    try:
+        assert await client.get_index_price("btc_usd") == 2.5
+        assert client.retries == 1
+    finally:
+        await client.close()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_half_open_probe_is_released_when_the_attempt_is_cancelled():
+    fake = FakeDeribit([("sleep", 1.0)])
+    server = await _start(fake)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    client = _client(server, circuit_breaker=breaker)
+    try:
+        probe = asyncio.create_task(client.get_index_price("btc_usd"))
+        await asyncio.sleep(0.1)
+        assert not breaker.allow()
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        # отмененная проба не держит слот: следующий запрос снова может пробовать
+        assert breaker.allow()
+    finally:
+        await client.close()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_slow_upstream_bounded_by_read_timeout_and_deadline():
+    fake = FakeDeribit([("sleep", 1.0)])
+    server = await _start(fake)
+    client = _client(server, read_timeout=0.1, max_retries=10, cycle_deadline=0.5)
+    try:
+        started = time.monotonic()
+        assert await client.get_index_prices(["btc_usd", "eth_usd"]) == []
+        # весь цикл не дольше deadline, а не max_retries * задержку upstream
+        assert time.monotonic() - started < 0.8
+        assert client.timeouts >= 2
+        assert client.failures == 2
+    finally:
+        await client.close()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried():
+    fake = FakeDeribit([("not_found", None)])
+    server = await _start(fake)
+    client = _client(server)
+    try:
+        assert await client.get_index_price("unknown_usd") is None
+        assert fake.requests == 1
+        assert client.retries == 0
+    finally:
+        await client.close()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_fails_fast_and_recovers():
+    fake = FakeDeribit([("status", 500)] * 4 + [("ok", 1.5)])
+    server = await _start(fake)
+    client = _client(server, max_retries=1, circuit_breaker=CircuitBreaker(failure_threshold=4, reset_timeout=0.3))
+    try:
+        assert await client.get_index_price("btc_usd") is None
+        assert await client.get_index_price("btc_usd") is None
+        assert client.circuit_breaker.state == CircuitBreaker.OPEN
+
+        # пока цепь открыта, запросы в upstream не уходят
+        assert await client.get_index_price("btc_usd") is None
+        assert fake.requests == 4
+        assert client.circuit_rejected == 1
+
+        await asyncio.sleep(0.35)
+        assert await client.get_index_price("btc_usd") == 1.5
+        assert client.circuit_breaker.state == CircuitBreaker.CLOSED
+        assert client.stats()["circuit_opened"] == 1
+    finally:
+        await client.close()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_does_not_spend_credits():
+    fake = FakeDeribit([("ok", 1.0)])
+    server = await _start(fake)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60.0)
+    breaker.record_failure()
+    bucket = TokenBucket(capacity=1, refill_per_second=1)
+    client = _client(server, circuit_breaker=breaker, rate_limiter=bucket, cycle_deadline=0.5)
+    try:
+        started = time.monotonic()
+        assert await client.get_index_prices(["btc_usd", "eth_usd", "sol_usd"]) == []
+        # отклонены сразу, без ожидания кредитов до deadline, и пул остался нетронутым
+        assert time.monotonic() - started < 0.2
+        assert client.circuit_rejected == 3
+        assert bucket.waits == 0
+        assert await bucket.acquire(1, deadline=time.monotonic())
+        assert fake.requests == 0
+    finally:
+        await client.close()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_half_open_probe_is_released_when_credits_run_out():
+    fake = FakeDeribit([("ok", 1.0)])
+    server = await _start(fake)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    bucket = TokenBucket(capacity=1, refill_per_second=1)
+    bucket.drain()
+    client = _client(server, circuit_breaker=breaker, rate_limiter=bucket, cycle_deadline=0.1)
+    try:
+        assert await client.get_index_price("btc_usd") is None
+        assert client.deadline_exceeded == 1
+        # проба так и не ушла в upstream, поэтому слот свободен для следующего запроса
+        assert breaker.allow()
+    finally:
+        await client.close()
+        await server.close()
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_requests():
+    bucket = TokenBucket(capacity=2, refill_per_second=20)
+    started = time.monotonic()
+    for _ in range(6):
+        assert await bucket.acquire(1)
+    # 2 из пула сразу, еще 4 со скоростью 20 в секунду
+    assert time.monotonic() - started >= 0.19
+    assert bucket.waits == 4
+
+    # если кредиты не успеют накопиться до deadline, запрос не начинается
+    assert not await bucket.acquire(2, deadline=time.monotonic() + 0.01)
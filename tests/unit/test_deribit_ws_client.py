@@ -0,0 +1,210 @@
+import asyncio
+import json
+import os
+import signal
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from unittest.mock import AsyncMock, MagicMock
+
+from src.domain.models import Price
+from src.infrastructure.database.buffered_writer import BufferedPriceWriter
+from src.infrastructure.external.deribit_ws_client import DeribitWebSocketClient
+from src.infrastructure.tasks.stream_prices import PriceStreamIngestor, ingest_until_stopped
+
+
+def _tick(index_name, price, timestamp_ms):
+    return {
+        "jsonrpc": "2.0",
+        "method": "subscription",
+        "params": {
+            "channel": f"deribit_price_index.{index_name}",
+            "data": {"index_name": index_name, "price": price, "timestamp": timestamp_ms}
+        }
+    }
+
+
+class FakeDeribitWebSocket:
+    # локальный JSON-RPC сервер: на подписку отвечает тиками из сценария
+    def __init__(self, sessions):
+        self.sessions = sessions
+        self.received = []
+
+    async def handler(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        connection_number = len(self.received)
+        self.received.append([])
+        script = self.sessions[min(connection_number, len(self.sessions) - 1)]
+
+        async for ws_message in ws:
+            message = json.loads(ws_message.data)
+            self.received[connection_number].append(message)
+            await ws.send_json({"jsonrpc": "2.0", "id": message["id"], "result": "ok"})
+            if message["method"] == "public/subscribe":
+                for step in script:
+                    if step == "close":
+                        await ws.close()
+                        return ws
+                    if isinstance(step, str):
+                        await ws.send_str(step)
+                        continue
+                    await ws.send_json(step)
+        return ws
+
+
+async def _start_server(fake):
+    app = web.Application()
+    app.router.add_get("/ws/api/v2", fake.handler)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+async def _collect(client, index_names, count):
+    prices = []
+    async for price in client.stream_prices(index_names):
+        prices.append(price)
+        if len(prices) == count:
+            break
+    return prices
+
+
+@pytest.mark.asyncio
+async def test_stream_prices_subscribes_and_yields_ticks():
+    fake = FakeDeribitWebSocket([[
+        _tick("btc_usd", 50000.0, 1234567890123),
+        _tick("eth_usd", 3000.5, 1234567890456)
+    ]])
+    server = await _start_server(fake)
+    client = DeribitWebSocketClient(ws_url=str(server.make_url("/ws/api/v2")))
+
+    try:
+        prices = await asyncio.wait_for(_collect(client, ["btc_usd", "eth_usd"], 2), timeout=5)
+    finally:
+        await client.close()
+        await server.close()
+
+    assert prices == [
+        Price(ticker="BTC_USD", price=50000.0, timestamp=1234567890),
+        Price(ticker="ETH_USD", price=3000.5, timestamp=1234567890)
+    ]
+    methods = [message["method"] for message in fake.received[0]]
+    assert methods == ["public/set_heartbeat", "public/subscribe"]
+    assert fake.received[0][1]["params"]["channels"] == [
+        "deribit_price_index.btc_usd", "deribit_price_index.eth_usd"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stream_prices_answers_heartbeat():
+    # на test_request клиент обязан ответить public/test, иначе Deribit закроет соединение
+    fake = FakeDeribitWebSocket([[
+        {"jsonrpc": "2.0", "method": "heartbeat", "params": {"type": "test_request"}},
+        _tick("btc_usd", 50000.0, 1234567890000),
+        _tick("btc_usd", 50001.0, 1234567891000)
+    ]])
+    server = await _start_server(fake)
+    client = DeribitWebSocketClient(ws_url=str(server.make_url("/ws/api/v2")))
+
+    try:
+        await asyncio.wait_for(_collect(client, ["btc_usd"], 2), timeout=5)
+    finally:
+        await client.close()
+        await server.close()
+
+    assert "public/test" in [message["method"] for message in fake.received[0]]
+
+
+@pytest.mark.asyncio
+async def test_stream_prices_skips_malformed_frames():
+    # битые кадры не рвут соединение и не останавливают поток: следующий тик приходит по тому же сокету
+    fake = FakeDeribitWebSocket([[
+        "{not json",
+        "[1, 2]",
+        {"jsonrpc": "2.0", "method": "subscription", "params": {"data": {"index_name": "btc_usd", "price": 1.0}}},
+        _tick("btc_usd", 50000.0, 1234567890000)
+    ]])
+    server = await _start_server(fake)
+    client = DeribitWebSocketClient(ws_url=str(server.make_url("/ws/api/v2")))
+
+    try:
+        prices = await asyncio.wait_for(_collect(client, ["btc_usd"], 1), timeout=5)
+    finally:
+        await client.close()
+        await server.close()
+
+    assert prices == [Price(ticker="BTC_USD", price=50000.0, timestamp=1234567890)]
+    assert client.malformed_frames == 3
+    assert client.connections == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_prices_reconnects_and_resubscribes():
+    # первое соединение обрывается после одного тика, второе должно заново подписаться
+    fake = FakeDeribitWebSocket([
+        [_tick("btc_usd", 50000.0, 1234567890000), "close"],
+        [_tick("btc_usd", 50100.0, 1234567950000)]
+    ])
+    server = await _start_server(fake)
+    client = DeribitWebSocketClient(ws_url=str(server.make_url("/ws/api/v2")), reconnect_delay=0.01)
+
+    try:
+        prices = await asyncio.wait_for(_collect(client, ["btc_usd"], 2), timeout=5)
+    finally:
+        await client.close()
+        await server.close()
+
+    assert [p.price for p in prices] == [50000.0, 50100.0]
+    assert client.connections == 2
+    assert fake.received[1][-1]["method"] == "public/subscribe"
+
+
+@pytest.mark.asyncio
+async def test_ingestor_saves_ticks():
+    ticks = [
+        Price(ticker="BTC_USD", price=50000.0, timestamp=1234567890),
+        Price(ticker="ETH_USD", price=3000.0, timestamp=1234567890)
+    ]
+
+    async def fake_stream(index_names):
+        for tick in ticks:
+            yield tick
+
+    mock_client = MagicMock()
+    mock_client.stream_prices = fake_stream
+    mock_writer = MagicMock()
+    mock_writer.write = AsyncMock()
+
+    ingestor = PriceStreamIngestor(mock_client, mock_writer)
+    await ingestor.run(["btc_usd", "eth_usd"])
+
+    assert ingestor.saved_ticks == 2
+    assert mock_writer.write.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_sigterm_stops_ingest_and_flushes_buffer():
+    tick = Price(ticker="BTC_USD", price=50000.0, timestamp=1234567890)
+    received = asyncio.Event()
+
+    async def endless_stream(index_names):
+        yield tick
+        received.set()
+        await asyncio.Event().wait()
+
+    mock_client = MagicMock()
+    mock_client.stream_prices = endless_stream
+    mock_repo = MagicMock()
+    mock_repo.save_many = AsyncMock()
+
+    # flush_interval большой: тик лежит в буфере, пока его не дописывает выход из writer
+    async with BufferedPriceWriter(mock_repo, max_batch_size=100, flush_interval=60) as writer:
+        ingest = asyncio.create_task(ingest_until_stopped(mock_client, writer, ["btc_usd"]))
+        await received.wait()
+        mock_repo.save_many.assert_not_called()
+        os.kill(os.getpid(), signal.SIGTERM)
+        await asyncio.wait_for(ingest, timeout=1)
+
+    mock_repo.save_many.assert_awaited_once_with([tick])
@@ -0,0 +1,168 @@
+import asyncio
+import gzip
+import json
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from unittest.mock import MagicMock
+
+from src.presentation.api.http_cache import etag_matches, is_closed, make_etag
+from src.presentation.api.middleware import CompressionMiddleware
+
+
+def _request(if_none_match):
+    request = MagicMock()
+    request.headers = {"if-none-match": if_none_match}
+    return request
+
+
+def test_etag_depends_on_every_part():
+    assert make_etag("all", "BTC_USD", 10, 1) == make_etag("all", "BTC_USD", 10, 1)
+    assert make_etag("all", "BTC_USD", 10, 1) != make_etag("all", "BTC_USD", 11, 1)
+
+
+def test_etag_matches_weak_and_compressed_variants():
+    etag = make_etag("all", "BTC_USD")
+
+    assert etag_matches(_request(etag), etag)
+    assert etag_matches(_request(f'"other", W/{etag}'), etag)
+    assert etag_matches(_request(f'{etag[:-1]}-br"'), etag)
+    assert etag_matches(_request("*"), etag)
+    assert not etag_matches(_request(make_etag("all", "ETH_USD")), etag)
+
+
+def test_only_old_ranges_are_closed():
+    assert is_closed(1_000_000_000, 86400)
+    assert not is_closed(None, 86400)
+    assert not is_closed(4_000_000_000, 86400)
+
+
+def _app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/large")
+    async def large():
+        return [{"ticker": "BTC_USD", "price": 50000.0, "timestamp": i} for i in range(50)]
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        async def body():
+            yield b"x" * 500
+        return StreamingResponse(body(), media_type="text/event-stream")
+
+    return app
+
+
+async def _call(app, path, accept_encoding):
+    messages = []
+    requests = iter([{"type": "http.request", "body": b"", "more_body": False}])
+
+    async def receive():
+        return next(requests, {"type": "http.disconnect"})
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+        "client": ("test", 1), "server": ("test", 80),
+    }
+    await app(scope, receive, send)
+    headers = {name.decode(): value.decode() for name, value in messages[0]["headers"]}
+    return headers, b"".join(message.get("body", b"") for message in messages[1:])
+
+
+@pytest.mark.asyncio
+async def test_large_json_is_gzipped():
+    headers, body = await _call(_app(), "/large", "gzip, deflate")
+
+    assert headers["content-encoding"] == "gzip"
+    assert headers["vary"] == "Accept-Encoding"
+    assert int(headers["content-length"]) == len(body)
+    assert len(json.loads(gzip.decompress(body))) == 50
+
+
+@pytest.mark.asyncio
+async def test_brotli_preferred_when_installed():
+    brotli = pytest.importorskip("brotli")
+
+    headers, body = await _call(_app(), "/large", "gzip, br")
+
+    assert headers["content-encoding"] == "br"
+    assert len(json.loads(brotli.decompress(body))) == 50
+
+
+@pytest.mark.asyncio
+async def test_small_streaming_and_unaccepted_responses_are_not_compressed():
+    app = _app()
+
+    small_headers, _ = await _call(app, "/small", "gzip")
+    stream_headers, stream_body = await _call(app, "/stream", "gzip")
+    plain_headers, plain_body = await _call(app, "/large", "gzip;q=0")
+
+    assert "content-encoding" not in small_headers
+    assert "content-encoding" not in stream_headers and stream_body == b"x" * 500
+    assert "content-encoding" not in plain_headers and plain_headers["vary"] == "Accept-Encoding"
+    assert len(json.loads(plain_body)) == 50
+
+
+@pytest.mark.asyncio
+async def test_compressed_response_gets_own_etag():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=10)
+
+    @app.get("/tagged")
+    async def tagged():
+        return Response(b"[" + b"1," * 100 + b"1]", media_type="application/json", headers={"ETag": '"abc"'})
+
+    headers, _ = await _call(app, "/tagged", "gzip")
+
+    assert headers["etag"] == '"abc-gzip"'
+
+
+@pytest.mark.asyncio
+async def test_event_stream_headers_are_not_held_back():
+    release = asyncio.Event()
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1)
+
+    @app.get("/events")
+    async def events():
+        async def body():
+            await release.wait()
+            yield b"data: x\n\n"
+        return StreamingResponse(body(), media_type="text/event-stream")
+
+    messages = []
+    requests = iter([{"type": "http.request", "body": b"", "more_body": False}])
+
+    async def receive():
+        request = next(requests, None)
+        if request is not None:
+            return request
+        await release.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/events", "raw_path": b"/events", "root_path": "", "query_string": b"",
+        "headers": [(b"accept-encoding", b"gzip")], "client": ("test", 1), "server": ("test", 80),
+    }
+    call = asyncio.create_task(app(scope, receive, send))
+    await asyncio.sleep(0.01)
+
+    # события еще нет, а клиент уже получил заголовки и знает, что подписка принята
+    assert [message["type"] for message in messages] == ["http.response.start"]
+    release.set()
+    await call
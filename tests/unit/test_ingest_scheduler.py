@@ -0,0 +1,176 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import redis
+
+from src.domain.models import Price
+from src.infrastructure.tasks import fetch_prices as fetch_prices_module
+from src.infrastructure.tasks.ingest_scheduler import HashRing, ShardCoordinator, due_indices, partition
+from src.infrastructure.tasks.worker_resources import WorkerResources
+
+
+class _FakeLock:
+    def __init__(self, held: set, name: str):
+        self._held = held
+        self._name = name
+
+    def acquire(self, blocking: bool = True) -> bool:
+        if self._name in self._held:
+            return False
+        self._held.add(self._name)
+        return True
+
+    def release(self) -> None:
+        if self._name not in self._held:
+            raise redis.exceptions.LockNotOwnedError("expired")
+        self._held.discard(self._name)
+
+
+class _FakeRedis:
+    # ровно то подмножество Redis, которым пользуется ShardCoordinator
+    def __init__(self):
+        self.held = set()
+        self.hashes = {}
+
+    def lock(self, name: str, timeout: float) -> _FakeLock:
+        return _FakeLock(self.held, name)
+
+    def hmget(self, name, keys):
+        values = self.hashes.get(name, {})
+        return [values.get(key) for key in keys]
+
+    def hset(self, name, mapping):
+        self.hashes.setdefault(name, {}).update({key: str(value).encode() for key, value in mapping.items()})
+
+
+INDEX_NAMES = [f"idx{n}_usd" for n in range(1000)]
+
+
+def test_partition_covers_every_index_once_and_is_balanced():
+    shards = partition(INDEX_NAMES, 4)
+
+    assert sorted(name for names in shards.values() for name in names) == sorted(INDEX_NAMES)
+    for names in shards.values():
+        assert 150 < len(names) < 350
+
+
+def test_adding_a_shard_moves_only_its_share():
+    before = HashRing(4)
+    after = HashRing(5)
+
+    moved = [name for name in INDEX_NAMES if before.shard_for(name) != after.shard_for(name)]
+
+    # переезжают только индексы, доставшиеся новому шарду, - около 1/5
+    assert all(after.shard_for(name) == 4 for name in moved)
+    assert len(moved) < 300
+
+
+def test_hash_ring_requires_a_shard():
+    with pytest.raises(ValueError):
+        HashRing(0)
+
+
+def test_due_indices_respects_per_index_interval():
+    last = {"btc_usd": 1000.0, "eth_usd": 1000.0}
+
+    due = due_indices(["btc_usd", "eth_usd", "sol_usd"], last, {"btc_usd": 10.0}, 60.0, now=1012.0, tick=10.0)
+
+    # btc_usd - свой интервал 10 с, eth_usd ждет минуту, sol_usd еще не опрашивался
+    assert due == ["btc_usd", "sol_usd"]
+
+
+def test_due_indices_tolerates_late_start():
+    # задача опоздала на 0.3 с против прошлого запуска - индекс с интервалом 60 не должен ждать лишний такт
+    assert due_indices(["btc_usd"], {"btc_usd": 1000.3}, {}, 60.0, now=1060.1, tick=10.0) == ["btc_usd"]
+
+
+def test_coordinator_skips_overlapping_runs():
+    coordinator = ShardCoordinator(_FakeRedis())
+
+    lock = coordinator.acquire(0, deadline=30.0)
+
+    assert lock is not None
+    assert coordinator.acquire(0, deadline=30.0) is None
+    # другие шарды не ждут занятый
+    assert coordinator.acquire(1, deadline=30.0) is not None
+    coordinator.release(lock)
+    assert coordinator.acquire(0, deadline=30.0) is not None
+
+
+def test_coordinator_release_of_expired_lock_is_ignored():
+    fake = _FakeRedis()
+    coordinator = ShardCoordinator(fake)
+    lock = coordinator.acquire(0, deadline=30.0)
+    fake.held.clear()
+
+    coordinator.release(lock)
+
+
+def test_coordinator_tracks_last_fetch_per_index():
+    coordinator = ShardCoordinator(_FakeRedis())
+
+    coordinator.mark_fetched(["btc_usd"], 1000.5)
+
+    assert coordinator.last_fetched(["btc_usd", "eth_usd"]) == {"btc_usd": 1000.5}
+
+
+@pytest.fixture
+def shard_task(monkeypatch):
+    coordinator = ShardCoordinator(_FakeRedis())
+    # loop уже есть - start() ничего не поднимает, клиент и репозиторий подменены
+    resources = WorkerResources()
+    resources.loop = asyncio.new_event_loop()
+    resources.client = AsyncMock()
+    resources.repository = AsyncMock()
+    monkeypatch.setattr(fetch_prices_module.settings, "deribit_index_names", ["btc_usd", "eth_usd"])
+    monkeypatch.setattr(fetch_prices_module.settings, "deribit_index_intervals", {})
+    with patch.object(fetch_prices_module, "get_coordinator", return_value=coordinator), \
+            patch.object(fetch_prices_module, "worker_resources", resources):
+        yield coordinator, resources
+    resources.loop.close()
+
+
+def test_shard_task_fetches_only_due_indices(shard_task):
+    coordinator, resources = shard_task
+    resources.client.get_index_prices.return_value = [Price(ticker="ETH_USD", price=3000.0, timestamp=1)]
+    coordinator.mark_fetched(["btc_usd"], 10**12)
+
+    result = fetch_prices_module.fetch_price_shard(0, 1)
+
+    resources.client.get_index_prices.assert_awaited_once_with(["eth_usd"])
+    resources.repository.save_many.assert_awaited_once()
+    assert result == {"shard": 0, "due": 1, "saved": 1}
+    assert "eth_usd" in coordinator.last_fetched(["eth_usd"])
+
+
+def test_shard_task_does_not_mark_failed_indices(shard_task):
+    coordinator, resources = shard_task
+    resources.client.get_index_prices.return_value = [Price(ticker="BTC_USD", price=50000.0, timestamp=1)]
+
+    fetch_prices_module.fetch_price_shard(0, 1)
+
+    # eth_usd не пришел - на следующем такте он снова в работе
+    assert set(coordinator.last_fetched(["btc_usd", "eth_usd"])) == {"btc_usd"}
+
+
+def test_shard_task_skips_while_previous_run_holds_the_lock(shard_task):
+    coordinator, resources = shard_task
+    lock = coordinator.acquire(0, deadline=30.0)
+
+    result = fetch_prices_module.fetch_price_shard(0, 1)
+
+    assert result == {"shard": 0, "skipped": True}
+    resources.client.get_index_prices.assert_not_awaited()
+    coordinator.release(lock)
+
+
+def test_beat_schedules_a_task_per_shard(monkeypatch):
+    monkeypatch.setattr(fetch_prices_module.settings, "ingest_shards", 3)
+    sender = MagicMock()
+
+    fetch_prices_module.setup_periodic_tasks(sender)
+
+    calls = sender.add_periodic_task.call_args_list
+    assert [call.args[1].args for call in calls] == [(0, 3), (1, 3), (2, 3)]
+    assert all(call.kwargs["expires"] == fetch_prices_module.settings.ingest_tick_seconds for call in calls)
@@ -0,0 +1,159 @@
+from contextlib import asynccontextmanager
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from prometheus_client import REGISTRY
+
+from src.domain.models import Price
+from src.infrastructure.database.connection import InstrumentedPool
+from src.infrastructure.metrics import IngestLagCollector, PoolCollector, StatsCollector, instrument_queries
+from src.presentation.api.middleware import RequestMetricsMiddleware
+from src.presentation.api.routes.metrics import metrics
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@instrument_queries
+class _Repository:
+    async def fetch_something(self, value):
+        return value * 2
+
+    async def _private_helper(self):
+        return None
+
+
+@pytest.mark.asyncio
+async def test_instrument_queries_times_public_coroutines():
+    before = _sample("db_query_duration_seconds_count", method="fetch_something")
+
+    assert await _Repository().fetch_something(21) == 42
+
+    assert _sample("db_query_duration_seconds_count", method="fetch_something") == before + 1
+    assert REGISTRY.get_sample_value("db_query_duration_seconds_count", {"method": "_private_helper"}) is None
+
+
+def test_ingest_lag_is_computed_at_scrape_time():
+    collector = IngestLagCollector()
+    collector.observe(Price(ticker="BTC_USD", price=1.0, timestamp=1000))
+    collector.observe(Price(ticker="BTC_USD", price=1.0, timestamp=900))
+    collector.observe(Price(ticker="ETH_USD", price=1.0, timestamp=1030))
+
+    with patch("time.time", return_value=1060):
+        samples = {sample.labels["ticker"]: sample.value for sample in next(iter(collector.collect())).samples}
+
+    assert samples == {"BTC_USD": 60, "ETH_USD": 30}
+
+
+def test_stats_collector_exports_numeric_values():
+    collector = StatsCollector()
+    collector.register("deribit_client", lambda: {"attempts": 3, "circuit_state": "closed", "last_overhead": 0.5})
+
+    families = {family.name: family.samples[0].value for family in collector.collect()}
+
+    assert families == {"deribit_client_attempts": 3, "deribit_client_last_overhead": 0.5}
+    collector.unregister("deribit_client")
+    assert list(collector.collect()) == []
+
+
+@pytest.mark.asyncio
+async def test_instrumented_pool_times_acquire_wait():
+    @asynccontextmanager
+    async def acquire(timeout=None):
+        yield "connection"
+
+    raw_pool = MagicMock()
+    raw_pool.acquire = acquire
+    raw_pool.get_max_size.return_value = 10
+    pool = InstrumentedPool(raw_pool, "unit")
+    before = _sample("db_pool_acquire_wait_seconds_count", pool="unit")
+
+    async with pool.acquire() as conn:
+        assert conn == "connection"
+
+    assert _sample("db_pool_acquire_wait_seconds_count", pool="unit") == before + 1
+    assert pool.get_max_size() == 10
+
+
+def test_pool_collector_reports_saturation():
+    collector = PoolCollector()
+    pool = MagicMock()
+    pool.get_size.return_value = 8
+    pool.get_idle_size.return_value = 3
+    pool.get_max_size.return_value = 10
+    collector.register("primary", pool)
+
+    values = {family.name: family.samples[0].value for family in collector.collect()}
+
+    assert values == {"db_pool_connections_in_use": 5, "db_pool_connections_open": 8, "db_pool_connections_max": 10}
+
+
+async def _call_asgi(app, path):
+    messages = []
+    requests = iter([{"type": "http.request", "body": b"", "more_body": False}])
+
+    async def receive():
+        # после тела запроса клиент отключается - иначе StreamingResponse ждет разрыва вечно
+        return next(requests, {"type": "http.disconnect"})
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"", "headers": [],
+        "client": ("test", 1), "server": ("test", 80),
+    }
+    await app(scope, receive, send)
+    return messages[0]["status"]
+
+
+@pytest.mark.asyncio
+async def test_request_metrics_use_route_template():
+    app = FastAPI()
+    app.add_middleware(RequestMetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    labels = {"method": "GET", "route": "/items/{item_id}", "status": "200"}
+    before = _sample("http_request_duration_seconds_count", **labels)
+
+    assert await _call_asgi(app, "/items/1") == 200
+    assert await _call_asgi(app, "/items/2") == 200
+    assert await _call_asgi(app, "/missing") == 404
+
+    assert _sample("http_request_duration_seconds_count", **labels) == before + 2
+    assert _sample("http_request_duration_seconds_count", method="GET", route="unmatched", status="404") >= 1
+
+
+@pytest.mark.asyncio
+async def test_request_metrics_skip_event_streams():
+    # длительность SSE - время подписки клиента, а не задержка ответа
+    app = FastAPI()
+    app.add_middleware(RequestMetricsMiddleware)
+
+    @app.get("/events")
+    async def events():
+        async def body():
+            yield b"data: 1\n\n"
+        return StreamingResponse(body(), media_type="text/event-stream")
+
+    before = _sample("http_request_duration_seconds_count", method="GET", route="/events", status="200")
+
+    assert await _call_asgi(app, "/events") == 200
+
+    assert _sample("http_request_duration_seconds_count", method="GET", route="/events", status="200") == before
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_exposes_registry():
+    response = await metrics()
+
+    assert response.media_type.startswith("text/plain")
+    assert b"db_query_duration_seconds" in response.body
+    assert b"deribit_request_duration_seconds" in response.body
@@ -0,0 +1,20 @@
+from datetime import datetime, timezone
+
+from src.infrastructure.database.partitions import month_start, months_between, next_month_start, partition_name
+
+
+def _ts(*args) -> int:
+    return int(datetime(*args, tzinfo=timezone.utc).timestamp())
+
+
+def test_month_bounds():
+    assert month_start(_ts(2024, 2, 29, 23, 59, 59)) == _ts(2024, 2, 1)
+    assert next_month_start(_ts(2024, 2, 10)) == _ts(2024, 3, 1)
+    # переход через год
+    assert next_month_start(_ts(2024, 12, 31)) == _ts(2025, 1, 1)
+
+
+def test_months_between_covers_both_ends():
+    months = months_between(_ts(2024, 11, 15), _ts(2025, 1, 1))
+    assert months == [_ts(2024, 11, 1), _ts(2024, 12, 1), _ts(2025, 1, 1)]
+    assert [partition_name(month) for month in months] == ["prices_p202411", "prices_p202412", "prices_p202501"]
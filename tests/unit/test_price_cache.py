@@ -0,0 +1,89 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.domain.models import Price
+from src.infrastructure.cache.price_cache import CachedPriceRepository, LatestPriceCache
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+
+def _enabled_cache():
+    cache = LatestPriceCache()
+    cache.set_enabled(True)
+    return cache
+
+
+@pytest.mark.asyncio
+async def test_miss_then_hit():
+    # первый запрос идет в БД, следующие отдаются из памяти
+    cache = _enabled_cache()
+    db_price = Price(ticker="BTC_USD", price=50000.0, timestamp=1234567890)
+
+    with patch.object(PriceRepository, "get_last_by_ticker", AsyncMock(return_value=db_price)) as db_query:
+        repo = CachedPriceRepository(MagicMock(), cache)
+        assert await repo.get_last_by_ticker("BTC_USD") == db_price
+        assert await repo.get_last_by_ticker("BTC_USD") == db_price
+
+    db_query.assert_called_once_with("BTC_USD")
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+@pytest.mark.asyncio
+async def test_notification_refreshes_cached_price():
+    cache = _enabled_cache()
+    cache.update(Price(ticker="BTC_USD", price=50000.0, timestamp=1234567890))
+    cache.update(Price(ticker="BTC_USD", price=50100.0, timestamp=1234567950))
+
+    with patch.object(PriceRepository, "get_last_by_ticker", AsyncMock()) as db_query:
+        repo = CachedPriceRepository(MagicMock(), cache)
+        result = await repo.get_last_by_ticker("BTC_USD")
+
+    assert result.price == 50100.0
+    db_query.assert_not_called()
+
+
+def test_older_price_does_not_overwrite_newer():
+    # бэкфилл истории тоже шлет уведомления - они не должны откатывать последнюю цену
+    cache = _enabled_cache()
+    cache.update(Price(ticker="BTC_USD", price=50100.0, timestamp=1234567950))
+    cache.update(Price(ticker="BTC_USD", price=1.0, timestamp=1000))
+
+    assert cache.get("BTC_USD").price == 50100.0
+
+
+@pytest.mark.asyncio
+async def test_disabled_cache_always_reads_db():
+    # пока LISTEN не подключен, уведомления могут теряться - кэш не используется
+    cache = LatestPriceCache()
+    db_price = Price(ticker="BTC_USD", price=50000.0, timestamp=1234567890)
+
+    with patch.object(PriceRepository, "get_last_by_ticker", AsyncMock(return_value=db_price)) as db_query:
+        repo = CachedPriceRepository(MagicMock(), cache)
+        await repo.get_last_by_ticker("BTC_USD")
+        await repo.get_last_by_ticker("BTC_USD")
+
+    assert db_query.call_count == 2
+
+
+def test_disconnect_clears_cache():
+    cache = _enabled_cache()
+    cache.update(Price(ticker="BTC_USD", price=50000.0, timestamp=1234567890))
+
+    cache.set_enabled(False)
+    cache.set_enabled(True)
+
+    assert cache.get("BTC_USD") is None
+
+
+@pytest.mark.asyncio
+async def test_batch_last_queries_only_missing_tickers():
+    cache = _enabled_cache()
+    cache.update(Price(ticker="BTC_USD", price=50000.0, timestamp=1234567890))
+    eth = Price(ticker="ETH_USD", price=3000.0, timestamp=1234567890)
+
+    with patch.object(PriceRepository, "get_last_by_tickers", AsyncMock(return_value={"ETH_USD": eth})) as db_query:
+        repo = CachedPriceRepository(MagicMock(), cache)
+        result = await repo.get_last_by_tickers(["BTC_USD", "ETH_USD"])
+
+    assert set(result) == {"BTC_USD", "ETH_USD"}
+    db_query.assert_called_once_with(["ETH_USD"])
+    assert cache.get("ETH_USD") == eth
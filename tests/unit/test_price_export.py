@@ -0,0 +1,67 @@
+import io
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from src.infrastructure.export.price_export import CSV_HEADER, encode_prices
+
+CSV_ROWS = b"".join(f"BTC_USD,{50000 + i / 8},{1234567890 + i}\n".encode() for i in range(1000))
+
+
+async def _copy_chunks(data: bytes, size: int):
+    # COPY отдает куски произвольной длины, не по границам строк
+    for offset in range(0, len(data), size):
+        yield data[offset:offset + size]
+
+
+async def _export(fmt: str, chunk_size: int = 777, batch_bytes: int = 4096) -> bytes:
+    return b"".join([chunk async for chunk in encode_prices(_copy_chunks(CSV_ROWS, chunk_size), fmt, batch_bytes)])
+
+
+def _expected():
+    return [
+        {"ticker": "BTC_USD", "price": 50000 + i / 8, "timestamp": 1234567890 + i}
+        for i in range(1000)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_csv_export_passes_copy_output_through():
+    assert await _export("csv") == CSV_HEADER + CSV_ROWS
+
+
+@pytest.mark.asyncio
+async def test_arrow_export_reads_back_with_columnar_types():
+    table = pa.ipc.open_stream(await _export("arrow")).read_all()
+
+    assert table.schema.field("ticker").type == pa.dictionary(pa.int32(), pa.string())
+    assert table.schema.field("timestamp").type == pa.int64()
+    assert table.to_pylist() == _expected()
+
+
+@pytest.mark.asyncio
+async def test_parquet_export_writes_row_group_per_block():
+    parquet_file = pq.ParquetFile(io.BytesIO(await _export("parquet")))
+
+    assert parquet_file.num_row_groups > 1
+    assert parquet_file.read().to_pylist() == _expected()
+
+
+@pytest.mark.asyncio
+async def test_empty_export_is_a_valid_file():
+    async def nothing():
+        return
+        yield
+
+    arrow = b"".join([chunk async for chunk in encode_prices(nothing(), "arrow")])
+    parquet = b"".join([chunk async for chunk in encode_prices(nothing(), "parquet")])
+
+    assert pa.ipc.open_stream(arrow).read_all().num_rows == 0
+    assert pq.read_table(io.BytesIO(parquet)).num_rows == 0
+
+
+@pytest.mark.asyncio
+async def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        await _export("xlsx")
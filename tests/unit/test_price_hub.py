@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+import pytest
+
+from src.domain.models import Price
+from src.infrastructure.live.price_hub import HubFullError, PriceHub
+
+
+def _price(ticker="BTC_USD", price=50000.0, timestamp=1234567890):
+    return Price(ticker=ticker, price=price, timestamp=timestamp)
+
+
+@pytest.mark.asyncio
+async def test_publish_fans_out_to_ticker_subscribers():
+    hub = PriceHub()
+    btc = hub.subscribe(["BTC_USD"])
+    both = hub.subscribe(["BTC_USD", "ETH_USD"])
+    eth = hub.subscribe(["ETH_USD"])
+
+    hub.publish(_price())
+
+    message = json.dumps({"ticker": "BTC_USD", "price": 50000.0, "timestamp": 1234567890})
+    assert await btc.get() == [message]
+    assert await both.get() == [message]
+    assert hub.stats()["delivered"] == 2
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(eth.get(), 0.01)
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_gets_only_latest_price_per_ticker():
+    # клиент не читал, пока шли три цены BTC - получит одну, последнюю, и цену ETH
+    hub = PriceHub()
+    subscription = hub.subscribe(["BTC_USD", "ETH_USD"])
+    for i in range(3):
+        hub.publish(_price(price=50000.0 + i, timestamp=1234567890 + i))
+    hub.publish(_price("ETH_USD", 3000.0))
+
+    messages = [json.loads(message) for message in await subscription.get()]
+
+    assert messages == [
+        {"ticker": "BTC_USD", "price": 50002.0, "timestamp": 1234567892},
+        {"ticker": "ETH_USD", "price": 3000.0, "timestamp": 1234567890},
+    ]
+    assert subscription.coalesced == 2
+
+
+@pytest.mark.asyncio
+async def test_new_subscriber_receives_latest_known_price():
+    hub = PriceHub()
+    hub.publish(_price(price=1.0, timestamp=100))
+    hub.publish(_price(price=2.0, timestamp=200))
+    # дозагрузка истории не откатывает последнюю цену
+    hub.publish(_price(price=0.5, timestamp=50))
+
+    messages = await hub.subscribe(["BTC_USD"]).get()
+
+    assert [json.loads(message)["price"] for message in messages] == [2.0]
+
+
+def test_disabled_listen_drops_stale_snapshot():
+    hub = PriceHub()
+    hub.publish(_price())
+    hub.set_enabled(False)
+
+    subscription = hub.subscribe(["BTC_USD"])
+
+    assert subscription._pending == {}
+
+
+def test_unsubscribe_stops_delivery_and_limits_are_enforced():
+    hub = PriceHub(max_subscribers=1)
+    subscription = hub.subscribe(["BTC_USD"])
+    with pytest.raises(HubFullError):
+        hub.subscribe(["ETH_USD"])
+
+    hub.unsubscribe(subscription)
+    # повторная отписка счетчик не уводит в минус
+    hub.unsubscribe(subscription)
+    hub.publish(_price())
+
+    assert hub.stats() == {"subscribers": 0, "tickers": 0, "published": 1, "delivered": 0, "coalesced": 0}
+    hub.subscribe(["ETH_USD"])
@@ -0,0 +1,160 @@
+import time
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.domain.models import Price
+from src.infrastructure.cache.price_cache import CachedPriceRepository
+from src.infrastructure.cache.price_index import PriceIndex, TickerSeries
+from src.infrastructure.database.repositories.price_repository import PriceRepository
+
+
+def _series(timestamps, start=0):
+    series = TickerSeries(start=start)
+    series.extend(timestamps, [float(ts) for ts in timestamps])
+    return series
+
+
+def test_at_or_before():
+    series = _series([100, 160, 220])
+
+    assert series.at_or_before(160) == (160, 160.0)
+    assert series.at_or_before(219) == (160, 160.0)
+    assert series.at_or_before(1000) == (220, 220.0)
+    assert series.at_or_before(99) is None
+
+
+def test_nearest_within_tolerance():
+    series = _series([100, 160, 220])
+
+    assert series.nearest(150, 30) == (160, 160.0)
+    # одинаковое расстояние - берем более раннюю точку
+    assert series.nearest(130, 30) == (100, 100.0)
+    assert series.nearest(190, 10) is None
+    assert series.nearest(50, 60) == (100, 100.0)
+
+
+def test_trim_drops_old_points():
+    series = _series([100, 160, 220, 280])
+
+    series.trim(200)
+
+    assert list(series.timestamps) == [220, 280]
+    assert list(series.prices) == [220.0, 280.0]
+    assert series.start == 200
+
+
+def _repo_with_history(history):
+    # history: список timestamp'ов в БД; get_series_since отдает те, что больше after
+    mock_repo = MagicMock()
+
+    async def get_series_since(ticker, after):
+        timestamps = [ts for ts in sorted(history) if ts > after]
+        return timestamps, [float(ts) for ts in timestamps]
+
+    mock_repo.get_series_since = AsyncMock(side_effect=get_series_since)
+    return mock_repo
+
+
+@pytest.mark.asyncio
+async def test_index_loads_lazily_and_appends_new_rows():
+    now = int(time.time())
+    history = [now - 300, now - 240, now - 180]
+    mock_repo = _repo_with_history(history)
+    index = PriceIndex(window_seconds=3600)
+    index.set_enabled(True)
+
+    series = await index.get_series("BTC_USD", mock_repo)
+    assert list(series.timestamps) == history
+    await index.get_series("BTC_USD", mock_repo)
+    assert mock_repo.get_series_since.call_count == 1
+
+    # уведомление о новой цене - дочитываем только хвост после последней точки
+    history.append(now - 120)
+    index.on_price(Price(ticker="BTC_USD", price=1.0, timestamp=now - 120))
+    series = await index.get_series("BTC_USD", mock_repo)
+
+    assert list(series.timestamps)[-1] == now - 120
+    assert mock_repo.get_series_since.call_args.args == ("BTC_USD", now - 180)
+
+
+@pytest.mark.asyncio
+async def test_index_reloads_after_backdated_insert():
+    now = int(time.time())
+    history = [now - 300, now - 180]
+    mock_repo = _repo_with_history(history)
+    index = PriceIndex(window_seconds=3600)
+    index.set_enabled(True)
+    await index.get_series("BTC_USD", mock_repo)
+
+    history.append(now - 240)
+    index.on_price(Price(ticker="BTC_USD", price=1.0, timestamp=now - 240))
+    series = await index.get_series("BTC_USD", mock_repo)
+
+    assert list(series.timestamps) == [now - 300, now - 240, now - 180]
+
+
+@pytest.mark.asyncio
+async def test_disabled_index_is_not_used():
+    index = PriceIndex()
+    assert await index.get_series("BTC_USD", MagicMock()) is None
+
+
+@pytest.mark.asyncio
+async def test_cached_repository_answers_from_index():
+    now = int(time.time())
+    index = PriceIndex(window_seconds=3600)
+    index.set_enabled(True)
+
+    with patch.object(PriceRepository, "get_series_since", AsyncMock(return_value=([now - 120, now - 60], [1.0, 2.0]))), \
+            patch.object(PriceRepository, "get_at_or_before", AsyncMock()) as db_query:
+        repo = CachedPriceRepository(MagicMock(), None, index)
+        price = await repo.get_at_or_before("BTC_USD", now - 90)
+
+    assert price == Price(ticker="BTC_USD", price=1.0, timestamp=now - 120)
+    db_query.assert_not_called()
+    assert index.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_cached_repository_falls_back_outside_window():
+    # запрос раньше окна индекса уходит в БД
+    now = int(time.time())
+    index = PriceIndex(window_seconds=3600)
+    index.set_enabled(True)
+    db_price = Price(ticker="BTC_USD", price=1.0, timestamp=1000)
+
+    with patch.object(PriceRepository, "get_series_since", AsyncMock(return_value=([now - 60], [2.0]))), \
+            patch.object(PriceRepository, "get_at_or_before", AsyncMock(return_value=db_price)) as at_or_before, \
+            patch.object(PriceRepository, "get_nearest", AsyncMock(return_value=None)) as nearest:
+        repo = CachedPriceRepository(MagicMock(), None, index)
+        assert await repo.get_at_or_before("BTC_USD", 1500) == db_price
+        assert await repo.get_nearest("BTC_USD", now - 3590, 60) is None
+
+    at_or_before.assert_called_once_with("BTC_USD", 1500)
+    nearest.assert_called_once_with("BTC_USD", now - 3590, 60)
+    assert index.fallbacks == 2
+
+
+@pytest.mark.asyncio
+async def test_index_refreshes_from_primary_when_replica_lags():
+    now = int(time.time())
+    index = PriceIndex(window_seconds=3600)
+    index.set_enabled(True)
+    primary, replica = MagicMock(name="primary"), MagicMock(name="replica")
+    history = {primary: ([now - 120], [1.0]), replica: ([now - 120], [1.0])}
+
+    async def get_series_since(repository, ticker, after):
+        timestamps, prices = history[repository.db]
+        points = [(t, p) for t, p in zip(timestamps, prices) if t > after]
+        return [t for t, _ in points], [p for _, p in points]
+
+    with patch.object(PriceRepository, "get_series_since", autospec=True, side_effect=get_series_since):
+        repo = CachedPriceRepository(replica, None, index, index_db=primary)
+        assert (await repo.get_nearest("BTC_USD", now - 120, 0)).price == 1.0
+
+        # новая цена записана в основную базу и пришла по NOTIFY, реплика ее еще не видит
+        history[primary] = ([now - 120, now - 60], [1.0, 2.0])
+        index.on_price(Price(ticker="BTC_USD", price=2.0, timestamp=now - 60))
+
+        assert (await repo.get_nearest("BTC_USD", now - 60, 0)).price == 2.0
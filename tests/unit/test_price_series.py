@@ -0,0 +1,53 @@
+import struct
+from array import array
+
+import numpy as np
+import pytest
+
+from src.domain.models import Price, PriceSeries
+
+
+def _prices(count):
+    return [Price(ticker="BTC_USD", price=50000.0 + i / 4, timestamp=1234567890 + i) for i in range(count)]
+
+
+def test_price_has_no_instance_dict():
+    assert not hasattr(Price("BTC_USD", 1.0, 1), "__dict__")
+
+
+def test_series_round_trips_prices():
+    prices = _prices(5)
+    series = PriceSeries.from_prices("BTC_USD", prices)
+
+    assert len(series) == 5
+    assert series.nbytes == 5 * 16
+    assert series.to_prices() == prices
+    assert series[-1] == prices[-1]
+    assert series[1:3].to_prices() == prices[1:3]
+
+
+def test_series_rejects_mismatched_columns():
+    with pytest.raises(ValueError):
+        PriceSeries("BTC_USD", [1, 2], [1.0])
+
+
+def test_series_from_network_bytes():
+    # формат int8send / float8send: big-endian без заголовков
+    timestamps = b"".join(struct.pack(">q", ts) for ts in (1, 2, 3))
+    prices = b"".join(struct.pack(">d", price) for price in (0.5, 1.5, -2.0))
+
+    series = PriceSeries.from_network_bytes("BTC_USD", timestamps, prices)
+
+    assert series == PriceSeries("BTC_USD", [1, 2, 3], [0.5, 1.5, -2.0])
+
+
+def test_numpy_views_share_memory():
+    series = PriceSeries("BTC_USD", [1, 2, 3], [1.0, 2.0, 3.0])
+
+    timestamps, prices = series.numpy()
+    series.prices[0] = 10.0
+
+    assert timestamps.dtype == np.int64 and prices.dtype == np.float64
+    assert prices[0] == 10.0
+    assert prices.sum() == 15.0
+    assert isinstance(series.timestamps, array)
@@ -103,6 +103,7 @@ async def test_save():
     mock_conn = AsyncMock()
     
     mock_conn.execute = AsyncMock()
+    mock_conn.fetch = AsyncMock(return_value=[{"id": 1, "name": "BTC_USD"}])
     mock_conn.__aenter__ = AsyncMock(return_value=mock_conn)
     mock_conn.__aexit__ = AsyncMock(return_value=None)
     
@@ -114,7 +115,110 @@ async def test_save():
     
     await repo.save(price)
     
-    # проверяем что execute был вызван
-    mock_conn.execute.assert_called_once()
+    # первая запись создает месячную секцию, вторая - сама вставка с id тикера
+    assert "PARTITION OF prices" in mock_conn.execute.call_args_list[0][0][0]
     call_args = mock_conn.execute.call_args
     assert "INSERT INTO prices" in call_args[0][0]
+    assert call_args[0][1:4] == (1, 50000.0, 1234567890)
+    
+    # id тикера и секция закэшированы, повторная запись - один запрос
+    mock_conn.execute.reset_mock()
+    await repo.save(Price(ticker="BTC_USD", price=50001.0, timestamp=1234567891))
+    mock_conn.fetch.assert_called_once()
+    mock_conn.execute.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_save_many_single_idempotent_insert():
+    # пачка пишется одним INSERT из массивов, а не INSERT на каждую строку; повторы пропускаются
+    mock_db = MagicMock()
+    mock_pool = AsyncMock()
+    mock_conn = AsyncMock()
+    
+    mock_conn.fetch = AsyncMock(return_value=[{"id": 1, "name": "BTC_USD"}, {"id": 2, "name": "ETH_USD"}])
+    mock_conn.__aenter__ = AsyncMock(return_value=mock_conn)
+    mock_conn.__aexit__ = AsyncMock(return_value=None)
+    
+    mock_pool.acquire = MagicMock(return_value=mock_conn)
+    mock_db.get_pool = AsyncMock(return_value=mock_pool)
+    
+    repo = PriceRepository(mock_db)
+    repo._partitions.add(1233446400)
+    await repo.save_many([
+        Price(ticker="BTC_USD", price=50000.0, timestamp=1234567890),
+        Price(ticker="ETH_USD", price=3000.0, timestamp=1234567890)
+    ])
+    
+    # строки и свечи в price_rollups - один запрос на всю пачку
+    mock_conn.execute.assert_called_once()
+    query, *args = mock_conn.execute.call_args[0]
+    assert "ON CONFLICT DO NOTHING" in query
+    assert "INSERT INTO price_rollups" in query
+    # в prices пишется smallint id из словаря tickers, а не строка тикера
+    assert args[:3] == [[1234567890, 1234567890], [50000.0, 3000.0], [1, 2]]
+
+
+@pytest.mark.asyncio
+async def test_save_many_empty():
+    # пустой список - в БД не ходим
+    mock_db = MagicMock()
+    mock_db.get_pool = AsyncMock()
+    
+    repo = PriceRepository(mock_db)
+    repo._partitions.add(1233446400)
+    await repo.save_many([])
+    
+    mock_db.get_pool.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_page_json_keyset():
+    # страница строится по границе timestamp, без OFFSET
+    mock_db = MagicMock()
+    mock_pool = AsyncMock()
+    mock_conn = AsyncMock()
+    
+    mock_conn.fetchrow = AsyncMock(return_value={
+        "body": '[{"ticker":"BTC_USD","price":50000.0,"timestamp":1234567890}]', "count": 1, "last_timestamp": 1234567890
+    })
+    mock_conn.__aenter__ = AsyncMock(return_value=mock_conn)
+    mock_conn.__aexit__ = AsyncMock(return_value=None)
+    
+    mock_pool.acquire = MagicMock(return_value=mock_conn)
+    mock_db.get_pool = AsyncMock(return_value=mock_pool)
+    
+    repo = PriceRepository(mock_db)
+    body, count, last_timestamp = await repo.get_page_json("BTC_USD", 10, before=1234567900)
+    
+    assert (count, last_timestamp) == (1, 1234567890)
+    query, *args = mock_conn.fetchrow.call_args[0]
+    assert "timestamp < $2" in query
+    assert "OFFSET" not in query
+    assert "LIMIT $3)" in query
+    assert args[:3] == ["BTC_USD", 1234567900, 10]
+
+
+@pytest.mark.asyncio
+async def test_get_candles():
+    # агрегация в SQL, репозиторий только собирает Candle
+    mock_db = MagicMock()
+    mock_pool = AsyncMock()
+    mock_conn = AsyncMock()
+    
+    mock_conn.fetch = AsyncMock(return_value=[{
+        "bucket": 1234564800, "open": 1.0, "high": 3.0, "low": 0.5, "close": 2.0, "mean": 1.5, "count": 4
+    }])
+    mock_conn.__aenter__ = AsyncMock(return_value=mock_conn)
+    mock_conn.__aexit__ = AsyncMock(return_value=None)
+    
+    mock_pool.acquire = MagicMock(return_value=mock_conn)
+    mock_db.get_pool = AsyncMock(return_value=mock_pool)
+    
+    repo = PriceRepository(mock_db)
+    result = await repo.get_candles("BTC_USD", 1234560000, 1234570000, 3600)
+    
+    assert len(result) == 1
+    assert result[0].ticker == "BTC_USD"
+    assert result[0].close == 2.0
+    assert "GROUP BY bucket" in mock_conn.fetch.call_args[0][0]
+    assert mock_conn.fetch.call_args[0][1:] == ("BTC_USD", 1234560000, 1234570000, 3600)
@@ -0,0 +1,368 @@
+import asyncio
+import json
+from typing import List
+
+import pytest
+from fastapi import HTTPException, Response
+from unittest.mock import AsyncMock, MagicMock
+
+from src.domain.models import Candle, Price
+from src.infrastructure.cache.price_index import PriceIndex
+from src.infrastructure.live.price_hub import PriceHub
+from src.presentation.api.routes import prices as prices_routes
+from src.presentation.schemas.price_schemas import PriceResponse
+
+
+def _request(accept="", if_none_match=None):
+    request = MagicMock()
+    request.headers = {"accept": accept}
+    if if_none_match is not None:
+        request.headers["if-none-match"] = if_none_match
+    return request
+
+
+def _prices(count, start=1234567890):
+    return [Price(ticker="BTC_USD", price=50000.0 + i, timestamp=start - i) for i in range(count)]
+
+
+async def _read_body(streaming_response):
+    body = b""
+    async for chunk in streaming_response.body_iterator:
+        body += chunk
+    return body
+
+
+def _json_page(prices):
+    body = json.dumps([{"ticker": p.ticker, "price": p.price, "timestamp": p.timestamp} for p in prices]).encode()
+    return AsyncMock(return_value=(body, len(prices), prices[-1].timestamp if prices else None))
+
+
+@pytest.mark.asyncio
+async def test_get_all_without_params_returns_everything():
+    mock_repo = MagicMock()
+    mock_repo.get_page_json = _json_page(_prices(3))
+    mock_repo.get_page_version = AsyncMock(return_value=(3, 1234567800, 1234567890))
+
+    result = await prices_routes.get_all_prices(
+        _request(), "BTC_USD", limit=None, after=None, before=None, stream=False, repository=mock_repo
+    )
+
+    assert result.media_type == "application/json"
+    assert len(json.loads(result.body)) == 3
+    assert prices_routes.NEXT_CURSOR_HEADER not in result.headers
+    mock_repo.get_page_json.assert_called_once_with("BTC_USD", None, after=None, before=None)
+
+
+@pytest.mark.asyncio
+async def test_get_all_full_page_sets_next_cursor():
+    mock_repo = MagicMock()
+    mock_repo.get_page_json = _json_page(_prices(2))
+    mock_repo.get_page_version = AsyncMock(return_value=(2, 1234567800, 1234567890))
+
+    result = await prices_routes.get_all_prices(
+        _request(), "BTC_USD", limit=2, after=None, before=None, stream=False, repository=mock_repo
+    )
+
+    assert len(json.loads(result.body)) == 2
+    assert result.headers[prices_routes.NEXT_CURSOR_HEADER] == str(1234567889)
+
+
+@pytest.mark.asyncio
+async def test_get_all_last_page_has_no_cursor():
+    mock_repo = MagicMock()
+    mock_repo.get_page_json = _json_page(_prices(1))
+
+    result = await prices_routes.get_all_prices(
+        _request(), "BTC_USD", limit=2, after=None, before=1234567900, stream=False, repository=mock_repo
+    )
+
+    assert prices_routes.NEXT_CURSOR_HEADER not in result.headers
+    mock_repo.get_page_json.assert_called_once_with("BTC_USD", 2, after=None, before=1234567900)
+
+
+@pytest.mark.asyncio
+async def test_get_all_keeps_openapi_schema():
+    # быстрый путь отдает готовый Response, но схема ответа в OpenAPI прежняя
+    route = next(r for r in prices_routes.router.routes if r.path == "/all")
+    assert route.response_model == List[PriceResponse]
+
+
+@pytest.mark.asyncio
+async def test_get_all_open_range_revalidates_by_etag():
+    mock_repo = MagicMock()
+    mock_repo.get_page_json = _json_page(_prices(3))
+    mock_repo.get_page_version = AsyncMock(return_value=(3, 1234567800, 1234567890))
+
+    first = await prices_routes.get_all_prices(
+        _request(), "BTC_USD", limit=None, after=None, before=None, stream=False, repository=mock_repo
+    )
+    second = await prices_routes.get_all_prices(
+        _request(if_none_match=first.headers["etag"]), "BTC_USD",
+        limit=None, after=None, before=None, stream=False, repository=mock_repo
+    )
+
+    assert first.headers["cache-control"] == "no-cache"
+    assert second.status_code == 304
+    assert second.body == b""
+    assert second.headers["etag"] == first.headers["etag"]
+    mock_repo.get_page_json.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_get_all_closed_range_is_immutable_without_version_query():
+    # диапазон до 2009 года давно закрыт: ETag по параметрам, 304 вообще без запросов в БД
+    mock_repo = MagicMock()
+    mock_repo.get_page_json = _json_page(_prices(1))
+    mock_repo.get_page_version = AsyncMock()
+
+    first = await prices_routes.get_all_prices(
+        _request(), "BTC_USD", limit=2, after=None, before=1234567900, stream=False, repository=mock_repo
+    )
+    second = await prices_routes.get_all_prices(
+        _request(if_none_match=f'W/{first.headers["etag"][:-1]}-gzip"'), "BTC_USD",
+        limit=2, after=None, before=1234567900, stream=False, repository=mock_repo
+    )
+
+    assert first.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert second.status_code == 304
+    mock_repo.get_page_version.assert_not_called()
+    mock_repo.get_page_json.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_get_by_date_exact_not_modified_without_lookup():
+    mock_repo = MagicMock()
+    mock_repo.get_by_ticker_and_date = AsyncMock(return_value=Price(ticker="BTC_USD", price=1.0, timestamp=1000))
+    response = Response()
+
+    result = await prices_routes.get_price_by_date(
+        _request(), response, "BTC_USD", 1000, mode="exact", tolerance=60, repository=mock_repo
+    )
+    not_modified = await prices_routes.get_price_by_date(
+        _request(if_none_match=response.headers["etag"]), Response(), "BTC_USD", 1000,
+        mode="exact", tolerance=60, repository=mock_repo
+    )
+
+    assert result.price == 1.0
+    assert response.headers["cache-control"] == "public, max-age=31536000, immutable"
+    assert not_modified.status_code == 304
+    mock_repo.get_by_ticker_and_date.assert_called_once()
+
+
+def _chunked_repo(chunks):
+    async def iter_by_ticker(ticker, after=None, before=None, chunk_size=1000):
+        for chunk in chunks:
+            yield chunk
+
+    mock_repo = MagicMock()
+    mock_repo.iter_by_ticker = iter_by_ticker
+    return mock_repo
+
+
+@pytest.mark.asyncio
+async def test_get_all_stream_json_array():
+    # потоковый ответ - тот же JSON-массив, что и обычный
+    mock_repo = _chunked_repo([_prices(2), _prices(1, start=1234567000)])
+
+    response = await prices_routes.get_all_prices(
+        _request(), "BTC_USD", limit=None, after=None, before=None, stream=True, repository=mock_repo
+    )
+
+    payload = json.loads(await _read_body(response))
+    assert [item["timestamp"] for item in payload] == [1234567890, 1234567889, 1234567000]
+
+
+@pytest.mark.asyncio
+async def test_get_all_stream_ndjson():
+    mock_repo = _chunked_repo([_prices(2)])
+
+    response = await prices_routes.get_all_prices(
+        _request(accept="application/x-ndjson"), "BTC_USD",
+        limit=None, after=None, before=None, stream=True, repository=mock_repo
+    )
+
+    lines = (await _read_body(response)).decode().splitlines()
+    assert response.media_type == "application/x-ndjson"
+    assert [json.loads(line)["price"] for line in lines] == [50000.0, 50001.0]
+
+
+@pytest.mark.asyncio
+async def test_get_all_stream_empty():
+    mock_repo = _chunked_repo([])
+
+    response = await prices_routes.get_all_prices(
+        _request(), "BTC_USD", limit=None, after=None, before=None, stream=True, repository=mock_repo
+    )
+
+    assert json.loads(await _read_body(response)) == []
+
+
+@pytest.mark.asyncio
+async def test_get_candles_rejects_empty_range():
+    with pytest.raises(HTTPException) as error:
+        await prices_routes.get_candles(
+            _request(), Response(), "BTC_USD", start=2000, end=1000, interval="1h", repository=MagicMock()
+        )
+    assert error.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_candles_rejects_too_many_buckets():
+    # год минутных свечей - слишком много, нужно брать интервал крупнее
+    with pytest.raises(HTTPException) as error:
+        await prices_routes.get_candles(
+            _request(), Response(), "BTC_USD", start=0, end=365 * 86400, interval="1m", repository=MagicMock()
+        )
+    assert error.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_candles_returns_candles():
+    mock_repo = MagicMock()
+    mock_repo.get_candles = AsyncMock(return_value=[
+        Candle(ticker="BTC_USD", bucket=3600, open=1.0, high=2.0, low=0.5, close=1.5, mean=1.2, count=60)
+    ])
+
+    result = await prices_routes.get_candles(
+        _request(), Response(), "BTC_USD", start=3600, end=7200, interval="5m", repository=mock_repo
+    )
+
+    assert result[0].bucket == 3600
+    assert result[0].count == 60
+
+
+@pytest.mark.asyncio
+async def test_batch_last_keyed_by_ticker():
+    mock_repo = MagicMock()
+    mock_repo.get_last_by_tickers = AsyncMock(return_value={
+        "BTC_USD": Price(ticker="BTC_USD", price=50000.0, timestamp=1234567890)
+    })
+
+    result = await prices_routes.get_last_prices(ticker=["BTC_USD", "UNKNOWN"], repository=mock_repo)
+
+    # тикеры без цен в ответ не попадают
+    assert list(result) == ["BTC_USD"]
+    assert result["BTC_USD"].price == 50000.0
+
+
+@pytest.mark.asyncio
+async def test_batch_rejects_too_many_tickers():
+    tickers = [f"T{i}" for i in range(prices_routes.MAX_BATCH_TICKERS + 1)]
+    with pytest.raises(HTTPException) as error:
+        await prices_routes.get_last_prices(ticker=tickers, repository=MagicMock())
+    assert error.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_repository_reads_from_replica_pool():
+    request = MagicMock()
+    request.app.state.db = MagicMock(name="primary")
+    request.app.state.read_db = MagicMock(name="replica")
+    request.app.state.price_cache = None
+    request.app.state.price_index = None
+
+    repository = await prices_routes.get_repository(request)
+
+    assert repository.db is request.app.state.read_db
+
+    # индекс истории дочитывается по NOTIFY основной базы - и читает из нее, а не из отстающей реплики
+    request.app.state.price_index = PriceIndex()
+    repository = await prices_routes.get_repository(request)
+
+    assert repository.db is request.app.state.read_db
+    assert repository._index_repository.db is request.app.state.db
+
+
+@pytest.mark.asyncio
+async def test_export_streams_file_with_media_type():
+    async def iter_csv(ticker, after=None, before=None, timeout=None):
+        assert (ticker, after, before) == ("BTC_USD", 1, None)
+        yield b"BTC_USD,50000,1234567890\n"
+
+    mock_repo = MagicMock()
+    mock_repo.iter_csv = iter_csv
+
+    response = await prices_routes.export_prices("BTC_USD", fmt="csv", after=1, before=None, repository=mock_repo)
+
+    assert response.media_type == "text/csv"
+    assert response.headers["content-disposition"] == 'attachment; filename="BTC_USD.csv"'
+    assert await _read_body(response) == b"ticker,price,timestamp\nBTC_USD,50000,1234567890\n"
+
+
+def _hub_request(hub):
+    request = MagicMock()
+    request.app.state.price_hub = hub
+    return request
+
+
+@pytest.mark.asyncio
+async def test_live_sse_sends_prices_and_unsubscribes_on_close():
+    hub = PriceHub()
+    hub.publish(Price(ticker="BTC_USD", price=50000.0, timestamp=1234567890))
+
+    response = await prices_routes.live_prices(_hub_request(hub), ticker=["BTC_USD"])
+    events = response.body_iterator
+    retry = await events.__anext__()
+    first = await events.__anext__()
+    hub.publish(Price(ticker="BTC_USD", price=50001.0, timestamp=1234567891))
+    second = await events.__anext__()
+    await events.aclose()
+
+    assert response.media_type == "text/event-stream"
+    assert retry == f"retry: {prices_routes.SSE_RETRY_MILLISECONDS}\n\n".encode()
+    assert first == b'event: price\ndata: {"ticker": "BTC_USD", "price": 50000.0, "timestamp": 1234567890}\n\n'
+    assert b'"price": 50001.0' in second
+    assert hub.stats()["subscribers"] == 0
+
+
+@pytest.mark.asyncio
+async def test_live_sse_releases_subscription_when_client_leaves_before_first_event():
+    hub = PriceHub(max_subscribers=1)
+    response = await prices_routes.live_prices(_hub_request(hub), ticker=["BTC_USD"])
+    assert hub.stats()["subscribers"] == 1
+
+    async def receive():
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        raise OSError("connection reset by peer")
+
+    # клиент ушел, пока отправлялись заголовки: до перебора генератора дело не доходит, его finally не выполнится
+    with pytest.raises(OSError):
+        await response({"type": "http"}, receive, send)
+
+    assert hub.stats()["subscribers"] == 0
+    # слот освободился - следующий клиент подписывается, а не получает 503
+    await prices_routes.live_prices(_hub_request(hub), ticker=["BTC_USD"])
+
+
+@pytest.mark.asyncio
+async def test_live_sse_unavailable_without_hub():
+    with pytest.raises(HTTPException) as exc_info:
+        await prices_routes.live_prices(_hub_request(None), ticker=["BTC_USD"])
+    assert exc_info.value.status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_live_websocket_sends_json_until_disconnect():
+    hub = PriceHub()
+    hub.publish(Price(ticker="BTC_USD", price=50000.0, timestamp=1234567890))
+    incoming = asyncio.Queue()
+    sent = []
+    await incoming.put({"type": "websocket.connect"})
+
+    async def send(message):
+        sent.append(message)
+        if message["type"] == "websocket.send":
+            await incoming.put({"type": "websocket.disconnect", "code": 1000})
+
+    websocket = prices_routes.WebSocket(
+        {"type": "websocket", "path": "/live/ws", "headers": [], "app": MagicMock()}, incoming.get, send
+    )
+    websocket.scope["app"].state.price_hub = hub
+
+    await prices_routes.live_prices_ws(websocket, ticker=["BTC_USD"])
+
+    assert sent[0] == {"type": "websocket.accept", "subprotocol": None, "headers": []}
+    assert json.loads(sent[1]["text"]) == {"ticker": "BTC_USD", "price": 50000.0, "timestamp": 1234567890}
+    assert hub.stats()["subscribers"] == 0
@@ -0,0 +1,98 @@
+import json
+import subprocess
+import sys
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.presentation.api import main
+from src.presentation.api.routes import health
+
+
+def _loaded_modules(statement: str, modules):
+    # импорт в свежем интерпретаторе: в процессе pytest все уже загружено другими тестами
+    code = f"import json, sys; {statement}; print(json.dumps([m for m in {list(modules)!r} if m in sys.modules]))"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def test_api_import_does_not_load_worker_or_analytics_dependencies():
+    # numpy грузится на первом запросе аналитики, Celery, aiohttp и redis API не нужны вовсе
+    loaded = _loaded_modules("import src.presentation.api.main", ["numpy", "celery", "aiohttp", "redis", "pyarrow"])
+
+    assert loaded == []
+
+
+@pytest.mark.parametrize("cli, allowed", [
+    ("export_prices", []),
+    ("retention", []),
+    ("dedup_prices", []),
+    ("migrate_schema", []),
+    ("backfill_rollups", []),
+    # эти CLI сами ходят в Deribit
+    ("backfill_gaps", ["aiohttp"]),
+    ("stream_prices", ["aiohttp"]),
+])
+def test_task_package_cli_does_not_load_celery(cli, allowed):
+    loaded = _loaded_modules(f"import src.infrastructure.tasks.{cli}", ["celery", "aiohttp", "redis", "numpy"])
+
+    assert [name for name in loaded if name not in allowed] == []
+
+
+def test_celery_app_registers_every_task_on_first_access():
+    code = (
+        "import json; from celery.app.utils import find_app; app = find_app('src.infrastructure.tasks'); "
+        "print(json.dumps(sorted(name for name in app.tasks if name.startswith('src.'))))"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+
+    assert json.loads(output.splitlines()[-1]) == [
+        "src.infrastructure.tasks.backfill_gaps.backfill_price_gaps",
+        "src.infrastructure.tasks.fetch_prices.fetch_price_shard",
+        "src.infrastructure.tasks.fetch_prices.fetch_prices",
+        "src.infrastructure.tasks.retention.maintain_partitions",
+    ]
+
+
+def _app(ready=False):
+    return SimpleNamespace(state=SimpleNamespace(ready=ready, db=MagicMock(), read_db=MagicMock()))
+
+
+@pytest.mark.asyncio
+async def test_ready_is_503_until_warmed_up():
+    request = MagicMock()
+    request.app = _app(ready=False)
+    assert (await health.ready(request)).status_code == 503
+
+    request.app.state.ready = True
+    assert (await health.ready(request)).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_warm_up_flips_ready_after_pool_and_listener():
+    app = _app()
+    app.state.db.connect = AsyncMock()
+    listener = MagicMock()
+    listener.start = AsyncMock()
+
+    with patch.object(main.PriceRepository, "warm_up", AsyncMock()) as warm_up:
+        await main._warm_up(app, listener)
+
+    app.state.db.connect.assert_awaited_once()
+    warm_up.assert_awaited_once()
+    listener.start.assert_awaited_once()
+    assert app.state.ready is True
+
+
+@pytest.mark.asyncio
+async def test_warm_up_retries_while_database_is_unavailable(monkeypatch):
+    monkeypatch.setattr(main, "STARTUP_RETRY_DELAY", 0.0)
+    app = _app()
+    app.state.db.connect = AsyncMock(side_effect=[ConnectionRefusedError(), OSError(), None])
+
+    with patch.object(main.PriceRepository, "warm_up", AsyncMock()):
+        await main._warm_up(app, None)
+
+    assert app.state.db.connect.await_count == 3
+    assert app.state.ready is True
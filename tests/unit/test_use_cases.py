@@ -1,9 +1,16 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock
 
+from src.application.use_cases.export_prices import ExportPricesUseCase
 from src.application.use_cases.get_all_prices import GetAllPricesUseCase
+from src.application.use_cases.get_candles import GetCandlesUseCase
 from src.application.use_cases.get_last_price import GetLastPriceUseCase
+from src.application.use_cases.get_last_prices import GetLastPricesUseCase
+from src.application.use_cases.get_price_as_of import GetPriceAsOfUseCase
 from src.application.use_cases.get_price_by_date import GetPriceByDateUseCase
+from src.application.use_cases.get_prices_json import GetPricesJsonUseCase
+from src.application.use_cases.get_prices_pages import GetPricesPagesUseCase
+from src.application.use_cases.get_prices_version import GetPricesVersionUseCase
 from src.domain.models import Price
 
 
@@ -89,3 +96,110 @@ async def test_get_price_by_date_missing():
     result = await use_case.execute("BTC_USD", 9999999999)
     
     assert result is None
+
+
+@pytest.mark.asyncio
+async def test_get_prices_json_returns_body_and_cursor():
+    mock_repo = MagicMock()
+    mock_repo.get_page_json = AsyncMock(return_value=(b"[]", 0, None))
+    
+    use_case = GetPricesJsonUseCase(mock_repo)
+    result = await use_case.execute("BTC_USD", 100, after=1, before=2)
+    
+    assert result == (b"[]", 0, None)
+    mock_repo.get_page_json.assert_called_once_with("BTC_USD", 100, after=1, before=2)
+
+
+@pytest.mark.asyncio
+async def test_get_prices_version_returns_count_and_timestamp_bounds():
+    mock_repo = MagicMock()
+    mock_repo.get_page_version = AsyncMock(return_value=(2, 1234567800, 1234567900))
+    
+    use_case = GetPricesVersionUseCase(mock_repo)
+    result = await use_case.execute("BTC_USD", 100, after=1, before=2)
+    
+    assert result == (2, 1234567800, 1234567900)
+    mock_repo.get_page_version.assert_called_once_with("BTC_USD", 100, after=1, before=2)
+
+
+@pytest.mark.asyncio
+async def test_get_candles_converts_interval():
+    # интервал "5m" уходит в репозиторий как 300 секунд
+    mock_repo = MagicMock()
+    mock_repo.get_candles = AsyncMock(return_value=[])
+    
+    use_case = GetCandlesUseCase(mock_repo)
+    await use_case.execute("BTC_USD", 1000, 2000, "5m")
+    
+    mock_repo.get_candles.assert_called_once_with("BTC_USD", 1000, 2000, 300)
+
+
+@pytest.mark.asyncio
+async def test_get_candles_reads_rollups_for_aligned_range():
+    # часовые свечи по границам часов берутся из price_rollups
+    mock_repo = MagicMock()
+    mock_repo.get_rollup_candles = AsyncMock(return_value=[])
+    mock_repo.get_candles = AsyncMock(return_value=[])
+    
+    use_case = GetCandlesUseCase(mock_repo)
+    await use_case.execute("BTC_USD", 3600, 7200, "1h")
+    await use_case.execute("BTC_USD", 3600, 7300, "1h")
+    
+    mock_repo.get_rollup_candles.assert_called_once_with("BTC_USD", 3600, 7200, 3600)
+    mock_repo.get_candles.assert_called_once_with("BTC_USD", 3600, 7300, 3600)
+
+
+@pytest.mark.asyncio
+async def test_get_price_as_of_modes():
+    mock_repo = MagicMock()
+    mock_repo.get_at_or_before = AsyncMock(return_value=None)
+    mock_repo.get_nearest = AsyncMock(return_value=None)
+    
+    use_case = GetPriceAsOfUseCase(mock_repo)
+    await use_case.execute("BTC_USD", 1234567890)
+    await use_case.execute("BTC_USD", 1234567890, tolerance=30)
+    
+    mock_repo.get_at_or_before.assert_called_once_with("BTC_USD", 1234567890)
+    mock_repo.get_nearest.assert_called_once_with("BTC_USD", 1234567890, 30)
+
+
+@pytest.mark.asyncio
+async def test_get_last_prices_deduplicates_tickers():
+    mock_repo = MagicMock()
+    mock_repo.get_last_by_tickers = AsyncMock(return_value={})
+    
+    use_case = GetLastPricesUseCase(mock_repo)
+    await use_case.execute(["BTC_USD", "ETH_USD", "BTC_USD"])
+    
+    mock_repo.get_last_by_tickers.assert_called_once_with(["BTC_USD", "ETH_USD"])
+
+
+@pytest.mark.asyncio
+async def test_get_prices_pages_passes_cursor():
+    mock_repo = MagicMock()
+    mock_repo.get_pages_by_tickers = AsyncMock(return_value={"BTC_USD": [], "ETH_USD": []})
+    
+    use_case = GetPricesPagesUseCase(mock_repo)
+    result = await use_case.execute(["BTC_USD", "ETH_USD"], 10, before=1234567890)
+    
+    assert set(result) == {"BTC_USD", "ETH_USD"}
+    mock_repo.get_pages_by_tickers.assert_called_once_with(["BTC_USD", "ETH_USD"], 10, after=None, before=1234567890)
+
+
+@pytest.mark.asyncio
+async def test_export_prices_reads_csv_with_timeout():
+    calls = []
+
+    async def iter_csv(ticker, after=None, before=None, timeout=None):
+        calls.append((ticker, after, before, timeout))
+        yield b"BTC_USD,1,2\n"
+
+    mock_repo = MagicMock()
+    mock_repo.iter_csv = iter_csv
+
+    use_case = ExportPricesUseCase(mock_repo)
+    body = b"".join([chunk async for chunk in use_case.execute("BTC_USD", "csv", after=1, timeout=60.0)])
+
+    assert body == b"ticker,price,timestamp\nBTC_USD,1,2\n"
+    assert calls == [("BTC_USD", 1, None, 60.0)]
+
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from src.domain.models import Price
+from src.infrastructure.tasks import worker_resources as worker_resources_module
+from src.infrastructure.tasks.worker_resources import WorkerResources
+
+
+@pytest.fixture
+def mocked_dependencies():
+    # подменяем БД, репозиторий и клиент, чтобы не ходить в сеть
+    mock_db = MagicMock()
+    mock_db.connect = AsyncMock()
+    mock_db.close = AsyncMock()
+    mock_repo = MagicMock()
+    mock_repo.create_table_if_not_exists = AsyncMock()
+    mock_repo.save_many = AsyncMock()
+    mock_client = MagicMock()
+    mock_client.close = AsyncMock()
+    mock_client.get_index_prices = AsyncMock(return_value=[
+        Price(ticker="BTC_USD", price=50000.0, timestamp=1234567890)
+    ])
+
+    with patch.object(worker_resources_module, "Database", return_value=mock_db), \
+            patch.object(worker_resources_module, "PriceRepository", return_value=mock_repo), \
+            patch.object(worker_resources_module, "DeribitClient", return_value=mock_client):
+        yield mock_db, mock_repo, mock_client
+
+
+def test_resources_are_created_once(mocked_dependencies):
+    mock_db, mock_repo, _ = mocked_dependencies
+    resources = WorkerResources()
+    resources.start()
+    loop = resources.loop
+
+    async def work(res):
+        return res.repository
+
+    assert resources.run(work) is mock_repo
+    assert resources.run(work) is mock_repo
+    # схема создается один раз при старте воркера, а не в каждой задаче
+    assert mock_db.connect.await_count == 1
+    assert mock_repo.create_table_if_not_exists.await_count == 1
+    assert resources.loop is loop
+    assert resources.tasks_run == 2
+
+    resources.shutdown()
+
+
+def test_run_starts_lazily(mocked_dependencies):
+    # в solo-пуле worker_process_init не срабатывает - ресурсы поднимаются на первой задаче
+    resources = WorkerResources()
+
+    async def work(res):
+        return 42
+
+    assert resources.run(work) == 42
+    assert resources.started
+    resources.shutdown()
+
+
+def test_process_init_hook_only_starts_the_exporter(mocked_dependencies):
+    # init дочернего процесса не ходит в БД: медленная или недоступная база не должна убивать процесс на старте
+    mock_db, mock_repo, _ = mocked_dependencies
+
+    with patch.object(worker_resources_module, "start_worker_exporter") as exporter:
+        worker_resources_module._start_worker_exporter()
+
+    exporter.assert_called_once()
+    assert not worker_resources_module.worker_resources.started
+    mock_db.connect.assert_not_awaited()
+    mock_repo.create_table_if_not_exists.assert_not_awaited()
+
+
+def test_overhead_excludes_work_time(mocked_dependencies):
+    resources = WorkerResources()
+    resources.start()
+
+    async def slow_work(res):
+        await asyncio.sleep(0.05)
+
+    resources.run(slow_work)
+
+    assert 0 <= resources.last_overhead_seconds < 0.05
+    assert resources.total_overhead_seconds == resources.last_overhead_seconds
+    resources.shutdown()
+
+
+def test_shutdown_closes_everything(mocked_dependencies):
+    mock_db, _, mock_client = mocked_dependencies
+    resources = WorkerResources()
+    resources.start()
+    loop = resources.loop
+
+    resources.shutdown()
+    resources.shutdown()
+
+    mock_client.close.assert_awaited_once()
+    mock_db.close.assert_awaited_once()
+    assert loop.is_closed()
+    assert not resources.started
+
+
+def test_fetch_prices_task_uses_worker_resources(mocked_dependencies):
+    _, mock_repo, mock_client = mocked_dependencies
+    from src.infrastructure.tasks.fetch_prices import fetch_prices
+
+    resources = WorkerResources()
+    with patch("src.infrastructure.tasks.fetch_prices.worker_resources", resources):
+        result = fetch_prices()
+        fetch_prices()
+
+    assert result["saved"] == 1
+    assert "overhead_seconds" in result
+    assert mock_client.get_index_prices.await_count == 2
+    assert mock_repo.save_many.await_count == 2
+    assert mock_repo.create_table_if_not_exists.await_count == 1
+    resources.shutdown()